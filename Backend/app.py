@@ -6,16 +6,19 @@ from flask_cors import CORS
 # from routes.api import api_bp # Comment out - file doesn't exist yet
 from routes.prediction_routes import prediction_bp # Import your new blueprint
 from routes.machine_routes import machine_bp # Import machine vitals blueprint
-from ml.utils import load_ml_artifacts # Import to ensure model is loaded on startup
+from ml.model_registry import model_registry # Import to ensure model is loaded on startup
+import os
 import threading
 import routes.machine_routes as machine_routes
+from services.async_stream_server import ASYNC_STREAM_PORT
 
 app = Flask(__name__)
 CORS(app) # Apply CORS to the entire app, or just specific blueprints/routes as needed
 
-# Load ML artifacts when the app starts
+# Load the active model version when the app starts. The artifact is memory-mapped (MODEL_MMAP_MODE),
+# so workers forked after this (e.g. gunicorn --preload) or loading it themselves share its pages
 with app.app_context():
-    load_ml_artifacts() # This will load your model and scaler when the app context is pushed
+    model_registry.active()
 
 # Register blueprints
 # app.register_blueprint(auth_bp, url_prefix='/auth')  # Comment out - blueprint doesn't exist yet
@@ -23,6 +26,14 @@ with app.app_context():
 app.register_blueprint(prediction_bp, url_prefix='/ml') # Prefix your ML API calls with /ml
 app.register_blueprint(machine_bp, url_prefix='/machine') # Prefix machine vitals API calls with /machine
 
+# Advance the standalone sensor simulator in the background; /machine/vitals/current only reads its snapshot
+machine_routes.simulator.start_ticker()
+
+# Optional asyncio server for the vitals stream and snapshot endpoints (ASYNC_STREAM_PORT). Not in the
+# debug reloader's watcher process, which would hold the port the serving process needs
+if ASYNC_STREAM_PORT > 0 and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    machine_routes.ASYNC_STREAM.start()
+
 @app.route('/')
 def home():
     return jsonify({"message": "Welcome to the Fullstack Flask Backend!"})
@@ -0,0 +1,115 @@
+"""
+Benchmark: reader latency and fleet-lock wait times while the simulation ticks.
+
+    locked    the old pattern - the worker holds the lock for the whole tick (random walk,
+              predictions, JSON logging) and readers take the same lock for every lookup
+    snapshot  the RCU pattern - the worker builds the next state off-lock and holds the lock
+              only to swap the published FleetSnapshot; readers never touch the lock
+
+Both modes run the same tick (FleetSimulator step, rolling features, forest prediction and a
+log line per machine) back to back, with reader threads doing per-machine vitals lookups.
+
+Run from the Backend directory:
+    python benchmarks/bench_fleet_lock.py [machines] [readers] [seconds]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.feature_state import RollingFeatureState
+from services.fleet_simulator import FleetSimulator
+from services.fleet_state import InstrumentedLock, SnapshotStore
+from services.prediction_service import get_machine_prediction_from_features
+
+STATS = {
+    'temperature': {'mean': 75.0, 'std': 8.0},
+    'pressure': {'mean': 100.0, 'std': 8.0},
+    'vibration': {'mean': 0.4, 'std': 0.15}
+}
+TYPES = ['Haul Truck', 'Drill Rig', 'Shovel/Excavator', 'Crusher']
+
+
+def tick(fleet, states, log_path):
+    fleet.step()
+    entries = {}
+    for i in range(fleet.n_machines):
+        reading = fleet.reading(i)
+        now = datetime.utcnow()
+        states[i].update(now, reading['temperature'], reading['vibration'], reading['pressure'])
+        prediction = None
+        if states[i].ready:
+            prediction = get_machine_prediction_from_features(TYPES[i % 4], states[i].features())
+        entries[str(i)] = {**reading, 'timestamp': now.isoformat(), 'prediction': prediction}
+    with open(log_path, 'a') as f:
+        for mid, entry in entries.items():
+            f.write(json.dumps({'machine_id': mid, **entry}) + '\n')
+    return entries
+
+
+def run(mode, machines, readers, seconds, log_path):
+    lock = InstrumentedLock(mode)
+    store = SnapshotStore(write_lock=lock)
+    current = {}
+    fleet = FleetSimulator(machines, STATS, seed=0)
+    states = [RollingFeatureState() for _ in range(machines)]
+    stop = threading.Event()
+    ticks = []
+    latencies = [[] for _ in range(readers)]
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            if mode == 'locked':
+                with lock:
+                    current.update(tick(fleet, states, log_path))
+            else:
+                entries = tick(fleet, states, log_path)
+                with lock:
+                    store.publish(entries)
+            ticks.append(time.perf_counter() - start)
+
+    def reader(k):
+        local = latencies[k]
+        i = 0
+        while not stop.is_set():
+            mid = str(i % machines)
+            start = time.perf_counter()
+            if mode == 'locked':
+                with lock:
+                    current.get(mid)
+            else:
+                store.current().get(mid)
+            local.append(time.perf_counter() - start)
+            i += 1
+            time.sleep(0.0005)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    lat = np.concatenate([np.array(l) for l in latencies]) * 1000
+    return len(ticks), np.mean(ticks) * 1000, lat, lock.stats()
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    print(f"{machines} machines, {readers} readers, {seconds:.0f} s per mode")
+    print(f"{'mode':<10}{'ticks':>7}{'tick ms':>9}{'reads':>9}{'read p50 ms':>13}{'read p99 ms':>13}"
+          f"{'read max ms':>13}{'lock wait mean ms':>19}{'lock wait max ms':>18}{'contended':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('locked', 'snapshot'):
+            n_ticks, tick_ms, lat, stats = run(mode, machines, readers, seconds, os.path.join(tmp, f'{mode}.log'))
+            print(f"{mode:<10}{n_ticks:>7}{tick_ms:>9.1f}{len(lat):>9,}{np.percentile(lat, 50):>13.4f}"
+                  f"{np.percentile(lat, 99):>13.3f}{lat.max():>13.3f}{stats['wait_mean_ms']:>19.4f}"
+                  f"{stats['wait_max_ms']:>18.3f}{stats['contended']:>11,}")
@@ -0,0 +1,43 @@
+"""
+Benchmark: fast-forward replay throughput.
+
+Replays a synthetic fleet with random scripted episodes on a fast-forward SimulationClock
+(rolling features, forest predictions and risk-driven cadences included) and reports samples
+per wall-clock second and how many simulated days one wall-clock second covers.
+
+Run from the Backend directory:
+    python benchmarks/bench_fleet_replay.py [machines] [days] [seed]
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.fleet_episodes import EpisodeScript
+from services.fleet_replay import replay_fleet, synthetic_fleet
+
+
+def run(machines, days, seed, predict):
+    fleet = synthetic_fleet(machines)
+    duration = days * 86400
+    script = EpisodeScript(seed)
+    script.schedule_random([machine['id'] for machine in fleet], duration)
+    samples = 0
+    labeled = 0
+    start = time.perf_counter()
+    for batch in replay_fleet(fleet, duration, seed=seed, episodes=script, predict=predict):
+        samples += len(batch)
+        labeled += sum(s['Mode'] != 'normal' for s in batch)
+    return samples, labeled, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+
+    print(f"{machines} machines, {days:g} simulated days, seed {seed}")
+    print(f"{'mode':<14}{'samples':>10}{'episode':>10}{'wall s':>10}{'samples/s':>12}{'sim days/s':>12}")
+    for predict in (False, True):
+        samples, labeled, wall = run(machines, days, seed, predict)
+        mode = 'with forest' if predict else 'walk only'
+        print(f"{mode:<14}{samples:>10,}{labeled:>10,}{wall:>10.2f}{samples / wall:>12,.0f}{days / wall:>12.2f}")
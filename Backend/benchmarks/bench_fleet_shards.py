@@ -0,0 +1,62 @@
+"""
+Benchmark: sharded simulation throughput and the cost of reading shared memory.
+
+Runs the fleet in 1, 2, ... shard processes on a fast-forward clock (every shard samples,
+features and scores as fast as it can) and reports samples per wall-clock second once the
+shards are warm, plus how long the Flask side takes to copy every shard's rows out of shared
+memory. Throughput only scales with shards up to the number of free cores.
+
+Run from the Backend directory:
+    python benchmarks/bench_fleet_shards.py [machines] [max_shards] [seconds]
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.fleet_replay import synthetic_fleet
+from services.fleet_shards import ShardSupervisor
+from services.fleet_simulator import FleetSimulator, load_dataset_stats, DATASET_CSV
+from services.simulation_clock import SimulationClock
+
+
+def samples(supervisor):
+    return sum(shard['samples'] for shard in supervisor.stats())
+
+
+def run(machines, n_shards, seconds, stats):
+    fleet = synthetic_fleet(machines)
+    supervisor = ShardSupervisor(n_shards, fleet, stats, SimulationClock(speed=0), seed=0)
+    supervisor.start(FleetSimulator(machines, stats, seed=0).values, [machine['status'] for machine in fleet])
+    try:
+        # Wait until every shard has loaded the model and filled its feature windows
+        while min(shard['samples'] for shard in supervisor.stats()) < machines // n_shards * 20:
+            time.sleep(0.1)
+        start_samples, start = samples(supervisor), time.perf_counter()
+        time.sleep(seconds)
+        rate = (samples(supervisor) - start_samples) / (time.perf_counter() - start)
+
+        reads = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.5:
+            for shard in range(supervisor.n_shards):
+                supervisor.read_shard(shard)
+            reads += 1
+        read_ms = (time.perf_counter() - start) / reads * 1000
+    finally:
+        supervisor.stop()
+    return rate, read_ms
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    stats = load_dataset_stats(DATASET_CSV)
+    print(f"{machines} machines, fast-forward, {seconds:g}s per run, {os.cpu_count()} CPUs")
+    print(f"{'shards':>7}{'samples/s':>12}{'read all ms':>13}")
+    n_shards = 1
+    while n_shards <= max_shards:
+        rate, read_ms = run(machines, n_shards, seconds, stats)
+        print(f"{n_shards:>7}{rate:>12,.0f}{read_ms:>13.3f}")
+        n_shards *= 2
@@ -0,0 +1,45 @@
+"""
+Benchmark: one simulation tick for N machines - the per-machine random.gauss loop the
+simulation worker used vs FleetSimulator.step().
+
+Run from the Backend directory:
+    python benchmarks/bench_fleet_simulator.py [machine counts...]
+"""
+import os
+import random
+import sys
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.fleet_simulator import FleetSimulator
+
+STATS = {
+    'temperature': {'mean': 75.0, 'std': 8.0},
+    'pressure': {'mean': 100.0, 'std': 8.0},
+    'vibration': {'mean': 0.4, 'std': 0.15}
+}
+
+
+def python_tick(vitals):
+    t_std = max(0.5, STATS['temperature']['std'] * 0.15)
+    p_std = max(1.0, STATS['pressure']['std'] * 0.15)
+    v_std = max(0.02, STATS['vibration']['std'] * 0.15)
+    for vit in vitals:
+        vit['temperature'] = round(max(20, min(120, random.gauss(vit['temperature'], t_std))), 2)
+        vit['pressure'] = round(max(30, min(220, random.gauss(vit['pressure'], p_std))), 2)
+        vit['vibration'] = round(max(0.05, min(8, random.gauss(vit['vibration'], v_std))), 3)
+
+
+def best_ms(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+if __name__ == '__main__':
+    counts = [int(n) for n in sys.argv[1:]] or [4, 1000, 10000, 100000]
+    print(f"{'machines':>10}{'python loop ms':>16}{'fleet step ms':>15}{'speed-up':>10}")
+    for n in counts:
+        vitals = [{'temperature': 75.0, 'pressure': 100.0, 'vibration': 0.4} for _ in range(n)]
+        fleet = FleetSimulator(n, STATS, seed=0)
+        number = max(1, 200000 // max(n, 1))
+        slow = best_ms(lambda: python_tick(vitals), max(1, number // 10))
+        fast = best_ms(fleet.step, number)
+        print(f"{n:>10,}{slow:>16.3f}{fast:>15.3f}{slow / fast:>9.1f}x")
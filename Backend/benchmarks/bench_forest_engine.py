@@ -0,0 +1,31 @@
+"""
+Benchmark: StandardScaler + sklearn RandomForestClassifier.predict_proba vs the flattened
+array engine with the scaler folded into its thresholds.
+
+Run from the Backend directory:
+    python benchmarks/bench_forest_engine.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.utils import load_ml_artifacts, load_inference_engine
+
+
+def best_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+if __name__ == '__main__':
+    model, scaler = load_ml_artifacts()
+    engine = load_inference_engine()
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>6}{'sklearn':>14}{'engine':>14}{'speed-up':>10}{'engine rows/s':>16}")
+    for rows in (1, 16, 256, 4096, 16384):
+        X = rng.normal(scaler.mean_, scaler.scale_, size=(rows, engine.n_features))
+        number = max(3, 2000 // rows)
+        slow = best_per_call(lambda: model.predict_proba((X - scaler.mean_) / scaler.scale_), max(3, number // 10))
+        fast = best_per_call(lambda: engine.predict_proba(X), number)
+        print(f"{rows:>6}{slow * 1e6:>12.1f}µs{fast * 1e6:>12.1f}µs{slow / fast:>9.1f}x{rows / fast:>16,.0f}")
@@ -0,0 +1,90 @@
+"""
+Benchmark: scoring feature batches in-process vs in the process-pool inference backend.
+
+Each client thread repeatedly scores a batch of feature rows while a background thread burns
+Python bytecode, standing in for the simulation worker and request handling that share the
+Flask process' GIL.
+
+Run from the Backend directory:
+    python benchmarks/bench_inference_backend.py [threads] [batches_per_thread] [rows_per_batch]
+"""
+import os
+import sys
+import threading
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.export_model import dataset_features
+from ml.utils import load_inference_engine
+from ml.model_registry import LEGACY_VERSION
+from services.inference_backend import ProcessPoolBackend
+
+
+def gil_load(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def run(score_fn, batches, threads, busy):
+    stop = threading.Event()
+    background = threading.Thread(target=gil_load, args=(stop,), daemon=True)
+    if busy:
+        background.start()
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def client():
+        local = []
+        barrier.wait()
+        for rows in batches:
+            start = time.perf_counter()
+            score_fn(rows)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    clients = [threading.Thread(target=client) for _ in range(threads)]
+    for c in clients:
+        c.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for c in clients:
+        c.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lat = np.array(latencies) * 1000
+    return threads * len(batches) / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rows_per_batch = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+
+    features = dataset_features()
+    rng = np.random.default_rng(0)
+    batches = [features[rng.integers(0, len(features), rows_per_batch)] for _ in range(per_thread)]
+
+    engine = load_inference_engine()
+    backend = ProcessPoolBackend()
+    start = time.perf_counter()
+    workers = backend.warm_up(LEGACY_VERSION)
+    print(f"Pool of {backend.workers} workers x {backend.threads_per_worker} threads "
+          f"ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+    for info in workers[:1]:
+        print(f"  worker thread pools: {info['thread_pools']}")
+
+    def pool_proba(rows):
+        return backend.predict_proba(rows, LEGACY_VERSION)
+
+    assert np.array_equal(pool_proba(batches[0]), engine.predict_proba(batches[0]))
+
+    print(f"{threads} threads x {per_thread} batches of {rows_per_batch} rows")
+    print(f"{'mode':<34}{'batch/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for busy in (False, True):
+        label = ' + GIL load' if busy else ''
+        for name, score_fn in (('inline', engine.predict_proba), ('process pool', pool_proba)):
+            rps, p50, p99 = run(score_fn, batches, threads, busy)
+            print(f"{name + label:<34}{rps:>10,.0f}{p50:>10.2f}{p99:>10.2f}")
+    backend.shutdown()
@@ -0,0 +1,80 @@
+"""
+Benchmark: concurrent get_prediction calls scored inline vs through the micro-batching scheduler.
+
+Run from the Backend directory:
+    python benchmarks/bench_inference_batching.py [threads] [requests_per_thread]
+"""
+import os
+import sys
+import threading
+import time
+import numpy as np
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')  # measure the forest, not the cache
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import services.prediction_service as prediction_service
+from ml.utils import load_ml_artifacts
+from services.inference_batcher import InferenceBatcher
+
+
+def make_window(rng):
+    base = rng.normal([80.0, 0.45, 100.0], [8.0, 0.1, 8.0])
+    return [
+        {'Timestamp': f'2025-10-22T00:0{i}:00', 'Temperature': float(base[0] + i),
+         'Vibration': float(base[1]), 'Pressure': float(base[2] - i)}
+        for i in range(3)
+    ]
+
+
+def run(threads, per_thread):
+    rng = np.random.default_rng(0)
+    windows = [[make_window(rng) for _ in range(per_thread)] for _ in range(threads)]
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def client(mine):
+        local = []
+        barrier.wait()
+        for window in mine:
+            start = time.perf_counter()
+            prediction_service.get_prediction(window)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=client, args=(w,)) for w in windows]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    return threads * per_thread / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    model, scaler = load_ml_artifacts()
+
+    def sklearn_proba(rows, active=None):
+        # The pre-engine scoring path: per-call sklearn overhead dominates
+        return model.predict_proba((rows - scaler.mean_) / scaler.scale_)
+
+    print(f"{threads} threads x {per_thread} requests")
+    print(f"{'mode':<30}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for backend, score_fn in (('engine', prediction_service._predict_proba), ('sklearn', sklearn_proba)):
+        prediction_service.inference_batcher = InferenceBatcher(score_fn, max_batch=1)  # max_batch=1: always inline
+        rps, p50, p99 = run(threads, per_thread)
+        print(f"{f'{backend} inline':<30}{rps:>10,.0f}{p50:>10.2f}{p99:>10.2f}")
+
+        for wait_ms in (0.5, 2.0):
+            batcher = InferenceBatcher(score_fn, max_batch=64, max_wait_ms=wait_ms)
+            prediction_service.inference_batcher = batcher
+            rps, p50, p99 = run(threads, per_thread)
+            stats = batcher.stats()
+            print(f"{f'{backend} batched ({wait_ms} ms)':<30}{rps:>10,.0f}{p50:>10.2f}{p99:>10.2f}"
+                  f"   mean batch {stats['mean_batch_size']:.1f}, max queue {stats['max_queue_depth']}")
@@ -0,0 +1,37 @@
+"""
+Benchmark: machine lookup by id and filtering by type + status, linear list scans vs MachineRegistry.
+
+Run from the Backend directory:
+    python benchmarks/bench_machine_registry.py [fleet sizes...]
+"""
+import os
+import sys
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.machine_registry import MachineRegistry
+
+TYPES = ['Haul Truck', 'Drill Rig', 'Shovel/Excavator', 'Crusher']
+STATUSES = ['online', 'online', 'online', 'maintenance', 'offline']
+
+
+def make_fleet(n):
+    return [{'id': str(i), 'name': f'Machine {i}', 'type': TYPES[i % 4], 'status': STATUSES[i % 5],
+             'location': f'Zone {i % 20}'} for i in range(n)]
+
+
+def best_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == '__main__':
+    sizes = [int(n) for n in sys.argv[1:]] or [4, 1000, 10000]
+    print(f"{'machines':>10}{'id scan µs':>13}{'id lookup µs':>14}{'filter scan µs':>16}{'index µs':>10}")
+    for n in sizes:
+        machines = make_fleet(n)
+        registry = MachineRegistry(machines)
+        target = str(n - 1)
+        scan = best_us(lambda: next((m for m in machines if m['id'] == target), None), 200)
+        lookup = best_us(lambda: registry.get(target), 20000)
+        filter_scan = best_us(lambda: [m for m in machines if m['type'] == 'Crusher' and m['status'] == 'maintenance'], 200)
+        indexed = best_us(lambda: registry.find(type='Crusher', status='maintenance'), 200)
+        print(f"{n:>10,}{scan:>13.2f}{lookup:>14.3f}{filter_scan:>16.2f}{indexed:>10.2f}")
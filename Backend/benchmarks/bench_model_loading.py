@@ -0,0 +1,90 @@
+"""
+Benchmark: worker startup time and memory for 1, 4 and 8 concurrent worker processes, per model
+loading mode:
+
+    pickle       load_ml_artifacts() - unpickles the sklearn forest and scaler (the old import-time path)
+    engine       load_inference_engine(mmap_mode=None) - private copies of the engine arrays
+    engine-mmap  load_inference_engine(mmap_mode='r') - engine arrays mapped from the artifact
+
+Each worker imports the prediction service, loads the model and scores one row, then stays alive
+while RSS and PSS (proportional set size: shared pages split between the processes mapping them)
+are read from /proc. Linux only.
+
+Run from the Backend directory:
+    python benchmarks/bench_model_loading.py [worker counts...]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = r"""
+import json, sys, time
+start = time.perf_counter()
+import numpy as np
+import services.prediction_service
+imported = time.perf_counter()
+from ml.utils import load_ml_artifacts, load_inference_engine, EXPECTED_FEATURES
+mode = sys.argv[1]
+if mode == 'pickle':
+    model, scaler = load_ml_artifacts()
+    model.predict_proba(scaler.transform(np.zeros((1, len(EXPECTED_FEATURES)))))
+else:
+    load_inference_engine(mmap_mode='r' if mode == 'engine-mmap' else None).predict_proba(np.zeros(len(EXPECTED_FEATURES)))
+loaded = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'load_s': loaded - imported}), flush=True)
+sys.stdin.read()
+"""
+
+
+def read_timings(proc):
+    # Skip the loaders' own log lines
+    for line in proc.stdout:
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"Worker {proc.pid} exited before loading the model")
+
+
+def memory_kb(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values
+
+
+def run(mode, workers):
+    env = dict(os.environ, PYTHONWARNINGS='ignore', PREDICTION_CACHE_SIZE='0')
+    procs = [
+        subprocess.Popen([sys.executable, '-c', WORKER, mode], cwd=BACKEND_DIR, env=env,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    timings = [read_timings(p) for p in procs]
+    all_ready = time.perf_counter() - start
+    memory = [memory_kb(p.pid) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return {
+        'all_ready_s': all_ready,
+        'load_ms': 1000 * sum(t['load_s'] for t in timings) / workers,
+        'rss_mb': sum(m['Rss'] for m in memory) / 1024,
+        'pss_mb': sum(m['Pss'] for m in memory) / 1024,
+    }
+
+
+if __name__ == '__main__':
+    counts = [int(n) for n in sys.argv[1:]] or [1, 4, 8]
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'mode':<13}{'workers':>8}{'all ready s':>13}{'load ms/worker':>16}{'total RSS MB':>14}{'total PSS MB':>14}")
+    for workers in counts:
+        for mode in ('pickle', 'engine', 'engine-mmap'):
+            r = run(mode, workers)
+            print(f"{mode:<13}{workers:>8}{r['all_ready_s']:>13.2f}{r['load_ms']:>16.1f}{r['rss_mb']:>14.1f}{r['pss_mb']:>14.1f}")
@@ -0,0 +1,42 @@
+"""
+Microbenchmark: per-call cost of the pandas preprocessing path vs the NumPy fast path.
+
+Run from the Backend directory:
+    python benchmarks/bench_preprocessing.py
+"""
+import os
+import sys
+import timeit
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.utils import load_ml_artifacts, preprocess_input_data
+from services.prediction_service import _window_arrays, _latest_features
+
+WINDOW = [
+    {'Timestamp': '2025-10-22T00:00:00', 'Temperature': 60.0, 'Pressure': 100.0, 'Vibration': 0.45},
+    {'Timestamp': '2025-10-22T00:01:00', 'Temperature': 62.0, 'Pressure': 101.0, 'Vibration': 0.46},
+    {'Timestamp': '2025-10-22T00:02:00', 'Temperature': 65.0, 'Pressure': 102.0, 'Vibration': 0.48}
+]
+
+
+def pandas_path():
+    return preprocess_input_data(pd.DataFrame(WINDOW))[-1]
+
+
+def numpy_path():
+    return _latest_features(WINDOW)
+
+
+def report(name, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<34}{best * 1e6:>10.1f} µs/call")
+    return best
+
+
+if __name__ == '__main__':
+    load_ml_artifacts()
+    print(f"Window of {len(WINDOW)} readings, best of 5 runs")
+    slow = report('pandas preprocess_input_data', pandas_path, 500)
+    fast = report('numpy fast path (request -> features)', numpy_path, 5000)
+    report('  of which dict -> arrays', lambda: _window_arrays(WINDOW), 5000)
+    print(f"Speed-up: {slow / fast:.1f}x")
@@ -0,0 +1,41 @@
+"""
+Benchmark: cost of polling the sensor simulator.
+
+    step-per-read   what GET /vitals/current used to do: advance the walk, check alerts, serialize
+    snapshot        what it does now: return the JSON the ticker serialized at its last tick
+
+Also reports how far the walk moved and how many alerts went out, which with step-per-read
+depended on the polling rate.
+
+Run from the Backend directory:
+    python benchmarks/bench_sensor_reads.py [reads]
+"""
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.sensor_simulation import SensorSimulator
+
+
+def run(mode, reads):
+    sim = SensorSimulator(seed=0)
+    alerts = []
+    sim.send_email_alert = lambda subject, body: alerts.append(subject)
+    start = time.perf_counter()
+    for _ in range(reads):
+        if mode == 'step-per-read':
+            body = '{"success": true, "data": ' + json.dumps(sim.tick()) + '}'
+        else:
+            body = '{"success": true, "data": ' + sim.get_current_readings_json() + '}'
+    elapsed = time.perf_counter() - start
+    return elapsed / reads * 1e6, sim.ticks, len(alerts), len(body)
+
+
+if __name__ == '__main__':
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{reads:,} polls")
+    print(f"{'mode':<16}{'us/read':>10}{'walk steps':>12}{'alerts':>8}")
+    for mode in ('step-per-read', 'snapshot'):
+        us, steps, alerts, _ = run(mode, reads)
+        print(f"{mode:<16}{us:>10.2f}{steps:>12,}{alerts:>8}")
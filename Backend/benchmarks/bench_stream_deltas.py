@@ -0,0 +1,85 @@
+"""
+Benchmark: stream bytes and client work per tick, full updates vs deltas.
+
+    full    what /vitals/stream used to send: every sampled machine's complete entry (name,
+            type, vitals, prediction) on every tick
+    delta   DeltaEncoder: only the machines and fields that changed since they were last sent,
+            plus a keyframe with the whole fleet every STREAM_KEYFRAME_INTERVAL events
+
+The fleet is FleetSimulator's random walk; each tick a quarter of the machines are sampled (as
+the scheduler staggers them), and predictions follow the vitals, so the risk level and failure
+type only change now and then. Client time is json.loads plus merging into its fleet state.
+
+Run from the Backend directory:
+    python benchmarks/bench_stream_deltas.py [machines] [ticks]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.fleet_simulator import FleetSimulator, load_dataset_stats, DATASET_CSV
+from services.stream_delta import DeltaEncoder, apply_delta
+from services.stream_hub import encode_event
+
+DUE_FRACTION = 0.25
+
+
+def make_ticks(machines, ticks):
+    sim = FleetSimulator(machines, load_dataset_stats(DATASET_CSV), seed=0)
+    rng = np.random.default_rng(0)
+    start = datetime(2025, 1, 1)
+    for tick in range(ticks):
+        now = (start + timedelta(seconds=30 * tick)).isoformat()
+        due = np.flatnonzero(rng.random(machines) < DUE_FRACTION)
+        sim.step(due)
+        entries = []
+        for index in due:
+            reading = sim.reading(int(index))
+            risk = min(99, max(0, int(reading['temperature'] - 40)))
+            entries.append({
+                'machine_id': str(index), 'machine_name': f'Haul Truck HT-{index:05d}', 'machine_type': 'Haul Truck',
+                'vitals': {**reading, 'timestamp': now},
+                'prediction': {'failure_risk': risk,
+                               'predicted_failure_type': 'overheating' if risk > 50 else 'engine_breakdown',
+                               'estimated_hours': 24 if risk > 50 else 240,
+                               'risk_level': 'critical' if risk > 70 else 'high' if risk > 50 else 'low',
+                               'model_version': 'v1', 'timestamp': now}
+            })
+        yield now, entries
+
+
+def run(mode, machines, ticks):
+    encoder = DeltaEncoder()
+    client = {}
+    sent = 0
+    client_s = 0.0
+    for now, entries in make_ticks(machines, ticks):
+        if mode == 'full':
+            message = {'type': 'update', 'data': {'timestamp': now, 'machines': entries}}
+        else:
+            message = encoder.update(entries, now)
+            if message is None:
+                continue
+        frame = encode_event(message, 1)
+        sent += len(frame)
+        start = time.perf_counter()
+        data = json.loads(frame[frame.index(b'data: ') + 6:])
+        if data['type'] == 'delta':
+            apply_delta(client, data['data']['machines'])
+        else:
+            client = {**client, **{e['machine_id']: e for e in data['data']['machines']}}
+        client_s += time.perf_counter() - start
+    return sent / ticks, client_s / ticks * 1000
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    print(f"{machines:,} machines, {ticks} ticks, {DUE_FRACTION:.0%} sampled per tick")
+    print(f"{'mode':<8}{'KB/tick':>10}{'client ms/tick':>16}")
+    for mode in ('full', 'delta'):
+        size, ms = run(mode, machines, ticks)
+        print(f"{mode:<8}{size / 1024:>10.1f}{ms:>16.3f}")
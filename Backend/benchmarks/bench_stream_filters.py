@@ -0,0 +1,144 @@
+"""
+Benchmark: filtered vitals streams at fleet scale.
+
+Clients: one per machine detail page (?machine_id=<id>, spread over the fleet) plus a few
+alert views (?min_risk=high) and per-type dashboards (?type=). Each tick a quarter of the
+machines change, and now and then a machine's risk level.
+
+    whole fleet  every client receives the unfiltered delta (what /vitals/stream sends without
+                 filters)
+    scan         filtered, but each tick tests every client's filter against every changed
+                 machine
+    index        FilteredStreams: clients with equal filters share a channel, and changes reach
+                 channels through the machine-id index
+
+Reports routing time per tick, and bytes per tick for a machine-page client and in total.
+
+Run from the Backend directory:
+    python benchmarks/bench_stream_filters.py [machines] [machine_pages]
+"""
+import os
+import random
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.machine_registry import MachineRegistry
+from services.stream_delta import DeltaEncoder
+from services.stream_filters import FilteredStreams, StreamFilter
+from services.stream_hub import encode_event
+
+TYPES = ['Haul Truck', 'Excavator', 'Drill Rig', 'Loader', 'Dozer']
+LOCATIONS = ['Pit Area A', 'Blast Zone B', 'Loading Area C', 'Crusher D']
+RISK_LEVELS = ['low', 'low', 'low', 'medium', 'high', 'critical']
+TICKS = 20
+
+
+def fleet(n):
+    return [{'id': str(i), 'name': f'Machine {i}', 'type': TYPES[i % len(TYPES)], 'status': 'online',
+             'location': LOCATIONS[i % len(LOCATIONS)]} for i in range(n)]
+
+
+def entry(machine, temperature, risk_level):
+    return {'machine_id': machine['id'], 'machine_name': machine['name'], 'machine_type': machine['type'],
+            'vitals': {'temperature': temperature, 'pressure': 100.0, 'vibration': 0.4, 'timestamp': 't'},
+            'prediction': {'failure_risk': 10, 'risk_level': risk_level, 'timestamp': 't'}}
+
+
+def ticks(machines):
+    rng = random.Random(0)
+    risk = {m['id']: 'low' for m in machines}
+    yield [entry(m, 70.0, 'low') for m in machines]
+    for t in range(TICKS):
+        batch = []
+        for m in rng.sample(machines, len(machines) // 4):
+            if rng.random() < 0.05:
+                risk[m['id']] = rng.choice(RISK_LEVELS)
+            batch.append(entry(m, round(70 + rng.random() * 20, 2), risk[m['id']]))
+        yield batch
+
+
+def filters(machines, pages):
+    rng = random.Random(1)
+    chosen = [StreamFilter(machine_ids=[m['id']]) for m in rng.sample(machines, pages)]
+    return chosen + [StreamFilter(min_risk='high')] * 5 + [StreamFilter(machine_type=t) for t in TYPES]
+
+
+def run_whole_fleet(machines, client_filters):
+    encoder = DeltaEncoder()
+    sent = page = 0
+    elapsed = 0.0
+    for i, batch in enumerate(ticks(machines)):
+        message = encoder.update(batch, 't')
+        if i == 0 or message is None:
+            continue
+        start = time.perf_counter()
+        size = len(encode_event(message, i))
+        elapsed += time.perf_counter() - start
+        sent += size * len(client_filters)
+        page += size
+    return elapsed / TICKS * 1000, page / TICKS, sent / TICKS
+
+
+def run_scan(machines, client_filters):
+    encoder = DeltaEncoder()
+    registry = {m['id']: m for m in machines}
+    sent = page = 0
+    elapsed = 0.0
+    for i, batch in enumerate(ticks(machines)):
+        encoder.update(batch, 't')
+        if i == 0:
+            continue
+        start = time.perf_counter()
+        sizes = []
+        for f in client_filters:
+            picked = [change for mid, change in encoder.changes.items()
+                      if (f.machine_ids is None or mid in f.machine_ids)
+                      and (f.machine_type is None or registry[mid]['type'] == f.machine_type)
+                      and f.accepts(encoder.state[mid])]
+            sizes.append(len(encode_event({'type': 'delta', 'data': {'timestamp': 't', 'machines': picked}}, i)))
+        elapsed += time.perf_counter() - start
+        sent += sum(sizes)
+        page += sizes[0]
+    return elapsed / TICKS * 1000, page / TICKS, sent / TICKS
+
+
+def run_index(machines, client_filters):
+    lock = threading.RLock()
+    encoder = DeltaEncoder()
+    streams = FilteredStreams(encoder, MachineRegistry(machines).find, lock)
+    subscriptions = [streams.subscribe(f) for f in client_filters]
+    sent = page = 0
+    elapsed = 0.0
+    for i, batch in enumerate(ticks(machines)):
+        with lock:
+            encoder.update(batch, 't')
+            if i == 0:
+                streams.update('t')
+                for s in subscriptions:
+                    while s.get(0) is not None:
+                        pass
+                continue
+            start = time.perf_counter()
+            streams.update('t')
+            elapsed += time.perf_counter() - start
+        for n, s in enumerate(subscriptions):
+            frame = s.get(0)
+            while frame is not None:
+                sent += len(frame)
+                page += len(frame) if n == 0 else 0
+                frame = s.get(0)
+    return elapsed / TICKS * 1000, page / TICKS, sent / TICKS
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    machines = fleet(n)
+    client_filters = filters(machines, pages)
+    print(f"{n:,} machines, {len(client_filters):,} clients ({pages} machine pages, 5 alert views, "
+          f"{len(TYPES)} type dashboards), {TICKS} ticks")
+    print(f"{'mode':<13}{'route ms/tick':>15}{'page KB/tick':>14}{'total MB/tick':>15}")
+    for mode, run in (('whole fleet', run_whole_fleet), ('scan', run_scan), ('index', run_index)):
+        ms, page, total = run(machines, client_filters)
+        print(f"{mode:<13}{ms:>15.2f}{page / 1024:>14.3f}{total / 1e6:>15.2f}")
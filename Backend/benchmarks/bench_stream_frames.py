@@ -0,0 +1,71 @@
+"""
+Benchmark: CPU spent turning one stream update into what N connected clients receive.
+
+    per-client  what /vitals/stream used to do: every client's generator json.dumps()es the
+                update into its own f-string frame (which the server then encodes to bytes)
+    shared      StreamHub.publish(): the update is encoded into one bytes frame, every client
+                queues and writes that same object
+
+Clients are drained in this thread, so the numbers are the encoding / queueing work alone.
+
+Run from the Backend directory:
+    python benchmarks/bench_stream_frames.py [machines]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.stream_hub import StreamHub
+
+
+def make_update(machines):
+    now = datetime(2025, 1, 1).isoformat()
+    return {
+        'type': 'update',
+        'data': {
+            'timestamp': now,
+            'machines': [
+                {
+                    'machine_id': str(i), 'machine_name': f'Haul Truck HT-{i:03d}', 'machine_type': 'Haul Truck',
+                    'vitals': {'temperature': 75.12, 'pressure': 101.2, 'vibration': 0.413, 'timestamp': now},
+                    'prediction': {'failure_risk': 42, 'predicted_failure_type': 'engine_breakdown',
+                                   'estimated_hours': 97, 'risk_level': 'medium', 'model_version': 'v1',
+                                   'timestamp': now}
+                }
+                for i in range(machines)
+            ]
+        }
+    }
+
+
+def per_client(update, clients, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _ in range(clients):
+            frame = f"data: {json.dumps(update)}\n\n".encode()
+    return (time.perf_counter() - start) / rounds * 1000, len(frame)
+
+
+def shared(update, clients, rounds):
+    hub = StreamHub()
+    subscriptions = [hub.subscribe() for _ in range(clients)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        hub.publish(update)
+        for subscription in subscriptions:
+            frame = subscription.get(0)
+    return (time.perf_counter() - start) / rounds * 1000, len(frame)
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    update = make_update(machines)
+    print(f"update of {machines:,} machines")
+    print(f"{'mode':<12}{'clients':>8}{'ms/update':>11}{'frame KB':>10}")
+    for clients in (1, 10, 100, 500):
+        rounds = max(2, 2000 // clients)
+        for mode, run in (('per-client', per_client), ('shared', shared)):
+            ms, size = run(update, clients, rounds)
+            print(f"{mode:<12}{clients:>8}{ms:>11.3f}{size / 1024:>10.1f}")
@@ -0,0 +1,101 @@
+"""
+Benchmark: fan-out of stream updates to N connected dashboards.
+
+    shared-queue  what /vitals/stream used to do: every client get()s from one shared
+                  queue.Queue, so each update reaches exactly one client
+    hub           StreamHub: one bounded queue per client, every update reaches every client
+
+For each client count, one publisher thread sends the updates while the clients drain them in
+their own threads (one of them deliberately slow). Reports the publisher's cost per update,
+that cost per connected client, the share of updates the fast clients received, and what
+the slow client dropped.
+
+Run from the Backend directory:
+    python benchmarks/bench_stream_hub.py [updates]
+"""
+import os
+import queue
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.stream_hub import StreamHub
+
+SLOW_CLIENT_DELAY = 0.002
+
+
+def run_shared_queue(clients, updates):
+    shared = queue.Queue(maxsize=100)
+    received = [0] * clients
+    done = threading.Event()
+
+    def client(i):
+        while not done.is_set():
+            try:
+                shared.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            received[i] += 1
+            if i == 0:
+                time.sleep(SLOW_CLIENT_DELAY)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    publish_s = 0.0
+    dropped = 0
+    for n in range(updates):
+        start = time.perf_counter()
+        try:
+            shared.put({'n': n}, block=False)
+        except queue.Full:
+            dropped += 1
+        publish_s += time.perf_counter() - start
+        time.sleep(0.0002)
+    time.sleep(0.2)
+    done.set()
+    for t in threads:
+        t.join()
+    fast = received[1:] or [0]
+    return publish_s / updates * 1e6, sum(fast) / len(fast) / updates, dropped
+
+
+def run_hub(clients, updates):
+    hub = StreamHub()
+    subscriptions = [hub.subscribe() for _ in range(clients)]
+    received = [0] * clients
+    done = threading.Event()
+
+    def client(i):
+        while not done.is_set():
+            if subscriptions[i].get(timeout=0.05) is None:
+                continue
+            received[i] += 1
+            if i == 0:
+                time.sleep(SLOW_CLIENT_DELAY)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    publish_s = 0.0
+    for n in range(updates):
+        start = time.perf_counter()
+        hub.publish({'n': n})
+        publish_s += time.perf_counter() - start
+        time.sleep(0.0002)
+    time.sleep(0.2)
+    done.set()
+    for t in threads:
+        t.join()
+    fast = received[1:] or [0]
+    return publish_s / updates * 1e6, sum(fast) / len(fast) / updates, subscriptions[0].dropped
+
+
+if __name__ == '__main__':
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{updates:,} updates, client 0 is slow ({SLOW_CLIENT_DELAY * 1000:g} ms per update)")
+    print(f"{'mode':<14}{'clients':>8}{'us/publish':>12}{'us/client':>11}{'fast got':>10}{'dropped':>9}")
+    for clients in (1, 10, 50, 100):
+        for mode, run in (('shared-queue', run_shared_queue), ('hub', run_hub)):
+            us, share, dropped = run(clients, updates)
+            print(f"{mode:<14}{clients:>8}{us:>12.2f}{us / clients:>11.2f}{share:>10.0%}{dropped:>9,}")
@@ -0,0 +1,117 @@
+"""
+Benchmark: sequential tick vs the staged tick pipeline, with a slow disk and a slow SMTP server.
+
+    sequential  simulate, predict, log, alert and broadcast one after another per batch
+    pipeline    PipelineStage per step (simulate -> predict -> log / broadcast, plus alert)
+
+Batches of due machines arrive at a fixed rate. The log stage sleeps `log_ms` per batch (slow
+disk) and every 10th batch triggers an alert that sleeps `smtp_ms` (slow SMTP). Reports how
+far predictions fall behind the arrival of their batch.
+
+Run from the Backend directory:
+    python benchmarks/bench_tick_pipeline.py [batches] [machines_per_batch] [interval_ms] [log_ms] [smtp_ms]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.feature_state import RollingFeatureState
+from services.fleet_simulator import FleetSimulator
+from services.prediction_service import get_machine_prediction_from_features
+from services.tick_pipeline import Pipeline, PipelineStage
+
+STATS = {
+    'temperature': {'mean': 75.0, 'std': 8.0},
+    'pressure': {'mean': 100.0, 'std': 8.0},
+    'vibration': {'mean': 0.4, 'std': 0.15}
+}
+
+
+def make_steps(machines, log_ms, smtp_ms, lag):
+    fleet = FleetSimulator(machines, STATS, seed=0)
+    states = [RollingFeatureState() for _ in range(machines)]
+
+    def simulate(batch):
+        fleet.step()
+        samples = []
+        for i in range(machines):
+            reading = fleet.reading(i)
+            states[i].update(datetime.utcnow(), reading['temperature'], reading['vibration'], reading['pressure'])
+            samples.append(states[i].features() if states[i].ready else None)
+        return {**batch, 'samples': samples}
+
+    def predict(batch):
+        for features in batch['samples']:
+            if features is not None:
+                get_machine_prediction_from_features('Haul Truck', features)
+        lag.append(time.perf_counter() - batch['arrived'])
+        return batch
+
+    def log(batch):
+        time.sleep(log_ms / 1000)
+
+    def alert(batch):
+        time.sleep(smtp_ms / 1000)
+
+    return simulate, predict, log, alert
+
+
+def run(mode, batches, machines, interval_ms, log_ms, smtp_ms):
+    lag = []
+    simulate, predict, log, alert = make_steps(machines, log_ms, smtp_ms, lag)
+    pipeline = None
+    if mode == 'pipeline':
+        log_stage = PipelineStage('log', log, when_full='drop')
+        alert_stage = PipelineStage('alert', alert, when_full='drop')
+
+        def predict_and_alert(batch):
+            predict(batch)
+            if batch['n'] % 10 == 0:
+                alert_stage.put(batch)
+            return batch
+
+        predict_stage = PipelineStage('predict', predict_and_alert, downstream=[log_stage])
+        simulate_stage = PipelineStage('simulate', simulate, downstream=[predict_stage])
+        pipeline = Pipeline([simulate_stage, predict_stage, log_stage, alert_stage])
+        pipeline.start()
+
+    start = time.perf_counter()
+    for n in range(batches):
+        # Batches arrive on a fixed schedule, however long the previous one took
+        arrived = start + n * interval_ms / 1000
+        time.sleep(max(0.0, arrived - time.perf_counter()))
+        batch = {'n': n, 'arrived': arrived}
+        if pipeline is not None:
+            pipeline.submit('simulate', batch)
+        else:
+            batch = predict(simulate(batch))
+            log(batch)
+            if n % 10 == 0:
+                alert(batch)
+    stats = None
+    if pipeline is not None:
+        while len(lag) < batches:
+            time.sleep(0.01)
+        stats = pipeline.stats()
+        pipeline.stop()
+    return np.array(lag) * 1000, stats
+
+
+if __name__ == '__main__':
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    machines = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    interval_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 50
+    log_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 40
+    smtp_ms = float(sys.argv[5]) if len(sys.argv) > 5 else 500
+
+    print(f"{batches} batches of {machines} machines every {interval_ms:.0f} ms; "
+          f"log {log_ms:.0f} ms/batch, SMTP {smtp_ms:.0f} ms every 10th batch")
+    print(f"{'mode':<12}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for mode in ('sequential', 'pipeline'):
+        lag, stats = run(mode, batches, machines, interval_ms, log_ms, smtp_ms)
+        print(f"{mode:<12}{np.percentile(lag, 50):>12.1f}{np.percentile(lag, 99):>12.1f}{lag.max():>12.1f}")
+    for name, s in stats.items():
+        print(f"  {name:<9} processed {s['processed']:>4}  dropped {s['dropped']:>3}  max backlog {s['max_backlog']:>3}"
+              f"  mean {s['mean_ms']:>7.2f} ms  utilization {s['utilization']:.2f}")
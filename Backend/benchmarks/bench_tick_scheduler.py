@@ -0,0 +1,81 @@
+"""
+Benchmark: fixed 30 s full-fleet ticks vs the per-machine TickScheduler.
+
+Replays one simulated hour on a virtual clock for fleets of increasing size, with a fixed mix
+of risk levels and statuses. Reports samples taken per hour (what the ML / logging work scales
+with), where those samples went, and the scheduler's own cost per sample.
+
+Run from the Backend directory:
+    python benchmarks/bench_tick_scheduler.py [fleet sizes...]
+"""
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.tick_scheduler import TickScheduler
+
+HOUR = 3600.0
+FIXED_INTERVAL = 30.0
+
+# (status, risk level, share of the fleet)
+FLEET_MIX = [
+    ('online', 'low', 0.60),
+    ('online', 'medium', 0.20),
+    ('online', 'high', 0.07),
+    ('online', 'critical', 0.03),
+    ('maintenance', None, 0.05),
+    ('offline', None, 0.05)
+]
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(n_machines):
+    rng = np.random.default_rng(0)
+    profile = rng.choice(len(FLEET_MIX), n_machines, p=[share for *_, share in FLEET_MIX])
+    clock = VirtualClock()
+    scheduler = TickScheduler(clock=clock)
+    for mid in range(n_machines):
+        scheduler.add(mid, FLEET_MIX[profile[mid]][0], delay=rng.uniform(0, FIXED_INTERVAL))
+
+    samples = np.zeros(len(FLEET_MIX), dtype=np.int64)
+    passes = 0
+    start = time.perf_counter()
+    while True:
+        next_due = scheduler.next_due()
+        if next_due is None or next_due > HOUR:
+            break
+        clock.now = next_due
+        due_ids = scheduler.pop_due()
+        passes += 1
+        for mid in due_ids:
+            status, risk, _ = FLEET_MIX[profile[mid]]
+            samples[profile[mid]] += 1
+            scheduler.complete(mid, status, risk)
+    elapsed = time.perf_counter() - start
+    return samples, passes, elapsed
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 50000]
+    fixed_per_machine = int(HOUR // FIXED_INTERVAL)
+
+    print(f"One simulated hour; fixed mode samples every machine every {FIXED_INTERVAL:.0f} s")
+    print(f"{'machines':>9}{'fixed samples':>15}{'scheduled':>14}{'passes':>13}{'sched us/sample':>17}")
+    for n in sizes:
+        samples, passes, elapsed = run(n)
+        total = samples.sum()
+        print(f"{n:>9,}{n * fixed_per_machine:>15,}{total:>14,}{passes:>13,}{elapsed / total * 1e6:>17.2f}")
+
+    print("\nSamples per machine per hour by profile (last fleet)")
+    counts = np.bincount(np.random.default_rng(0).choice(
+        len(FLEET_MIX), sizes[-1], p=[share for *_, share in FLEET_MIX]), minlength=len(FLEET_MIX))
+    for (status, risk, _), machines, n in zip(FLEET_MIX, counts, samples):
+        print(f"  {status:<12}{str(risk):<10}{n / max(machines, 1):>8.0f}   (fixed: {fixed_per_machine})")
@@ -0,0 +1,84 @@
+"""
+Benchmark: per-machine vitals history as a list of dicts vs the NumPy ring buffer.
+
+    list   the old pattern - every tick rebuilds the machine's history list from the last
+           `depth - 1` entries plus the new reading dict
+    ring   VitalsRingBuffer - one in-place record write per tick
+
+Reports append cost at the given depth, the cost of serializing a window, and memory per machine.
+
+Run from the Backend directory:
+    python benchmarks/bench_vitals_history.py [depth] [appends] [window]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.vitals_history import VitalsRingBuffer
+
+
+def readings(n):
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1)
+    values = np.round(rng.normal([75.0, 100.0, 0.4], [8.0, 8.0, 0.15], (n, 3)), 2).tolist()
+    return [(start + timedelta(seconds=30 * i), t, p, v, int(i % 100)) for i, (t, p, v) in enumerate(values)]
+
+
+def list_append(history, depth, reading):
+    ts, t, p, v, risk = reading
+    return history[-(depth - 1):] + [{
+        'Timestamp': ts.isoformat(), 'Temperature': t, 'Pressure': p, 'Vibration': v, 'Failure_Risk': risk
+    }]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    appends = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    window = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    data = readings(appends)
+
+    def fill_list():
+        history = []
+        for reading in data:
+            history = list_append(history, depth, reading)
+        return history
+
+    def fill_ring():
+        ring = VitalsRingBuffer(depth)
+        for reading in data:
+            ring.append(*reading)
+        return ring
+
+    # Timed without tracemalloc, then filled again under it for the retained size
+    start = time.perf_counter()
+    history = fill_list()
+    list_us = (time.perf_counter() - start) / appends * 1e6
+    start = time.perf_counter()
+    ring = fill_ring()
+    ring_us = (time.perf_counter() - start) / appends * 1e6
+    sizes = []
+    for fill in (fill_list, fill_ring):
+        tracemalloc.start()
+        kept = fill()
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del kept
+    list_bytes, ring_bytes = sizes
+
+    assert [r['Temperature'] for r in ring.records(window)] == [r['Temperature'] for r in history[-window:]]
+
+    print(f"depth {depth:,}, {appends:,} appends, window of {window}")
+    print(f"{'mode':<8}{'append us':>11}{'window us':>11}{'MB/machine':>12}")
+    print(f"{'list':<8}{list_us:>11.2f}{timed(lambda: history[-window:], 200):>11.2f}{list_bytes / 1e6:>12.2f}")
+    print(f"{'ring':<8}{ring_us:>11.2f}{timed(lambda: ring.window(window), 200):>11.2f}{ring_bytes / 1e6:>12.2f}")
+    print(f"ring records({window}) -> dicts: {timed(lambda: ring.records(window), 200):.0f} us")
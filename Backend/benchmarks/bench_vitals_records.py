@@ -0,0 +1,101 @@
+"""
+Benchmark: memory and time of one fleet tick with vitals as nested dicts vs slotted records.
+
+    dicts    what the simulation used to build per machine and tick: the vitals dict (spread
+             from the previous one, ISO timestamp string), the prediction dict and the
+             broadcast entry, all built in the simulate / predict stages
+    records  MachineVitals + Prediction (slotted, datetime timestamps); dicts only when the
+             broadcast stage serializes
+
+Reports, via tracemalloc, the memory held by the published fleet snapshot and the peak
+allocated while building one tick, plus the time per tick (measured without tracemalloc).
+
+Run from the Backend directory:
+    python benchmarks/bench_vitals_records.py [machines]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.vitals_records import MachineVitals, Prediction
+
+RESULT = {
+    'most_likely_failure': 'engine_breakdown',
+    'most_likely_failure_probability': 0.42,
+    'most_likely_failure_estimated_hours': 97,
+    'model_version': 'legacy'
+}
+
+
+def dict_tick(previous, now):
+    machines = {}
+    updated = []
+    for mid, prev in previous.items():
+        vit = {**prev, 'temperature': 75.1, 'pressure': 101.2, 'vibration': 0.41, 'mode': 'normal',
+               'timestamp': now.isoformat()}
+        vit['prediction'] = {
+            'failure_risk': 42, 'predicted_failure_type': RESULT['most_likely_failure'],
+            'estimated_hours': RESULT['most_likely_failure_estimated_hours'], 'risk_level': 'medium',
+            'model_version': RESULT['model_version'], 'timestamp': now.isoformat()
+        }
+        machines[mid] = vit
+        updated.append({
+            'machine_id': mid, 'machine_name': vit['machine_name'], 'machine_type': vit['machine_type'],
+            'vitals': {'temperature': vit['temperature'], 'pressure': vit['pressure'],
+                       'vibration': vit['vibration'], 'timestamp': vit['timestamp']},
+            'prediction': vit['prediction']
+        })
+    return machines, updated
+
+
+def record_tick(previous, now):
+    machines = {}
+    for mid, prev in previous.items():
+        vit = prev.sample(75.1, 101.2, 0.41, now)
+        vit.prediction = Prediction.from_result(RESULT, now)
+        machines[mid] = vit
+    return machines, None
+
+
+def initial(kind, n):
+    now = datetime(2025, 1, 1)
+    if kind == 'dicts':
+        return {str(i): {'machine_id': str(i), 'machine_name': f'Machine {i}', 'machine_type': 'Haul Truck',
+                         'temperature': 75.0, 'pressure': 100.0, 'vibration': 0.4, 'status': 'online',
+                         'timestamp': now.isoformat()} for i in range(n)}
+    return {str(i): MachineVitals(str(i), f'Machine {i}', 'Haul Truck', 75.0, 100.0, 0.4, now, 'online')
+            for i in range(n)}
+
+
+def measure(kind, n):
+    tick = dict_tick if kind == 'dicts' else record_tick
+    previous = initial(kind, n)
+    now = datetime(2025, 1, 1, 0, 0, 30)
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    snapshot, updated = tick(previous, now)
+    current, peak = tracemalloc.get_traced_memory()
+    held = current - base
+    if updated is not None:
+        # The broadcast entries only live until the stream stage is done with them
+        del updated
+        held = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(5):
+        snapshot, _ = tick(snapshot, now + timedelta(seconds=30 * i))
+    per_tick_ms = (time.perf_counter() - start) / 5 * 1000
+    return held, peak - base, per_tick_ms
+
+
+if __name__ == '__main__':
+    machines = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{machines:,} machines, one tick of every machine")
+    print(f"{'mode':<10}{'snapshot MB':>13}{'tick peak MB':>14}{'ms/tick':>10}")
+    for kind in ('dicts', 'records'):
+        held, peak, ms = measure(kind, machines)
+        print(f"{kind:<10}{held / 1e6:>13.2f}{peak / 1e6:>14.2f}{ms:>10.1f}")
@@ -0,0 +1,187 @@
+"""
+Load test: how many idle /vitals/stream connections a server holds, and what each one costs.
+
+    threaded  the Flask route on Werkzeug's threaded server (what app.run() serves): one thread
+              per connection, each waking every 5 s for its heartbeat
+    async     AsyncStreamServer: one event loop, no thread per connection
+
+The server runs in a child process and publishes one small event per second. The load test
+opens connections in steps; at each step it waits until every client has its keyframe, then
+reports the server's RSS and threads, RSS per connection above the idle server, and how long
+the next published event took to reach all clients. It stops at the first step where
+connections fail, which is the ceiling on this machine (also bounded by RLIMIT_NOFILE).
+
+Run from the Backend directory:
+    python benchmarks/load_async_stream.py [max_connections] [threaded|async|both]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.stream_hub import StreamHub, CONNECTED_FRAME, HEARTBEAT_FRAME
+
+STEPS = (100, 500, 1000, 2500, 5000, 10000, 15000)
+CONNECT_CONCURRENCY = 100
+STEP_TIMEOUT = 120
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def keyframe(event_id):
+    return b'id: %d\ndata: {"type": "keyframe", "machines": []}\n\n' % event_id
+
+
+def publish_forever(hub):
+    while True:
+        time.sleep(1)
+        hub.publish({'type': 'delta', 'ts': time.time()})
+
+
+def serve(mode, port_queue):
+    """Child process: the stream server under test"""
+    raise_fd_limit()
+    hub = StreamHub()
+    if mode == 'async':
+        from services.async_stream_server import AsyncStreamServer
+        server = AsyncStreamServer(hub, keyframe, host='127.0.0.1', port=0)
+        server.start()
+        port_queue.put(server.port)
+        publish_forever(hub)
+    else:
+        from flask import Flask, Response
+        from werkzeug.serving import make_server
+        import logging
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app = Flask(__name__)
+
+        @app.route('/machine/vitals/stream')
+        def stream():
+            def generate():
+                subscription = hub.subscribe(keyframe)
+                try:
+                    yield CONNECTED_FRAME
+                    while True:
+                        frame = subscription.get(timeout=5)
+                        yield frame if frame is not None else HEARTBEAT_FRAME
+                finally:
+                    subscription.close()
+            return Response(generate(), mimetype='text/event-stream')
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server.socket.listen(4096)
+        threading.Thread(target=publish_forever, args=(hub,), daemon=True).start()
+        port_queue.put(server.server_port)
+        server.serve_forever()
+
+
+def proc_status(pid):
+    status = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            status[name] = value.strip()
+    return int(status['VmRSS'].split()[0]) * 1024, int(status['Threads'])
+
+
+class Clients:
+    def __init__(self, port):
+        self.port = port
+        self.connections = []
+        self.failed = 0
+        self.received = {}
+
+    async def _connect(self, semaphore):
+        async with semaphore:
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+                writer.write(b'GET /machine/vitals/stream HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                buffer = b''
+                while b'"keyframe"' not in buffer:
+                    chunk = await asyncio.wait_for(reader.read(65536), 30)
+                    if not chunk:
+                        raise ConnectionError('closed')
+                    buffer += chunk
+            except (OSError, asyncio.TimeoutError):
+                self.failed += 1
+                return
+        self.connections.append(writer)
+        asyncio.create_task(self._read(reader))
+
+    async def _read(self, reader):
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                for line in chunk.split(b'\n'):
+                    if line.startswith(b'data: ') and b'"ts"' in line:
+                        ts = json.loads(line[6:])['ts']
+                        self.received.setdefault(ts, []).append(time.time())
+        except (OSError, asyncio.CancelledError):
+            return
+
+    async def grow(self, target):
+        semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+        tasks = [asyncio.create_task(self._connect(semaphore)) for _ in range(target - len(self.connections))]
+        await asyncio.wait_for(asyncio.gather(*tasks), STEP_TIMEOUT)
+
+    async def next_event_latency(self):
+        """Seconds until the next published event reached every connected client"""
+        seen = set(self.received)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            await asyncio.sleep(0.1)
+            for ts, arrivals in self.received.items():
+                if ts not in seen and len(arrivals) >= len(self.connections):
+                    return max(arrivals) - ts
+        return None
+
+
+async def run(mode, max_connections):
+    context = multiprocessing.get_context('spawn')
+    port_queue = context.Queue()
+    server = context.Process(target=serve, args=(mode, port_queue), daemon=True)
+    server.start()
+    clients = Clients(port_queue.get(timeout=30))
+    await asyncio.sleep(1)
+    idle_rss, _ = proc_status(server.pid)
+    print(f"\n{mode}: idle server {idle_rss / 1e6:.1f} MB")
+    print(f"{'connections':>12}{'RSS MB':>9}{'threads':>9}{'KB/conn':>9}{'fan-out s':>11}")
+    ceiling = 0
+    for step in STEPS:
+        if step > max_connections:
+            break
+        try:
+            await clients.grow(step)
+        except asyncio.TimeoutError:
+            pass
+        if clients.failed or len(clients.connections) < step:
+            print(f"{step:>12}  failed: {len(clients.connections):,} connected, {clients.failed:,} refused / timed out")
+            break
+        ceiling = step
+        latency = await clients.next_event_latency()
+        rss, threads = proc_status(server.pid)
+        latency = f"{latency:.3f}" if latency is not None else 'n/a'
+        print(f"{step:>12,}{rss / 1e6:>9.1f}{threads:>9,}{(rss - idle_rss) / step / 1024:>9.1f}{latency:>11}")
+    print(f"{mode}: held {ceiling:,} connections")
+    for writer in clients.connections:
+        writer.close()
+    server.terminate()
+    server.join()
+
+
+if __name__ == '__main__':
+    max_connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    modes = sys.argv[2] if len(sys.argv) > 2 else 'both'
+    print(f"RLIMIT_NOFILE {raise_fd_limit():,}")
+    for mode in (('threaded', 'async') if modes == 'both' else (modes,)):
+        asyncio.run(run(mode, max_connections))
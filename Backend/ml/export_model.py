@@ -0,0 +1,59 @@
+# backend/ml/export_model.py
+"""
+Export step for the inference engine.
+
+Flattens failure_prediction_model.pkl, folds scaler.pkl into its split thresholds and writes a
+single artifact (failure_prediction_engine.joblib) that scores raw engineered features. The
+artifact is only written after it reproduces the original scaler + forest predictions on the
+training dataset.
+
+Run from the Backend directory:
+    python ml/export_model.py
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.utils import (load_ml_artifacts, build_inference_engine, engineer_features,
+                      timestamp_features, _get_model_path, ENGINE_ARTIFACT)
+
+DATASET_CSV = os.path.join(os.path.dirname(__file__), 'data', 'simulated_sensors.csv')
+
+def dataset_features(csv_path=DATASET_CSV) -> np.ndarray:
+    """Raw EXPECTED_FEATURES rows for every full window of the sensor CSV"""
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    parts = [timestamp_features(ts) for ts in df['Timestamp']]
+    return engineer_features(
+        df['Temperature'].to_numpy(), df['Vibration'].to_numpy(), df['Pressure'].to_numpy(),
+        np.array([p[0] for p in parts], dtype=float), np.array([p[1] for p in parts], dtype=float)
+    )
+
+def verify_engine(engine, model, scaler, raw_features=None) -> int:
+    """
+    Regression check: the raw-feature engine must give exactly the probabilities of
+    scaler.transform + model.predict_proba. Returns the number of rows checked.
+    """
+    if raw_features is None:
+        raw_features = dataset_features()
+    scaled = (raw_features - scaler.mean_) / scaler.scale_
+    expected = model.predict_proba(scaled)
+    actual = engine.predict_proba(raw_features)
+    mismatched = int((actual != expected).any(axis=1).sum())
+    if mismatched:
+        raise ValueError(f"Exported engine disagrees with model + scaler on {mismatched} of {len(raw_features)} rows")
+    return len(raw_features)
+
+def export_engine(path=None):
+    model, scaler = load_ml_artifacts()
+    engine = build_inference_engine(model, scaler)
+    rows = verify_engine(engine, model, scaler)
+    path = path or os.path.join(_get_model_path(), ENGINE_ARTIFACT)
+    engine.save(path)
+    print(f"Verified {rows} rows against model + scaler; engine written to: {path}")
+    return path
+
+if __name__ == '__main__':
+    export_engine(sys.argv[1] if len(sys.argv) > 1 else None)
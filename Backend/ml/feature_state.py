@@ -0,0 +1,104 @@
+# backend/ml/feature_state.py
+
+from collections import deque
+from datetime import datetime
+import numpy as np
+
+from ml.utils import WINDOW_SIZE, SENSOR_COLUMNS, EXPECTED_FEATURES, timestamp_features
+
+# Re-sum the ring buffer every N readings so float error in the running sums cannot drift
+RESYNC_INTERVAL = 1024
+
+
+class RollingFeatureState:
+    """
+    Streaming feature state for one machine.
+
+    Keeps a fixed-size ring buffer per sensor plus running sums (for mean/std) and monotonic
+    deques (for max/min), so each new reading updates the rolling statistics in O(1) and the
+    EXPECTED_FEATURES vector for the newest reading is available without reprocessing history.
+    Produces the same values as ml.utils.engineer_features on the last row of the window.
+    """
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self.window_size = window_size
+        sensors = len(SENSOR_COLUMNS)
+        self._buffer = [[0.0] * window_size for _ in range(sensors)]
+        # Running sums are taken around a per-sensor shift (the first reading) to limit cancellation
+        self._shift = [0.0] * sensors
+        self._sum = [0.0] * sensors
+        self._sumsq = [0.0] * sensors
+        # Monotonic deques of (sequence, value): front is always the window max / min
+        self._max = [deque() for _ in range(sensors)]
+        self._min = [deque() for _ in range(sensors)]
+        self._seq = 0
+        self._features = np.zeros(len(EXPECTED_FEATURES), dtype=np.float64)
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window has been seen"""
+        return self._seq >= self.window_size
+
+    def update(self, timestamp, temperature: float, vibration: float, pressure: float):
+        """Push the newest reading (values in SENSOR_COLUMNS order)"""
+        seq = self._seq
+        slot = seq % self.window_size
+        expired = seq - self.window_size
+        n = min(seq + 1, self.window_size)
+
+        for s, value in enumerate((float(temperature), float(vibration), float(pressure))):
+            if seq == 0:
+                self._shift[s] = value
+            buffer = self._buffer[s]
+            shifted = value - self._shift[s]
+            if expired >= 0:
+                old = buffer[slot] - self._shift[s]
+                self._sum[s] -= old
+                self._sumsq[s] -= old * old
+            buffer[slot] = value
+            self._sum[s] += shifted
+            self._sumsq[s] += shifted * shifted
+
+            maxq, minq = self._max[s], self._min[s]
+            while maxq and maxq[-1][1] <= value:
+                maxq.pop()
+            maxq.append((seq, value))
+            if maxq[0][0] <= expired:
+                maxq.popleft()
+            while minq and minq[-1][1] >= value:
+                minq.pop()
+            minq.append((seq, value))
+            if minq[0][0] <= expired:
+                minq.popleft()
+
+            if seq % RESYNC_INTERVAL == RESYNC_INTERVAL - 1:
+                window = [v - self._shift[s] for v in buffer[:n]]
+                self._sum[s] = sum(window)
+                self._sumsq[s] = sum(v * v for v in window)
+
+            mean_shifted = self._sum[s] / n
+            features = self._features
+            base = 5 + 4 * s
+            features[s] = value
+            features[base] = self._shift[s] + mean_shifted
+            features[base + 2] = maxq[0][1]
+            features[base + 3] = minq[0][1]
+            if n < 2:
+                features[base + 1] = np.nan
+            elif maxq[0][1] == minq[0][1]:
+                # A flat window has exactly zero spread; don't report cancellation noise
+                features[base + 1] = 0.0
+            else:
+                variance = (self._sumsq[s] - self._sum[s] * mean_shifted) / (n - 1)
+                features[base + 1] = variance ** 0.5 if variance > 0 else 0.0
+
+        if timestamp is None:
+            timestamp = datetime.utcnow()
+        self._features[3], self._features[4] = timestamp_features(timestamp)
+        self._seq = seq + 1
+
+    def features(self) -> np.ndarray:
+        """Raw (unscaled) EXPECTED_FEATURES vector for the newest reading"""
+        if not self.ready:
+            raise ValueError(f"Insufficient history ({self.window_size} readings needed for rolling features).")
+        return self._features.copy()
@@ -0,0 +1,285 @@
+# backend/ml/forest_engine.py
+
+import joblib
+import numpy as np
+
+# Rows traversed together in batch mode; keeps the (rows x trees) working set cache-resident
+BATCH_CHUNK = 256
+
+
+class FlattenedForest:
+    """
+    Array-backed inference engine for a fitted scikit-learn RandomForestClassifier.
+
+    All trees are flattened into contiguous node arrays (feature, threshold, left/right child,
+    class probabilities) and evaluated with a vectorized level-by-level traversal of every tree
+    at once. Leaves point to themselves so a fixed number of steps (the forest depth) reaches
+    every leaf; batches keep the trees ordered deepest first, so each level only steps the trees
+    that still split at that depth. Probabilities are accumulated tree by tree in the same order
+    sklearn uses, so predict_proba matches RandomForestClassifier.predict_proba bit-for-bit.
+    """
+
+    def __init__(self, feature, threshold, left, right, proba, roots, max_depth, classes,
+                 n_features, input_dtype=np.float32, feature_space='scaled', metadata=None,
+                 split=None, children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.proba = proba
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features = int(n_features)
+        # sklearn casts inputs to float32 before comparing them with the float64 thresholds
+        self.input_dtype = np.dtype(input_dtype)
+        # 'scaled': expects StandardScaler output; 'raw': scaler folded into thresholds (see fold_scaler)
+        self.feature_space = feature_space
+        self.metadata = dict(metadata or {})
+
+        # Derived traversal arrays are stored in the artifact too, so a memory-mapped load needs
+        # no private per-process copies
+        self._split = split if split is not None else _split_thresholds(threshold, self.input_dtype)
+        if children is None:
+            # children[2 * node + go_left] is the next node (right child first)
+            children = np.empty(2 * len(left), dtype=np.intp)
+            children[0::2] = right
+            children[1::2] = left
+        self._children = children
+        # Per-tree batch traversal order (a few bytes per tree, so not worth storing): trees sorted
+        # deepest first, and how many of them still split at each level
+        depths = _tree_depths(left, right, self.roots, self.max_depth)
+        by_depth = np.argsort(-depths, kind='stable')
+        self._roots_by_depth = self.roots.take(by_depth)
+        self._tree_rank = np.argsort(by_depth)
+        self._live_trees = [int(live) for live in (depths[:, np.newaxis] > np.arange(self.max_depth)).sum(axis=0)]
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten the estimators of a fitted RandomForestClassifier (single output)"""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests are supported.")
+
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            # Leaves: compare against +inf on feature 0 and loop back to themselves
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            # tree_.value already holds per-node class fractions (what DecisionTree.predict_proba returns)
+            probas.append(tree.value[:, 0, :n_classes])
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            proba=np.ascontiguousarray(np.concatenate(probas), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    def fold_scaler(self, scaler):
+        """
+        Return an engine that accepts raw (unscaled) features by folding a fitted StandardScaler
+        into the split thresholds.
+
+        Scaling is monotonic per feature, so each split "float32((x - mean) / scale) <= t" is
+        equivalent to "x <= t_raw" for a single float64 t_raw. t_raw is found by bisection over the
+        float64 values themselves, so the folded forest reproduces the scaled one exactly.
+        """
+        if self.feature_space != 'scaled':
+            raise ValueError("Scaler is already folded into this forest.")
+
+        n = self.n_features
+        mean = np.asarray(scaler.mean_, dtype=np.float64) if getattr(scaler, 'with_mean', True) else np.zeros(n)
+        scale = np.asarray(scaler.scale_, dtype=np.float64) if getattr(scaler, 'with_std', True) else np.ones(n)
+
+        threshold = self.threshold.copy()
+        internal = np.flatnonzero(np.isfinite(threshold))
+        threshold[internal] = _fold_thresholds(threshold[internal], mean[self.feature[internal]],
+                                               scale[self.feature[internal]], self.input_dtype)
+
+        return FlattenedForest(
+            feature=self.feature, threshold=threshold, left=self.left, right=self.right,
+            proba=self.proba, roots=self.roots, max_depth=self.max_depth, classes=self.classes_,
+            n_features=self.n_features, input_dtype=np.float64, feature_space='raw',
+            metadata=self.metadata,
+        )
+
+    def save(self, path):
+        """Write the engine arrays and metadata to a single joblib artifact"""
+        joblib.dump({
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'proba': self.proba,
+            'roots': self.roots,
+            'max_depth': self.max_depth,
+            'classes': self.classes_,
+            'n_features': self.n_features,
+            'input_dtype': self.input_dtype.str,
+            'feature_space': self.feature_space,
+            'metadata': self.metadata,
+            'split': self._split,
+            'children': self._children,
+        }, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """
+        Load an engine written by save(). With mmap_mode='r' the node arrays are mapped read-only
+        from the file instead of copied, so every process serving the same artifact shares one
+        page-cache copy.
+        """
+        state = joblib.load(path, mmap_mode=mmap_mode)
+        # Plain ndarray views of the mapping: np.memmap's subclass hooks cost more than the single-row traversal
+        state = {k: np.asarray(v) if isinstance(v, np.memmap) else v for k, v in state.items()}
+        return cls(
+            feature=state['feature'], threshold=state['threshold'], left=state['left'],
+            right=state['right'], proba=state['proba'], roots=state['roots'],
+            max_depth=state['max_depth'], classes=state['classes'], n_features=state['n_features'],
+            input_dtype=np.dtype(state['input_dtype']), feature_space=state['feature_space'],
+            metadata=state.get('metadata'), split=state.get('split'), children=state.get('children'),
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def _validate(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[-1]} features, but the forest expects {self.n_features} features.")
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        return X
+
+    def _row_leaves(self, row) -> np.ndarray:
+        """Leaf reached in every tree by one validated row; the 1-D traversal avoids the per-row offsets"""
+        node = self.roots.copy()
+        for _ in range(self.max_depth):
+            go_left = row.take(self.feature.take(node)) <= self._split.take(node)
+            node = self._children.take(2 * node + go_left)
+        return node
+
+    def _batch_leaves(self, X):
+        """Yield (start, leaves) per chunk of validated rows; leaves is tree-major, (n_estimators, rows)"""
+        for start in range(0, X.shape[0], BATCH_CHUNK):
+            chunk = X[start:start + BATCH_CHUNK]
+            rows = chunk.shape[0]
+            # Feature-major copy of the chunk: feature f of row r is at f * rows + r
+            flat = np.ascontiguousarray(chunk.T).ravel()
+            feature_offset = self.feature * rows
+            row_index = np.arange(rows, dtype=np.intp)
+            node = np.repeat(self._roots_by_depth[:, np.newaxis], rows, axis=1)
+            for live in self._live_trees:
+                active = node[:live]
+                go_left = flat.take(feature_offset.take(active) + row_index) <= self._split.take(active)
+                node[:live] = self._children.take(2 * active + go_left)
+            yield start, node.take(self._tree_rank, axis=0)
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf index reached in every tree, shape (n_samples, n_estimators)"""
+        X = self._validate(X)
+        if X.shape[0] == 1:
+            return self._row_leaves(X[0]).reshape(1, -1)
+        leaves = np.empty((self.n_estimators, X.shape[0]), dtype=np.intp)
+        for start, chunk_leaves in self._batch_leaves(X):
+            leaves[:, start:start + chunk_leaves.shape[1]] = chunk_leaves
+        return leaves.T
+
+    def predict_proba(self, X) -> np.ndarray:
+        # Reducing over the leading (tree) axis adds the trees one after the other, exactly like
+        # sklearn's per-tree accumulation
+        X = self._validate(X)
+        if X.shape[0] == 1:
+            return np.add.reduce(self.proba.take(self._row_leaves(X[0]), axis=0), axis=0, keepdims=True) / self.n_estimators
+        proba = np.empty((X.shape[0], self.proba.shape[1]))
+        for start, leaves in self._batch_leaves(X):
+            np.add.reduce(self.proba.take(leaves, axis=0), axis=0, out=proba[start:start + leaves.shape[1]])
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+
+def _tree_depths(left, right, roots, max_depth) -> np.ndarray:
+    """Depth of every tree; a node is a leaf when it points to itself"""
+    depths = np.zeros(len(roots), dtype=np.intp)
+    node, tree = roots, np.arange(len(roots))
+    for level in range(max_depth):
+        internal = left.take(node) != node
+        node, tree = node[internal], tree[internal]
+        depths[tree] = level + 1
+        node = np.concatenate([left.take(node), right.take(node)])
+        tree = np.concatenate([tree, tree])
+    return depths
+
+
+def _split_thresholds(threshold, input_dtype):
+    """
+    For float32 inputs, x <= t (t float64) is equivalent to x <= the largest float32 not above t,
+    which lets the traversal compare in the input dtype without upcasting every gathered value
+    """
+    split = threshold.astype(input_dtype)
+    rounded_up = split.astype(np.float64) > threshold
+    split[rounded_up] = np.nextafter(split[rounded_up], input_dtype.type(-np.inf))
+    return split
+
+
+def _float_key(x: np.ndarray) -> np.ndarray:
+    """Map float64 values to int64 keys with the same ordering (adjacent floats differ by 1)"""
+    bits = x.view(np.int64)
+    return np.where(bits < 0, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)), bits)
+
+
+def _key_float(key: np.ndarray) -> np.ndarray:
+    """Inverse of _float_key"""
+    bits = np.where(key < 0, (-key) | np.int64(np.iinfo(np.int64).min), key)
+    return bits.view(np.float64)
+
+
+def _fold_thresholds(threshold, mean, scale, scaled_dtype):
+    """Largest raw float64 x per split with scaled_dtype((x - mean) / scale) <= threshold"""
+    def passes(x):
+        # Same arithmetic as ml.utils.scale_features followed by the engine's input cast
+        return ((x - mean) / scale).astype(scaled_dtype) <= threshold
+
+    # Bracket the answer around the algebraic inverse, widening where it misses
+    estimate = threshold * scale + mean
+    delta = np.maximum(np.abs(estimate), 1.0) * 1e-3
+    for _ in range(8):
+        lo, hi = estimate - delta, estimate + delta
+        bracketed = passes(lo) & ~passes(hi)
+        if bracketed.all():
+            break
+        delta = np.where(bracketed, delta, delta * 1e3)
+    else:
+        raise ValueError("Could not fold scaler into split thresholds.")
+
+    lo_key, hi_key = _float_key(lo), _float_key(hi)
+    while (hi_key - lo_key > 1).any():
+        mid_key = lo_key + (hi_key - lo_key) // 2
+        ok = passes(_key_float(mid_key))
+        lo_key = np.where(ok, mid_key, lo_key)
+        hi_key = np.where(ok, hi_key, mid_key)
+    return _key_float(lo_key)
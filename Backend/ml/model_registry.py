@@ -0,0 +1,286 @@
+# backend/ml/model_registry.py
+"""
+Versioned model registry with atomic hot-swap.
+
+Layout under ml/model/:
+
+    manifest.json                      {"active": ..., "previous": ..., "versions": {...}}
+    versions/<version>/                failure_prediction_model.pkl, scaler.pkl and, optionally,
+                                       the exported failure_prediction_engine.joblib
+    failure_prediction_model.pkl ...   the flat files: the implicit version "legacy"
+
+Register a retrained model (copies the pickles and exports a verified engine):
+    python ml/model_registry.py register <version> <model.pkl> <scaler.pkl>
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import datetime
+import joblib
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.utils import (_get_model_path, load_inference_engine, load_engine_from, build_inference_engine,
+                      MODEL_FILE, SCALER_FILE, ENGINE_ARTIFACT)
+
+# Version id of the flat model files that predate the registry
+LEGACY_VERSION = 'legacy'
+MANIFEST_FILE = 'manifest.json'
+VERSIONS_DIR = 'versions'
+
+# Rows scored after validation, so the first live request doesn't pay page faults / first-call costs
+WARM_UP_ROWS = 256
+
+_VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+
+class ModelVersion:
+    """An immutable (version, engine) pair; the registry swaps whole instances, never mutates one"""
+
+    __slots__ = ('version', 'engine', 'activated_at')
+
+    def __init__(self, version, engine):
+        self.version = version
+        self.engine = engine
+        self.activated_at = datetime.utcnow().isoformat()
+
+
+class ModelRegistry:
+    """
+    Holds the active model version and swaps in new ones without dropping in-flight predictions.
+
+    Readers take active() once per request and score with that snapshot; deploy() loads,
+    validates (ml.export_model.verify_engine) and warms the new engine in a background thread,
+    then replaces the active reference in one assignment. The previous version stays loaded,
+    so rollback() is just another swap.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or _get_model_path()
+        self._lock = threading.Lock()  # serializes swaps and manifest writes
+        self._active = None
+        self._previous = None
+        self._deployments = {}
+        self._listeners = []
+
+    # --- on-disk layout -------------------------------------------------------------------
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def manifest(self) -> dict:
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"active": LEGACY_VERSION, "previous": None, "versions": {}}
+
+    def _write_manifest(self, manifest: dict):
+        # Write-then-rename so a crash never leaves a half-written manifest
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def version_path(self, version: str) -> str:
+        if version == LEGACY_VERSION:
+            return self.root
+        if not isinstance(version, str) or not _VERSION_PATTERN.match(version):
+            raise ValueError(f"Invalid model version '{version}'")
+        return os.path.join(self.root, VERSIONS_DIR, version)
+
+    def versions(self) -> list:
+        """Versions with both pickles on disk, legacy first"""
+        found = []
+        if os.path.exists(os.path.join(self.root, MODEL_FILE)):
+            found.append(LEGACY_VERSION)
+        versions_dir = os.path.join(self.root, VERSIONS_DIR)
+        if os.path.isdir(versions_dir):
+            for name in sorted(os.listdir(versions_dir)):
+                path = os.path.join(versions_dir, name)
+                # Skips the dot-prefixed staging directories of registrations in progress
+                if (_VERSION_PATTERN.match(name) and os.path.exists(os.path.join(path, MODEL_FILE))
+                        and os.path.exists(os.path.join(path, SCALER_FILE))):
+                    found.append(name)
+        return found
+
+    def register(self, version: str, model_path: str, scaler_path: str) -> str:
+        """
+        Copy a retrained model + scaler into versions/<version> and export its verified engine.
+        Everything is built and verified in a staging directory that is renamed into place only
+        once complete, so a failed or interrupted registration never leaves a listed version behind.
+        """
+        from ml.export_model import verify_engine
+
+        if version == LEGACY_VERSION:
+            raise ValueError(f"'{LEGACY_VERSION}' is reserved for the flat model files")
+        path = self.version_path(version)
+        if os.path.exists(path):
+            raise ValueError(f"Model version '{version}' already exists")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{version}.', dir=os.path.dirname(path))
+        try:
+            shutil.copyfile(model_path, os.path.join(staging, MODEL_FILE))
+            shutil.copyfile(scaler_path, os.path.join(staging, SCALER_FILE))
+
+            model, scaler = joblib.load(os.path.join(staging, MODEL_FILE)), joblib.load(os.path.join(staging, SCALER_FILE))
+            engine = build_inference_engine(model, scaler, staging)
+            rows = verify_engine(engine, model, scaler)
+            engine.save(os.path.join(staging, ENGINE_ARTIFACT))
+
+            try:
+                os.rename(staging, path)
+            except OSError:
+                # Another registration of the same version got there first
+                raise ValueError(f"Model version '{version}' already exists")
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        with self._lock:
+            manifest = self.manifest()
+            manifest['versions'][version] = {"registered_at": datetime.utcnow().isoformat(), "validated_rows": rows}
+            self._write_manifest(manifest)
+        print(f"Model version '{version}' registered at: {path} ({rows} rows verified)")
+        return path
+
+    # --- serving --------------------------------------------------------------------------
+
+    def load_engine(self, version: str):
+        """Load (without validating) the engine of a version"""
+        if version == LEGACY_VERSION and self.root == _get_model_path():
+            # Shares the process-wide engine of the flat files
+            return load_inference_engine()
+        path = self.version_path(version)
+        if not os.path.isdir(path):
+            raise ValueError(f"Unknown model version '{version}'")
+        return load_engine_from(path)
+
+    def active(self) -> ModelVersion:
+        """The version serving predictions; callers should keep the returned snapshot for the whole request"""
+        current = self._active
+        if current is None:
+            with self._lock:
+                if self._active is None:
+                    version = self.manifest().get('active') or LEGACY_VERSION
+                    self._active = ModelVersion(version, self.load_engine(version))
+                current = self._active
+        return current
+
+    def on_swap(self, callback):
+        """Register callback(new_version, old_version), called after every swap"""
+        self._listeners.append(callback)
+
+    def _swap(self, new: ModelVersion):
+        # Caller holds self._lock
+        old = self._active
+        self._active = new
+        self._previous = old
+        manifest = self.manifest()
+        manifest['active'] = new.version
+        manifest['previous'] = old.version if old is not None else None
+        self._write_manifest(manifest)
+        for callback in self._listeners:
+            callback(new, old)
+        print(f"[Model Registry] Active model version: {new.version}" + (f" (was {old.version})" if old else ""))
+
+    def deploy(self, version: str, wait: bool = False) -> dict:
+        """
+        Load, validate and warm a version in the background, then swap it in.
+        Returns the deployment status; wait=True blocks until it is active or failed.
+        """
+        self.version_path(version)
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'")
+        with self._lock:
+            status = self._deployments.get(version)
+            if status is not None and status['state'] in ('loading', 'validating', 'warming'):
+                raise ValueError(f"Model version '{version}' is already being deployed")
+            status = {"version": version, "state": "loading", "error": None,
+                      "started_at": datetime.utcnow().isoformat(), "finished_at": None}
+            self._deployments[version] = status
+
+        worker = threading.Thread(target=self._deploy, args=(version, status), name=f'deploy-{version}', daemon=True)
+        worker.start()
+        if wait:
+            worker.join()
+        return dict(status)
+
+    def _deploy(self, version, status):
+        from ml.export_model import verify_engine, dataset_features
+        try:
+            engine = self.load_engine(version)
+
+            status['state'] = 'validating'
+            path = self.version_path(version)
+            model, scaler = joblib.load(os.path.join(path, MODEL_FILE)), joblib.load(os.path.join(path, SCALER_FILE))
+            features = dataset_features()
+            status['validated_rows'] = verify_engine(engine, model, scaler, features)
+
+            status['state'] = 'warming'
+            engine.predict_proba(features[:WARM_UP_ROWS])
+            engine.predict_proba(features[0])
+
+            with self._lock:
+                self._swap(ModelVersion(version, engine))
+            status['state'] = 'active'
+        except Exception as e:
+            print(f"[Model Registry] Deployment of '{version}' failed: {e}")
+            status['state'] = 'failed'
+            status['error'] = str(e)
+        finally:
+            status['finished_at'] = datetime.utcnow().isoformat()
+
+    def follow(self, version: str) -> ModelVersion:
+        """
+        Serve a version another process has already validated and activated (e.g. a simulation
+        shard following the Flask process): loads it and swaps it in, without validation or a
+        manifest write.
+        """
+        current = self.active()
+        if current.version == version:
+            return current
+        engine = self.load_engine(version)
+        with self._lock:
+            old, self._active = self._active, ModelVersion(version, engine)
+            self._previous = old
+            for callback in self._listeners:
+                callback(self._active, old)
+            return self._active
+
+    def rollback(self) -> ModelVersion:
+        """Swap back to the previously active version (already loaded, so this is instant)"""
+        self.active()
+        with self._lock:
+            if self._previous is None:
+                raise ValueError("No previous model version to roll back to")
+            # A new activation of the same engine, so activated_at records the rollback
+            self._swap(ModelVersion(self._previous.version, self._previous.engine))
+            return self._active
+
+    def status(self) -> dict:
+        current = self.active()
+        previous = self._previous
+        with self._lock:
+            deployments = [dict(d) for d in self._deployments.values()]
+        return {
+            "active": current.version,
+            "activated_at": current.activated_at,
+            "previous": previous.version if previous is not None else None,
+            "versions": self.versions(),
+            "deployments": deployments
+        }
+
+
+# Process-wide registry used by the prediction service
+model_registry = ModelRegistry()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 5 or sys.argv[1] != 'register':
+        print("Usage: python ml/model_registry.py register <version> <model.pkl> <scaler.pkl>")
+        sys.exit(1)
+    model_registry.register(sys.argv[2], sys.argv[3], sys.argv[4])
@@ -1,13 +1,41 @@
 # backend/ml_model/utils.py
 
 import os
+import hashlib
+from datetime import datetime
 import joblib
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ml.forest_engine import FlattenedForest
 
 # Global variables to hold the loaded model and scaler to avoid reloading on every request
 _model = None
 _scaler = None
+_engine = None
+
+# Exported inference engine: forest + scaler folded into one artifact (see ml/export_model.py)
+ENGINE_ARTIFACT = 'failure_prediction_engine.joblib'
+MODEL_FILE = 'failure_prediction_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+
+# How the engine artifact is opened: 'r' maps its arrays read-only so workers share one page-cache
+# copy; an empty value loads private in-memory copies
+MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r') or None
+
+# Rolling window used for the engineered features
+WINDOW_SIZE = 3
+
+# Raw sensor columns, in the order they appear in the feature vector
+SENSOR_COLUMNS = ['Temperature', 'Vibration', 'Pressure']
+
+# Feature order the scaler and model were trained on
+EXPECTED_FEATURES = [
+    'Temperature', 'Vibration', 'Pressure', 'hour', 'day_of_week',
+    'Temperature_mean_3', 'Temperature_std_3', 'Temperature_max_3', 'Temperature_min_3',
+    'Vibration_mean_3', 'Vibration_std_3', 'Vibration_max_3', 'Vibration_min_3',
+    'Pressure_mean_3', 'Pressure_std_3', 'Pressure_max_3', 'Pressure_min_3'
+]
 
 def _get_model_path():
     """Helper to get the absolute path to the trained model directory."""
@@ -21,17 +49,63 @@ def load_ml_artifacts():
     """
     global _model, _scaler
     if _model is None:
-        model_path = os.path.join(_get_model_path(), 'failure_prediction_model.pkl')
+        model_path = os.path.join(_get_model_path(), MODEL_FILE)
         _model = joblib.load(model_path)
         print(f"ML Model loaded from: {model_path}")
 
     if _scaler is None:
-        scaler_path = os.path.join(_get_model_path(), 'scaler.pkl')
+        scaler_path = os.path.join(_get_model_path(), SCALER_FILE)
         _scaler = joblib.load(scaler_path)
         print(f"Scaler loaded from: {scaler_path}")
 
     return _model, _scaler
 
+def _source_fingerprint(model_dir=None):
+    """Hash of the pickled model and scaler an exported engine was built from"""
+    model_dir = model_dir or _get_model_path()
+    digest = hashlib.sha256()
+    for name in (MODEL_FILE, SCALER_FILE):
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def build_inference_engine(model, scaler, model_dir=None):
+    """Flatten the forest and fold the scaler into it, so it scores raw engineered features"""
+    engine = FlattenedForest.from_sklearn(model).fold_scaler(scaler)
+    engine.metadata['source_fingerprint'] = _source_fingerprint(model_dir)
+    return engine
+
+def load_engine_from(model_dir, mmap_mode=MODEL_MMAP_MODE):
+    """
+    Load the inference engine of one model directory (model + scaler pickles, optional exported
+    artifact). Uses the artifact when it matches the pickles, otherwise builds from the pickles.
+    """
+    engine_path = os.path.join(model_dir, ENGINE_ARTIFACT)
+    if os.path.exists(engine_path):
+        engine = FlattenedForest.load(engine_path, mmap_mode=mmap_mode)
+        if engine.metadata.get('source_fingerprint') == _source_fingerprint(model_dir):
+            print(f"Inference engine loaded from: {engine_path}" + (" (memory-mapped)" if mmap_mode else ""))
+            return engine
+        print(f"Inference engine at {engine_path} is stale; rebuilding from model and scaler")
+
+    model = joblib.load(os.path.join(model_dir, MODEL_FILE))
+    scaler = joblib.load(os.path.join(model_dir, SCALER_FILE))
+    engine = build_inference_engine(model, scaler, model_dir)
+    print(f"Inference engine built: {engine.n_estimators} trees, {len(engine.feature)} nodes, depth {engine.max_depth}")
+    return engine
+
+def load_inference_engine(mmap_mode=MODEL_MMAP_MODE):
+    """
+    Returns the array-backed inference engine (see ml.forest_engine) of the flat model files,
+    which takes raw EXPECTED_FEATURES rows - no scaler pass needed. Uses the exported artifact
+    when it matches the current model/scaler pickles (memory-mapped per mmap_mode), otherwise
+    builds it. Loading the artifact never unpickles the sklearn model.
+    """
+    global _engine
+    if _engine is None:
+        _engine = load_engine_from(_get_model_path(), mmap_mode)
+    return _engine
+
 def preprocess_input_data(input_data: pd.DataFrame) -> pd.DataFrame:
     if _scaler is None:
         # This means load_ml_artifacts wasn't called or failed
@@ -46,7 +120,7 @@ def preprocess_input_data(input_data: pd.DataFrame) -> pd.DataFrame:
     input_data.columns = input_data.columns.str.strip()
 
 
-    window_size = 3
+    window_size = WINDOW_SIZE
     for col in ['Temperature', 'Vibration', 'Pressure']:
         input_data[f'{col}_mean_{window_size}'] = input_data[col].rolling(window=window_size).mean()
         input_data[f'{col}_std_{window_size}'] = input_data[col].rolling(window=window_size).std()
@@ -58,18 +132,72 @@ def preprocess_input_data(input_data: pd.DataFrame) -> pd.DataFrame:
     if input_data.empty:
         raise ValueError(f"Input data resulted in empty DataFrame after processing, likely due to insufficient history ({window_size} rows needed for rolling features).")
 
-    expected_features = [
-        'Temperature', 'Vibration', 'Pressure', 'hour', 'day_of_week',
-        'Temperature_mean_3', 'Temperature_std_3', 'Temperature_max_3', 'Temperature_min_3',
-        'Vibration_mean_3', 'Vibration_std_3', 'Vibration_max_3', 'Vibration_min_3',
-        'Pressure_mean_3', 'Pressure_std_3', 'Pressure_max_3', 'Pressure_min_3'
-    ]
-    processed_df = input_data[expected_features] 
+    processed_df = input_data[EXPECTED_FEATURES] 
 
     scaled_data = _scaler.transform(processed_df)
 
     return scaled_data
 
+def timestamp_features(timestamp):
+    """Return (hour, day_of_week) for a timestamp, matching pandas' .dt.hour / .dt.dayofweek"""
+    if timestamp is None:
+        return np.nan, np.nan
+    if not isinstance(timestamp, datetime):
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp).strip())
+        except ValueError:
+            # Non-ISO formats (e.g. the training CSV's '7/1/2025 0:00') go through pandas' parser
+            timestamp = pd.Timestamp(timestamp)
+            if pd.isna(timestamp):
+                return np.nan, np.nan
+    return timestamp.hour, timestamp.weekday()
+
+def engineer_features(temperature, vibration, pressure, hour, day_of_week) -> np.ndarray:
+    """
+    Pure-NumPy equivalent of the feature engineering in preprocess_input_data.
+    Takes one 1-D array per input column and returns the EXPECTED_FEATURES matrix for every
+    row that has a full rolling window (rows with missing values are dropped, like dropna()).
+    """
+    values = np.column_stack((temperature, vibration, pressure)).astype(np.float64, copy=False)
+    if values.shape[0] < WINDOW_SIZE:
+        raise ValueError(f"Input data resulted in empty DataFrame after processing, likely due to insufficient history ({WINDOW_SIZE} rows needed for rolling features).")
+
+    # (rows, sensor, window) view over the readings - no copies
+    windows = sliding_window_view(values, WINDOW_SIZE, axis=0)
+    rows = windows.shape[0]
+
+    features = np.empty((rows, len(EXPECTED_FEATURES)), dtype=np.float64)
+    features[:, 0:3] = values[WINDOW_SIZE - 1:]
+    features[:, 3] = np.asarray(hour, dtype=np.float64)[WINDOW_SIZE - 1:]
+    features[:, 4] = np.asarray(day_of_week, dtype=np.float64)[WINDOW_SIZE - 1:]
+    # Per sensor the rolling block is laid out as mean, std, max, min
+    features[:, 5::4] = windows.mean(axis=2)
+    features[:, 6::4] = windows.std(axis=2, ddof=1)
+    features[:, 7::4] = windows.max(axis=2)
+    features[:, 8::4] = windows.min(axis=2)
+
+    features = features[~np.isnan(features).any(axis=1)]
+    if features.shape[0] == 0:
+        raise ValueError(f"Input data resulted in empty DataFrame after processing, likely due to insufficient history ({WINDOW_SIZE} rows needed for rolling features).")
+    return features
+
+def scale_features(features: np.ndarray) -> np.ndarray:
+    """Apply the fitted StandardScaler to a raw feature matrix without building a DataFrame"""
+    if _scaler is None:
+        raise RuntimeError("Scaler not loaded. Call load_ml_artifacts() first.")
+
+    # Same arithmetic as StandardScaler.transform, on a contiguous float64 copy
+    scaled = np.array(features, dtype=np.float64, order='C')
+    if _scaler.with_mean:
+        scaled -= _scaler.mean_
+    if _scaler.with_std:
+        scaled /= _scaler.scale_
+    return scaled
+
+def preprocess_input_arrays(temperature, vibration, pressure, hour, day_of_week) -> np.ndarray:
+    """NumPy fast path for preprocess_input_data: engineered and scaled features from raw arrays"""
+    return scale_features(engineer_features(temperature, vibration, pressure, hour, day_of_week))
+
 if __name__ == '__main__':
     dummy_data = pd.DataFrame([
         {'Timestamp': '2023-01-01 00:00:00', 'Temperature': 25.0, 'Vibration': 10.0, 'Pressure': 100.0},
@@ -8,25 +8,47 @@ from datetime import datetime, timedelta
 import json
 import os
 import threading
-from threading import Lock
-import csv
-import statistics
 import sys
-import queue
+import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from services.sensor_simulation import simulator
-from services.prediction_service import get_machine_specific_prediction
+from services.prediction_service import get_machine_specific_prediction, get_machine_prediction_from_features
+from ml.feature_state import RollingFeatureState
+from ml.model_registry import model_registry
+from services.fleet_simulator import FleetSimulator, load_dataset_stats, DATASET_CSV, VITALS, VITAL_DECIMALS
+from services.machine_registry import MachineRegistry, INDEXED_FIELDS
+from services.fleet_state import InstrumentedLock, SnapshotStore
+from services.vitals_history import VitalsRingBuffer
+from services.tick_scheduler import TickScheduler
+from services.tick_pipeline import Pipeline, PipelineStage
+from services.simulation_clock import SimulationClock, SIMULATION_SEED
+from services.fleet_episodes import EpisodeScript
+from services.fleet_shards import ShardSupervisor, SIMULATION_SHARDS, FAILURE_TYPES, RISK_LEVELS, SAMPLE_MODES
+from services.vitals_records import MachineVitals, Prediction
+from services.stream_hub import StreamHub, encode_event, CONNECTED_FRAME, HEARTBEAT_FRAME
+from services.stream_delta import DeltaEncoder
+from services.async_stream_server import AsyncStreamServer
+from services.stream_filters import FilteredStreams, StreamFilter
+from werkzeug.datastructures import MultiDict
 
 machine_bp = Blueprint('machine_bp', __name__)
-CORS(machine_bp, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:3001', 'http://127.0.0.1:3001'])
+# Dashboard origins (also allowed by the asyncio stream server)
+CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:3001', 'http://127.0.0.1:3001']
+CORS(machine_bp, origins=CORS_ORIGINS)
 
 # Global variables for simulation control
 simulation_running = False
 simulation_thread = None
-lock = Lock()
+# Seconds /simulation/start waits for a just-stopped worker to finish before refusing
+SIMULATION_STOP_TIMEOUT = 5.0
+# Guards simulation control and fleet-state writes (never reads); wait/hold times at GET /locks/stats
+lock = InstrumentedLock('fleet')
 
-# Queue for broadcasting vitals updates to connected clients
-vitals_update_queue = queue.Queue(maxsize=100)
+# Pub/sub fan-out of vitals updates to /vitals/stream clients (one bounded queue per client, STREAM_QUEUE_SIZE)
+STREAM_HUB = StreamHub()
+
+# Delta / keyframe encoding of stream updates (STREAM_KEYFRAME_INTERVAL); updated under STREAM_HUB.lock
+STREAM_DELTAS = DeltaEncoder()
 
 # Log file path
 LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'machine_vitals.log')
@@ -34,52 +56,43 @@ LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'mac
 # Ensure logs directory exists
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
 
-# Path to the training dataset (used to seed realistic vitals)
-DATASET_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml', 'data', 'simulated_sensors.csv')
+# Training dataset statistics (seed realistic vitals), loaded once at module import
+DATASET_STATS = load_dataset_stats(DATASET_CSV)
 
-# Compute simple statistics from the dataset so per-machine vitals match training distribution
-def load_dataset_stats(path):
-    stats = {
-        'temperature': {'mean': 75.0, 'std': 8.0},
-        'pressure': {'mean': 100.0, 'std': 8.0},
-        'vibration': {'mean': 0.4, 'std': 0.15}
-    }
-    try:
-        temps = []
-        press = []
-        vib = []
-        if os.path.exists(path):
-            with open(path, 'r', newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    # tolerate header spacing and comma formatting
-                    try:
-                        t = row.get('Temperature') or row.get(' Temperature ') or row.get(' Temperature')
-                        v = row.get('Vibration') or row.get(' Vibration ')
-                        p = row.get('Pressure') or row.get(' Pressure ')
-                        if t is not None and p is not None and v is not None:
-                            temps.append(float(t))
-                            vib.append(float(v))
-                            press.append(float(p))
-                    except Exception:
-                        continue
-        if temps and press and vib:
-            stats['temperature']['mean'] = statistics.mean(temps)
-            stats['temperature']['std'] = statistics.pstdev(temps) if len(temps) > 1 else stats['temperature']['std']
-            stats['pressure']['mean'] = statistics.mean(press)
-            stats['pressure']['std'] = statistics.pstdev(press) if len(press) > 1 else stats['pressure']['std']
-            stats['vibration']['mean'] = statistics.mean(vib)
-            stats['vibration']['std'] = statistics.pstdev(vib) if len(vib) > 1 else stats['vibration']['std']
-    except Exception:
-        # keep defaults on any failure
-        pass
-    return stats
+# Latest per-machine vitals, published by simulation_worker as immutable snapshots; read lock-free
+FLEET_STATE = SnapshotStore(write_lock=lock)
 
-# Load once at module import
-DATASET_STATS = load_dataset_stats(DATASET_CSV)
+# Streaming rolling-feature state per machine id (updated by simulation_worker, O(1) per reading)
+MACHINE_FEATURE_STATES = {}
+
+# Per-machine VitalsRingBuffer of readings (VITALS_HISTORY_DEPTH deep; appended by simulation_worker)
+MACHINE_HISTORY = {}
+
+# Readings embedded in /machines/<id>/vitals/current (the full window is at /vitals/history?limit=)
+CURRENT_VITALS_HISTORY = 10
 
-# Shared in-memory store for latest per-machine vitals (updated by simulation_worker)
-CURRENT_MACHINE_VITALS = {}
+# Mining fleet, loaded from config/machines.json (or MACHINES_CONFIG); indexed by id, type, location and status
+MACHINE_REGISTRY = MachineRegistry.from_file()
+
+# Filtered /vitals/stream channels (?machine_id=&type=&location=&min_risk=&max_rate=), fed from STREAM_DELTAS
+STREAM_FILTERS = FilteredStreams(STREAM_DELTAS, MACHINE_REGISTRY.find, STREAM_HUB.lock)
+
+# Vectorized random walk of all machines' vitals (created by simulation_worker, column = registry position)
+FLEET_SIMULATOR = None
+
+# Simulated time of the fleet (SIMULATION_SPEED; 0 = fast-forward as fast as the pipeline goes)
+SIMULATION_CLOCK = SimulationClock()
+
+# When each machine is next sampled: faster at higher predicted risk, slower in maintenance, never offline
+SCHEDULER = TickScheduler(clock=SIMULATION_CLOCK)
+
+# Scripted per-machine caution / critical episodes, in simulated seconds
+EPISODES = EpisodeScript(SIMULATION_SEED)
+
+# Shard processes of the sharded simulation (SIMULATION_SHARDS > 0) while it runs, and how often
+# the Flask process collects their samples (real seconds)
+SHARDS = None
+SHARD_POLL_INTERVAL = 0.5
 
 
 def get_recent_history_from_logs(limit=3):
@@ -173,7 +186,7 @@ def _extract_sensor_value(readings: dict, key: str, default: float = 0.0):
     return default
 
 def generate_vitals():
-    """Generate realistic machine vitals using the new sensor simulation system"""
+    """Latest readings of the sensor simulation system (advanced by its ticker, not by reads)"""
     return simulator.get_current_readings()
 
 def log_vitals_to_file(vitals):
@@ -189,102 +202,13 @@ def log_vitals_to_file(vitals):
     except Exception as e:
         print(f"Error logging vitals: {e}")
 
-def simulation_worker():
-    """Background worker that generates vitals every 30 seconds for each machine with ML predictions"""
-    global simulation_running
-    
-    # Initialize CURRENT_MACHINE_VITALS if empty using dataset stats
-    with lock:
-        if not CURRENT_MACHINE_VITALS:
-            for machine in MINING_MACHINES:
-                # seed around dataset mean with a small machine-specific offset
-                CURRENT_MACHINE_VITALS[machine['id']] = {
-                    'machine_id': machine['id'],
-                    'machine_name': machine['name'],
-                    'machine_type': machine['type'],
-                    'temperature': round(DATASET_STATS['temperature']['mean'] + random.uniform(-5, 5), 2),
-                    'pressure': round(DATASET_STATS['pressure']['mean'] + random.uniform(-8, 8), 2),
-                    'vibration': round(DATASET_STATS['vibration']['mean'] + random.uniform(-0.2, 0.2), 2),
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'history': []  # Store recent history for ML predictions
-                }
-
-    print("[Simulation Worker] Started - updating vitals every 30 seconds")
-    
-    # Main loop: update each machine's vitals every 30s
-    while simulation_running:
-        with lock:
-            updated_machines = []
-            for machine_config in MINING_MACHINES:
-                mid = machine_config['id']
-                vit = CURRENT_MACHINE_VITALS.get(mid)
-                
-                if not vit:
-                    continue
-                
-                # Generate realistic variations using dataset statistics
-                t_std = max(0.5, DATASET_STATS['temperature']['std'] * 0.15)
-                p_std = max(1.0, DATASET_STATS['pressure']['std'] * 0.15)
-                v_std = max(0.02, DATASET_STATS['vibration']['std'] * 0.15)
-
-                # Use Gaussian random walk for smooth, realistic changes
-                new_t = round(max(20, min(120, random.gauss(vit['temperature'], t_std))), 2)
-                new_p = round(max(30, min(220, random.gauss(vit['pressure'], p_std))), 2)
-                new_v = round(max(0.05, min(8, random.gauss(vit['vibration'], v_std))), 3)
-
-                # Update vitals
-                vit['temperature'] = new_t
-                vit['pressure'] = new_p
-                vit['vibration'] = new_v
-                vit['timestamp'] = datetime.utcnow().isoformat()
-                
-                # Maintain history (keep last 10 readings for ML predictions)
-                if 'history' not in vit:
-                    vit['history'] = []
-                    
-                vit['history'].append({
-                    'Timestamp': vit['timestamp'],
-                    'Temperature': new_t,
-                    'Pressure': new_p,
-                    'Vibration': new_v
-                })
-                
-                # Keep only last 10 readings
-                if len(vit['history']) > 10:
-                    vit['history'] = vit['history'][-10:]
-                
-                # Run ML prediction using recent history
-                try:
-                    if len(vit['history']) >= 3:
-                        prediction_result = get_machine_specific_prediction(
-                            machine_config['type'], 
-                            vit['history'][-3:]  # Use last 3 readings for prediction
-                        )
-                        
-                        failure_probability = prediction_result.get('most_likely_failure_probability', 0)
-                        failure_risk_percentage = int(failure_probability * 100)
-                        
-                        vit['prediction'] = {
-                            'failure_risk': failure_risk_percentage,
-                            'predicted_failure_type': prediction_result.get('most_likely_failure'),
-                            'estimated_hours': prediction_result.get('most_likely_failure_estimated_hours'),
-                            'risk_level': 'critical' if failure_probability > 0.7 
-                                        else 'high' if failure_probability >= 0.5
-                                        else 'medium' if failure_probability >= 0.3
-                                        else 'low',
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        
-                        # AUTO-SHUTDOWN: If failure risk > 90%, automatically take machine offline
-                        if failure_risk_percentage > 90 and machine_config['status'] == 'online':
-                            machine_config['status'] = 'offline'
-                            vit['status'] = 'offline'
-                            
-                            # Log the automatic shutdown
-                            print(f"[AUTO-SHUTDOWN] Machine {machine_config['name']} (ID: {mid}) taken offline automatically - Failure risk: {failure_risk_percentage}%")
-                            
-                            # Send alert notification
-                            alert_message = f"""
+def _send_shutdown_alert(machine_config, vit):
+    """Email (or print) the automatic-shutdown alert for a machine from its scored vitals record"""
+    failure_risk_percentage = vit.prediction.failure_risk
+    failure_type = vit.prediction.failure_type or 'Unknown'
+    estimated_hours = vit.prediction.estimated_hours if vit.prediction.estimated_hours is not None else 'N/A'
+    new_t, new_p, new_v = vit.temperature, vit.pressure, vit.vibration
+    alert_message = f"""
 CRITICAL ALERT: Automatic Machine Shutdown
 
 Machine: {machine_config['name']}
@@ -293,8 +217,8 @@ Location: {machine_config.get('location', 'Unknown')}
 Status: OFFLINE (Automatic Shutdown)
 
 Failure Risk: {failure_risk_percentage}%
-Predicted Failure: {prediction_result.get('most_likely_failure', 'Unknown').replace('_', ' ').upper()}
-Estimated Time to Failure: {prediction_result.get('most_likely_failure_estimated_hours', 'N/A')} hours
+Predicted Failure: {failure_type.replace('_', ' ').upper()}
+Estimated Time to Failure: {estimated_hours} hours
 
 Current Vitals:
 - Temperature: {new_t}°C
@@ -305,103 +229,359 @@ ACTION REQUIRED: Immediate inspection and maintenance needed before machine can
 
 Timestamp: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}
 """
-                            
-                            try:
-                                # Send email alert using sensor_simulation's email system
-                                simulator.send_email_alert(
-                                    subject=f"🚨 CRITICAL: {machine_config['name']} Auto-Shutdown - {failure_risk_percentage}% Failure Risk",
-                                    body=simulator.create_shutdown_alert_email(
-                                        machine_config['name'],
-                                        machine_config['type'],
-                                        machine_config.get('location', 'Unknown'),
-                                        failure_risk_percentage,
-                                        prediction_result.get('most_likely_failure', 'Unknown'),
-                                        prediction_result.get('most_likely_failure_estimated_hours', 'N/A'),
-                                        new_t,
-                                        new_p,
-                                        new_v
-                                    )
-                                )
-                                print(f"[AUTO-SHUTDOWN] Alert email sent for machine {machine_config['name']}")
-                            except Exception as email_error:
-                                print(f"[AUTO-SHUTDOWN] Failed to send email alert: {email_error}")
-                                # Print alert to console as fallback
-                                print(alert_message)
-                        
-                except Exception as e:
-                    print(f"[Simulation Worker] Prediction error for machine {mid}: {e}")
-                    vit['prediction'] = None
-
-                # log per-machine vitals
-                try:
-                    log_vitals_to_file({
-                        'machine_id': mid,
-                        'machine_name': machine_config['name'],
-                        'machine_type': machine_config['type'],
-                        'temperature': new_t,
-                        'pressure': new_p,
-                        'vibration': new_v,
-                        'timestamp': vit['timestamp'],
-                        'prediction': vit.get('prediction')
-                    })
-                except Exception as e:
-                    print(f"[Simulation Worker] Logging error: {e}")
-                
-                updated_machines.append({
-                    'machine_id': mid,
-                    'machine_name': machine_config['name'],
-                    'machine_type': machine_config['type'],
-                    'vitals': {
-                        'temperature': new_t,
-                        'pressure': new_p,
-                        'vibration': new_v,
-                        'timestamp': vit['timestamp']
-                    },
-                    'prediction': vit.get('prediction')
-                })
-            
-            # Broadcast updates to connected clients
-            try:
-                update_data = {
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'machines': updated_machines
-                }
-                vitals_update_queue.put(update_data, block=False)
-            except queue.Full:
-                # Queue full, skip this update
-                pass
-
-        # Sleep 30 seconds in 1s increments to allow prompt stop
-        sleep_seconds = 30
-        for _ in range(sleep_seconds):
-            if not simulation_running:
-                break
-            time.sleep(1)
     
+    try:
+        # Send email alert using sensor_simulation's email system
+        simulator.send_email_alert(
+            subject=f"🚨 CRITICAL: {machine_config['name']} Auto-Shutdown - {failure_risk_percentage}% Failure Risk",
+            body=simulator.create_shutdown_alert_email(
+                machine_config['name'],
+                machine_config['type'],
+                machine_config.get('location', 'Unknown'),
+                failure_risk_percentage,
+                failure_type,
+                estimated_hours,
+                new_t,
+                new_p,
+                new_v
+            )
+        )
+        print(f"[AUTO-SHUTDOWN] Alert email sent for machine {machine_config['name']}")
+    except Exception as email_error:
+        print(f"[AUTO-SHUTDOWN] Failed to send email alert: {email_error}")
+        # Print alert to console as fallback
+        print(alert_message)
+
+def _publish_fleet_state(machines: dict):
+    """Swap in a new fleet snapshot (machine statuses come from the registry); caller holds lock"""
+    for mid, vit in machines.items():
+        vit.status = MACHINE_REGISTRY.get(mid)['status']
+    return FLEET_STATE.publish({**FLEET_STATE.current().machines, **machines})
+
+def simulation_worker():
+    """Background worker that samples each machine's vitals on its own cadence, with ML predictions"""
+    global simulation_running, FLEET_SIMULATOR
+    
+    # Publish initial vitals if none yet, seeded from dataset stats
+    with lock:
+        if FLEET_SIMULATOR is None or FLEET_SIMULATOR.n_machines != len(MACHINE_REGISTRY):
+            # seeds every machine around the dataset mean with a small machine-specific offset
+            FLEET_SIMULATOR = FleetSimulator(len(MACHINE_REGISTRY), DATASET_STATS, seed=SIMULATION_SEED)
+        if not FLEET_STATE.current().machines:
+            now = SIMULATION_CLOCK.datetime()
+            _publish_fleet_state({
+                machine['id']: MachineVitals(machine['id'], machine['name'], machine['type'],
+                                             **FLEET_SIMULATOR.reading(index), timestamp=now)
+                for index, machine in enumerate(MACHINE_REGISTRY)
+            })
+        # Every machine is due at once on (re)start; cadences adapt after the first prediction
+        SCHEDULER.clear()
+        for machine in MACHINE_REGISTRY:
+            SCHEDULER.add(machine['id'], machine['status'])
+
+    # This run's stage threads: a worker that is still winding down never stops the next run's
+    pipeline_runs = TICK_PIPELINE.start()
+    if SIMULATION_SHARDS > 0:
+        _collect_shards()
+    else:
+        _schedule_machines()
+    TICK_PIPELINE.stop(runs=pipeline_runs)
     print("[Simulation Worker] Stopped")
 
+def _schedule_machines():
+    """In-process simulation: feed the machines that are due to the tick pipeline until stopped"""
+    print("[Simulation Worker] Started - sampling machines on their scheduled cadence")
+    
+    # Main loop: hand the machines that are due to the tick pipeline. Machines stay off the schedule
+    # until the predict stage completes them, so a machine is never in flight twice. The next fleet
+    # state is built off-lock; the lock is only held to swap it in, so readers never wait on a tick.
+    while simulation_running:
+        due_ids = SCHEDULER.pop_due()
+        if due_ids:
+            TICK_PIPELINE.submit('simulate', due_ids)
+
+        # Fast-forward: machines in flight are off the schedule, so let them land before jumping ahead
+        if SIMULATION_CLOCK.fast_forward:
+            TICK_PIPELINE.drain('simulate', 'predict')
+
+        # Sleep until the next machine is due, in increments of at most 1s (real time) to allow prompt stop
+        while simulation_running:
+            next_due = SCHEDULER.next_due()
+            if next_due is None:
+                time.sleep(1.0)
+                continue
+            wait = next_due - SIMULATION_CLOCK.now()
+            if wait <= 0:
+                break
+            SIMULATION_CLOCK.sleep(min(wait, SIMULATION_CLOCK.speed or wait))
+
+def _simulate_stage(due_ids):
+    """Pipeline stage 1: random-walk step and rolling features for the machines that are due"""
+    previous = FLEET_STATE.current()
+    samples = []
+    t = SIMULATION_CLOCK.now()
+    now = SIMULATION_CLOCK.datetime(t)
+    # One Gaussian random-walk step (scaled from dataset statistics) for the due machines
+    FLEET_SIMULATOR.step([MACHINE_REGISTRY.position(mid) for mid in due_ids])
+    for mid in due_ids:
+        prev = previous.get(mid)
+        
+        if not prev:
+            continue
+        
+        reading = FLEET_SIMULATOR.reading(MACHINE_REGISTRY.position(mid))
+        mode = EPISODES.apply(reading, mid, t)
+
+        # New vitals record (published snapshots are never modified)
+        vit = prev.sample(reading['temperature'], reading['pressure'], reading['vibration'], now, mode)
+
+        # Feed the streaming feature state so predictions need no history reprocessing
+        feature_state = MACHINE_FEATURE_STATES.get(mid)
+        if feature_state is None:
+            feature_state = MACHINE_FEATURE_STATES[mid] = RollingFeatureState()
+        feature_state.update(now, reading['temperature'], reading['vibration'], reading['pressure'])
+        samples.append((vit, feature_state.features() if feature_state.ready else None))
+    return {'due_ids': due_ids, 'samples': samples}
+
+def _predict_stage(batch):
+    """Pipeline stage 2: ML predictions, then auto-shutdown, history and the fleet snapshot swap"""
+    records = []
+    for vit, features in batch['samples']:
+        # Run ML prediction on the rolling features of the newest reading
+        try:
+            if features is not None:
+                prediction_result = get_machine_prediction_from_features(vit.machine_type, features)
+                vit.prediction = Prediction.from_result(prediction_result, vit.timestamp)
+        except Exception as e:
+            print(f"[Simulation Worker] Prediction error for machine {vit.machine_id}: {e}")
+            vit.prediction = None
+        records.append(vit)
+
+    published = _publish_samples(records)
+
+    # Next sample of each machine from its status (after any auto-shutdown) and latest risk level
+    risk_levels = {vit.machine_id: vit.prediction.risk_level for vit in records if vit.prediction is not None}
+    for mid in batch['due_ids']:
+        SCHEDULER.complete(mid, MACHINE_REGISTRY.get(mid)['status'], risk_levels.get(mid))
+
+    return published
+
+def _publish_samples(records):
+    """Auto-shutdown, history and the fleet snapshot swap for freshly scored MachineVitals records;
+    returns the batch for the log and broadcast stages"""
+    next_machines = {}
+    for vit in records:
+        mid = vit.machine_id
+        machine_config = MACHINE_REGISTRY.get(mid)
+        prediction = vit.prediction
+        
+        # AUTO-SHUTDOWN: If failure risk > 90%, automatically take machine offline
+        if prediction is not None and prediction.failure_risk > 90 and machine_config['status'] == 'online':
+            MACHINE_REGISTRY.set_status(mid, 'offline')
+            
+            # Log the automatic shutdown; the alert email goes out from its own stage
+            print(f"[AUTO-SHUTDOWN] Machine {machine_config['name']} (ID: {mid}) taken offline automatically - Failure risk: {prediction.failure_risk}%")
+            TICK_PIPELINE.submit('alert', (machine_config, vit))
+
+        # Append to the machine's ring buffer (written in place; read lock-free by the history routes)
+        history = MACHINE_HISTORY.get(mid)
+        if history is None:
+            history = MACHINE_HISTORY[mid] = VitalsRingBuffer()
+        history.append(vit.timestamp, vit.temperature, vit.pressure, vit.vibration,
+                       prediction.failure_risk if prediction is not None else None)
+
+        next_machines[mid] = vit
+
+    with lock:
+        _publish_fleet_state(next_machines)
+
+    return {'vitals': list(next_machines.values())}
+
+def _collect_shards():
+    """Sharded simulation (SIMULATION_SHARDS > 0): publish what the shard processes sample and score"""
+    global SHARDS
+    SHARDS = ShardSupervisor(SIMULATION_SHARDS, list(MACHINE_REGISTRY), DATASET_STATS, SIMULATION_CLOCK, seed=SIMULATION_SEED)
+    SHARDS.start(FLEET_SIMULATOR.values, [machine['status'] for machine in MACHINE_REGISTRY])
+    print(f"[Simulation Worker] Started - {SHARDS.n_shards} shard processes sampling {len(MACHINE_REGISTRY)} machines")
+
+    machines = list(MACHINE_REGISTRY)
+    seen = np.zeros(len(machines), dtype=np.uint32)
+    while simulation_running:
+        SHARDS.check()
+        previous = FLEET_STATE.current()
+        records = []
+        for shard, (lo, hi) in enumerate(SHARDS.ranges):
+            rows = SHARDS.read_shard(shard)
+            for offset in np.flatnonzero(rows['samples'] != seen[lo:hi]):
+                row = rows[offset]
+                mid = machines[lo + offset]['id']
+                now = SIMULATION_CLOCK.datetime(float(row['sampled_at']))
+                vit = previous.get(mid).sample(*(round(float(row[vital]), decimals)
+                                                 for vital, decimals in zip(VITALS, VITAL_DECIMALS)),
+                                               now, SAMPLE_MODES[row['mode']])
+                if row['risk_level'] >= 0:
+                    vit.prediction = Prediction(
+                        int(row['failure_risk']),
+                        FAILURE_TYPES[row['failure_type']] if row['failure_type'] >= 0 else None,
+                        int(row['estimated_hours']),
+                        RISK_LEVELS[row['risk_level']],
+                        SHARDS.state.shards['model_version'][shard].decode() or None,
+                        now
+                    )
+                records.append(vit)
+            seen[lo:hi] = rows['samples']
+
+        if records:
+            published = _publish_samples(records)
+            TICK_PIPELINE.submit('log', published)
+            TICK_PIPELINE.submit('broadcast', published)
+        # Hand auto-shutdowns, PATCHed statuses, triggered episodes and model deploys / rollbacks to the shards
+        SHARDS.set_statuses([machine['status'] for machine in MACHINE_REGISTRY])
+        SHARDS.set_episodes({MACHINE_REGISTRY.position(mid): episode
+                             for mid, episode in EPISODES.upcoming(SIMULATION_CLOCK.now()).items() if mid in MACHINE_REGISTRY})
+        SHARDS.set_model_version(model_registry.active().version)
+        time.sleep(SHARD_POLL_INTERVAL)
+
+    # The next start (sharded or not) continues the walk where the shards left it
+    FLEET_SIMULATOR.values[:] = SHARDS.stop()
+    SHARDS = None
+
+def _log_stage(batch):
+    """Pipeline stage 3: append the batch's vitals to the log file"""
+    for vit in batch['vitals']:
+        # log per-machine vitals
+        try:
+            log_vitals_to_file({
+                'machine_id': vit.machine_id,
+                'machine_name': vit.machine_name,
+                'machine_type': vit.machine_type,
+                'temperature': vit.temperature,
+                'pressure': vit.pressure,
+                'vibration': vit.vibration,
+                'timestamp': vit.timestamp.isoformat(),
+                'prediction': vit.prediction.to_dict() if vit.prediction is not None else None
+            })
+        except Exception as e:
+            print(f"[Simulation Worker] Logging error: {e}")
+
+def _log_dropped(batch):
+    """The log queue was full: the batch's readings never reach the log file"""
+    vitals = batch['vitals']
+    if vitals:
+        print(f"[Simulation Worker] Log queue full, dropped {len(vitals)} readings "
+              f"({min(vit.timestamp for vit in vitals).isoformat()} .. {max(vit.timestamp for vit in vitals).isoformat()})")
+
+def _stream_entry(vit):
+    """One machine as it appears in stream messages"""
+    return {
+        'machine_id': vit.machine_id,
+        'machine_name': vit.machine_name,
+        'machine_type': vit.machine_type,
+        'vitals': {
+            'temperature': vit.temperature,
+            'pressure': vit.pressure,
+            'vibration': vit.vibration,
+            'timestamp': vit.timestamp.isoformat()
+        },
+        'prediction': vit.prediction.to_dict() if vit.prediction is not None else None
+    }
+
+# Latest vitals by machine id of broadcast batches dropped by a full queue; guarded by _dropped_lock
+_dropped_vitals = {}
+_dropped_lock = threading.Lock()
+
+def _broadcast_dropped(batch):
+    """The broadcast queue was full: carry the batch's vitals over to the next broadcast, sent as a keyframe"""
+    with _dropped_lock:
+        for vit in batch['vitals']:
+            _dropped_vitals[vit.machine_id] = vit
+    print(f"[Simulation Worker] Broadcast queue full, {len(batch['vitals'])} machines resync with the next keyframe")
+
+def _broadcast_stage(batch):
+    """Pipeline stage 4: hand the batch's changes to the connected stream clients"""
+    global _dropped_vitals
+    vitals = {vit.machine_id: vit for vit in batch['vitals']}
+    with _dropped_lock:
+        dropped, _dropped_vitals = _dropped_vitals, {}
+    for mid, vit in dropped.items():
+        # A dropped batch is newer than the ones queued before it
+        if mid not in vitals or vit.timestamp > vitals[mid].timestamp:
+            vitals[mid] = vit
+    entries = [_stream_entry(vit) for vit in vitals.values()]
+    # Encoded even with no client connected: the deltas are relative to the last published state,
+    # and a client that reconnects is replayed from the hub's backlog
+    timestamp = datetime.utcnow().isoformat()
+    with STREAM_HUB.lock:
+        if dropped:
+            STREAM_DELTAS.resync()
+        message = STREAM_DELTAS.update(entries, timestamp)
+        if message is not None:
+            STREAM_HUB.publish(message)
+        STREAM_FILTERS.update(timestamp)
+
+# (event id, keyframe frame for that id): rebuilt only when another event has been published
+_stream_keyframe = (None, None)
+
+def _stream_keyframe_frame(event_id):
+    """The stream state as of event_id as the first frame of a new client; called under STREAM_HUB.lock"""
+    global _stream_keyframe
+    cached, frame = _stream_keyframe
+    if cached != event_id:
+        frame = encode_event(STREAM_DELTAS.keyframe(), event_id or None)
+        _stream_keyframe = (event_id, frame)
+    return frame
+
+def _last_event_id():
+    """Last-Event-ID of a reconnecting EventSource (or ?last_event_id=), None if absent or invalid"""
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _release_machines(batch, error):
+    """A simulate / predict batch failed: put its machines back on the schedule"""
+    due_ids = batch['due_ids'] if isinstance(batch, dict) else batch
+    for mid in due_ids:
+        SCHEDULER.complete(mid, MACHINE_REGISTRY.get(mid)['status'])
+
+# simulate -> predict -> (log, broadcast), plus alert; a slow disk or SMTP server only backs up its
+# own stage, never the next batch of predictions. log drops (and reports) what doesn't fit, broadcast
+# folds dropped batches into its next keyframe, and alert's queue is unbounded: no alert is ever lost
+_log = PipelineStage('log', _log_stage, when_full='drop', on_drop=_log_dropped)
+_broadcast = PipelineStage('broadcast', _broadcast_stage, when_full='drop', on_drop=_broadcast_dropped)
+_predict = PipelineStage('predict', _predict_stage, downstream=[_log, _broadcast], on_error=_release_machines)
+_simulate = PipelineStage('simulate', _simulate_stage, downstream=[_predict], on_error=_release_machines)
+_alert = PipelineStage('alert', lambda shutdown: _send_shutdown_alert(*shutdown), maxsize=0)
+TICK_PIPELINE = Pipeline([_simulate, _predict, _log, _broadcast, _alert])
+
 @machine_bp.route('/vitals/stream', methods=['GET'])
 def stream_vitals():
-    """Server-Sent Events endpoint for real-time vitals streaming"""
+    """Server-Sent Events endpoint for real-time vitals streaming (keyframe, then deltas), optionally filtered"""
+    try:
+        stream_filter = StreamFilter.from_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    last_event_id = _last_event_id()
+
     def generate():
-        # Send initial connection message
-        yield f"data: {json.dumps({'type': 'connected', 'message': 'Connected to vitals stream'})}\n\n"
-        
-        # Create a local queue for this client
-        client_queue = queue.Queue()
-        
-        while True:
-            try:
-                # Wait for updates with timeout
-                try:
-                    update = vitals_update_queue.get(timeout=5)
-                    # Broadcast to all listeners
-                    yield f"data: {json.dumps({'type': 'update', 'data': update})}\n\n"
-                except queue.Empty:
-                    # Send heartbeat to keep connection alive
-                    yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': datetime.utcnow().isoformat()})}\n\n"
-            except GeneratorExit:
-                break
+        # Subscribe before sending anything so no update between the keyframe and the first get() is lost
+        if stream_filter is None:
+            subscription = STREAM_HUB.subscribe(_stream_keyframe_frame, last_event_id)
+        else:
+            subscription = STREAM_FILTERS.subscribe(stream_filter, last_event_id)
+        try:
+            yield CONNECTED_FRAME
+            while True:
+                # Frames are encoded once by the hub and shared by every client
+                frame = subscription.get(timeout=5)
+                # Send heartbeat to keep connection alive
+                yield frame if frame is not None else HEARTBEAT_FRAME
+        finally:
+            subscription.close()
     
     return Response(
         stream_with_context(generate()),
@@ -413,23 +593,60 @@ def stream_vitals():
         }
     )
 
+def _machine_history(machine_id, limit):
+    """Newest readings of a machine from its ring buffer, as history dicts"""
+    history = MACHINE_HISTORY.get(machine_id)
+    return history.records(limit) if history is not None else []
+
+def _current_vitals_data(machine_id, vitals):
+    """Body data of /machines/<id>/vitals/current"""
+    return {**vitals.to_dict(), 'history': _machine_history(machine_id, CURRENT_VITALS_HISTORY)}
+
+def _snapshot_response(path):
+    """(status, JSON body) of the snapshot endpoints on the asyncio server; None if it does not serve `path`"""
+    if path == '/vitals/current':
+        return 200, ('{"success": true, "data": ' + simulator.get_current_readings_json() + '}').encode()
+    parts = path.split('/')
+    # /machines/<machine_id>/vitals/current
+    if len(parts) == 5 and parts[1] == 'machines' and parts[3:] == ['vitals', 'current']:
+        vitals = FLEET_STATE.current().get(parts[2])
+        if not vitals:
+            return 404, json.dumps({'success': False, 'error': f'Machine {parts[2]} not found'}).encode()
+        return 200, json.dumps({'success': True, 'data': _current_vitals_data(parts[2], vitals)}).encode()
+    return None
+
+def _resolve_stream(query):
+    """
+    (hub, keyframe) of a filtered stream on the asyncio server, None for the whole fleet; ValueError if invalid.
+    Called on the server's worker threads, not its event loop: creating a channel takes STREAM_HUB.lock.
+    """
+    stream_filter = StreamFilter.from_args(MultiDict(query))
+    if stream_filter is None:
+        return None
+    channel = STREAM_FILTERS.channel(stream_filter)
+    return channel.hub, STREAM_FILTERS.keyframe(channel)
+
+# asyncio serving path for /vitals/stream and the snapshot endpoints, on ASYNC_STREAM_PORT (started by app.py);
+# fed by STREAM_HUB (and the filtered channels) like the Flask stream, but holds idle connections without a thread each
+ASYNC_STREAM = AsyncStreamServer(STREAM_HUB, _stream_keyframe_frame, _snapshot_response, origins=CORS_ORIGINS,
+                                 resolve=_resolve_stream)
+
 @machine_bp.route('/machines/<machine_id>/vitals/current', methods=['GET'])
 def get_machine_current_vitals(machine_id):
     """Get current vitals for a specific machine"""
     try:
-        with lock:
-            vitals = CURRENT_MACHINE_VITALS.get(machine_id)
-            
-            if not vitals:
-                return jsonify({
-                    'success': False,
-                    'error': f'Machine {machine_id} not found'
-                }), 404
-            
+        vitals = FLEET_STATE.current().get(machine_id)
+        
+        if not vitals:
             return jsonify({
-                'success': True,
-                'data': vitals
-            }), 200
+                'success': False,
+                'error': f'Machine {machine_id} not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': _current_vitals_data(machine_id, vitals)
+        }), 200
             
     except Exception as e:
         return jsonify({
@@ -443,38 +660,82 @@ def get_machine_vitals_history(machine_id):
     try:
         limit = request.args.get('limit', 50, type=int)
         
-        with lock:
-            vitals = CURRENT_MACHINE_VITALS.get(machine_id)
-            
-            if not vitals:
-                return jsonify({
-                    'success': False,
-                    'error': f'Machine {machine_id} not found'
-                }), 404
-            
-            history = vitals.get('history', [])
-            
+        vitals = FLEET_STATE.current().get(machine_id)
+        
+        if not vitals:
             return jsonify({
-                'success': True,
-                'data': history[-limit:],
-                'count': len(history[-limit:])
-            }), 200
-            
+                'success': False,
+                'error': f'Machine {machine_id} not found'
+            }), 404
+        
+        history = _machine_history(machine_id, limit)
+        
+        return jsonify({
+            'success': True,
+            'data': history,
+            'count': len(history)
+        }), 200
+
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@machine_bp.route('/vitals/current', methods=['GET'])
-def get_current_vitals():
-    """Get current machine vitals"""
+@machine_bp.route('/machines/<machine_id>/vitals/trigger-<mode>', methods=['POST'])
+def trigger_machine_episode(machine_id, mode):
+    """Script a caution / critical episode for one machine, starting now in simulated time"""
     try:
-        vitals = generate_vitals()
+        if MACHINE_REGISTRY.get(machine_id) is None:
+            return jsonify({
+                'success': False,
+                'error': f'Machine {machine_id} not found'
+            }), 404
+
+        data = request.get_json(silent=True) or {}
+        duration = data.get('duration', 180 if mode == 'critical' else 300)  # simulated seconds
+        episode = EPISODES.add(machine_id, mode, SIMULATION_CLOCK.now(), float(duration))
+
         return jsonify({
             'success': True,
-            'data': vitals
+            'message': f'{mode.capitalize()} episode triggered for machine {machine_id} for {duration} seconds',
+            'data': episode.to_dict()
         }), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@machine_bp.route('/machines/<machine_id>/vitals/reset-normal', methods=['POST'])
+def reset_machine_episodes(machine_id):
+    """Drop a machine's scripted episodes so it follows its random walk again"""
+    if MACHINE_REGISTRY.get(machine_id) is None:
+        return jsonify({
+            'success': False,
+            'error': f'Machine {machine_id} not found'
+        }), 404
+
+    EPISODES.clear(machine_id)
+    return jsonify({
+        'success': True,
+        'message': f'Machine {machine_id} reset to normal mode',
+        'mode': 'normal'
+    }), 200
+
+@machine_bp.route('/vitals/current', methods=['GET'])
+def get_current_vitals():
+    """Get current machine vitals"""
+    try:
+        # Serialized once per simulator tick; polling costs one string concatenation
+        return Response('{"success": true, "data": ' + simulator.get_current_readings_json() + '}',
+                        status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -521,12 +782,34 @@ def start_simulation():
     """Start the vitals simulation"""
     global simulation_running, simulation_thread
     
+    with lock:
+        running, previous = simulation_running, simulation_thread
+    # A worker stopped just before may still be sleeping out its tick or draining the pipeline;
+    # wait for it (off the lock, which its stages take) so two workers never run at once
+    if not running and previous is not None:
+        previous.join(SIMULATION_STOP_TIMEOUT)
+    
     with lock:
         if simulation_running:
             return jsonify({
                 'success': False,
                 'message': 'Simulation is already running'
             }), 400
+        if simulation_thread is not None and simulation_thread.is_alive():
+            return jsonify({
+                'success': False,
+                'message': 'Simulation is still stopping, try again shortly'
+            }), 400
+        
+        data = request.get_json(silent=True) or {}
+        if data.get('speed') is not None:
+            try:
+                SIMULATION_CLOCK.set_speed(float(data['speed']))
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
         
         simulation_running = True
         simulation_thread = threading.Thread(target=simulation_worker, daemon=True)
@@ -563,7 +846,65 @@ def get_simulation_status():
         'success': True,
         'data': {
             'running': simulation_running,
-            'log_file': LOG_FILE
+            'log_file': LOG_FILE,
+            'clock': {
+                'speed': SIMULATION_CLOCK.speed,
+                'fast_forward': SIMULATION_CLOCK.fast_forward,
+                'seed': SIMULATION_SEED,
+                'simulated_seconds': round(SIMULATION_CLOCK.now(), 3),
+                'simulated_time': SIMULATION_CLOCK.datetime().isoformat()
+            },
+            'scheduler': SCHEDULER.stats(),
+            'pipeline': TICK_PIPELINE.stats(),
+            'shards': SHARDS.stats() if SHARDS is not None else None,
+            'stream': STREAM_HUB.stats(),
+            'stream_encoder': STREAM_DELTAS.stats(),
+            'stream_filters': STREAM_FILTERS.stats(),
+            'async_stream': ASYNC_STREAM.stats()
+        }
+    }), 200
+
+@machine_bp.route('/simulation/shards/<int:shard>/restart', methods=['POST'])
+def restart_simulation_shard(shard):
+    """Restart one shard process of the sharded simulation; the other shards keep running"""
+    shards = SHARDS
+    if shards is None:
+        return jsonify({
+            'success': False,
+            'message': 'Sharded simulation is not running'
+        }), 400
+    try:
+        shards.restart(shard)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except RuntimeError as e:
+        # The simulation stopped (and freed the shards) while this request was waiting
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    return jsonify({
+        'success': True,
+        'message': f'Shard {shard} restarted',
+        'data': shards.stats()[shard]
+    }), 200
+
+@machine_bp.route('/locks/stats', methods=['GET'])
+def get_lock_stats():
+    """Wait and hold times of the fleet lock, plus the age of the published fleet snapshot"""
+    snapshot = FLEET_STATE.current()
+    return jsonify({
+        'success': True,
+        'data': {
+            'fleet_lock': lock.stats(),
+            'snapshot': {
+                'tick': snapshot.tick,
+                'published_at': snapshot.published_at,
+                'machines': len(snapshot.machines)
+            }
         }
     }), 200
 
@@ -633,17 +974,7 @@ def trigger_critical_mode():
 def reset_to_normal():
     """Reset sensors to normal mode"""
     try:
-        simulator.forced_mode = None
-        simulator.forced_mode_start_time = None
-        simulator.forced_mode_duration = 0
-        simulator.simulation_mode = "normal"
-        
-        # Reset values to normal range
-        simulator.current_values = {
-            'temperature': 45.0,
-            'pressure': 100.0,
-            'vibration': 1.0
-        }
+        simulator.reset_normal_mode()
         
         return jsonify({
             'success': True,
@@ -657,6 +988,24 @@ def reset_to_normal():
             'error': str(e)
         }), 500
 
+@machine_bp.route('/vitals/reset-values', methods=['POST'])
+def reset_sensor_values():
+    """Put the sensors back at their starting values"""
+    try:
+        simulator.reset_values()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Sensors reset to their starting values',
+            'readings': simulator.get_current_readings()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @machine_bp.route('/vitals/ranges', methods=['GET'])
 def get_sensor_ranges():
     """Get defined sensor ranges"""
@@ -692,7 +1041,7 @@ def get_simulation_mode_status():
                 'current_mode': simulator.forced_mode or simulator.simulation_mode,
                 'forced_mode': simulator.forced_mode,
                 'mode_remaining_seconds': (
-                    max(0, simulator.forced_mode_duration - (time.time() - simulator.forced_mode_start_time))
+                    max(0, simulator.forced_mode_duration - (simulator.clock() - simulator.forced_mode_start_time))
                     if simulator.forced_mode_start_time else 0
                 ),
                 'current_readings': simulator.get_current_readings()
@@ -705,163 +1054,103 @@ def get_simulation_mode_status():
             'error': str(e)
         }), 500
 
-# Define the 4 specific mining machines with their failure patterns
-MINING_MACHINES = [
-    {
-        'id': '1',
-        'name': 'Haul Truck HT-001',
-        'type': 'Haul Truck',
-        'status': 'online',
-        'location': 'Pit Area A',
-        'description': 'Used for transporting ore and waste',
-        'common_failures': ['engine_breakdown', 'hydraulic_leak', 'tire_wear', 'transmission_fault'],
-        'failure_descriptions': {
-            'engine_breakdown': 'Engine mechanical failure or overheating',
-            'hydraulic_leak': 'Hydraulic system pressure loss',
-            'tire_wear': 'Excessive tire wear requiring replacement',
-            'transmission_fault': 'Transmission system malfunction'
-        }
-    },
-    {
-        'id': '2',
-        'name': 'Drill Rig DR-002',
-        'type': 'Drill Rig',
-        'status': 'online',
-        'location': 'Blast Zone B',
-        'description': 'Essential for drilling blast holes',
-        'common_failures': ['drill_bit_wear', 'hydraulic_system_failure', 'motor_fault'],
-        'failure_descriptions': {
-            'drill_bit_wear': 'Drill bit requires replacement due to wear',
-            'hydraulic_system_failure': 'Hydraulic system malfunction',
-            'motor_fault': 'Drive motor electrical or mechanical fault'
-        }
-    },
-    {
-        'id': '3',
-        'name': 'Shovel EX-003',
-        'type': 'Shovel/Excavator',
-        'status': 'online',
-        'location': 'Loading Area C',
-        'description': 'Used for loading ore into haul trucks',
-        'common_failures': ['hydraulic_pump_failure', 'bucket_arm_wear', 'electrical_issue'],
-        'failure_descriptions': {
-            'hydraulic_pump_failure': 'Main hydraulic pump malfunction',
-            'bucket_arm_wear': 'Bucket or arm structural wear',
-            'electrical_issue': 'Electrical system or control malfunction'
-        }
-    },
-    {
-        'id': '4',
-        'name': 'Crusher CR-004',
-        'type': 'Crusher',
-        'status': 'online',
-        'location': 'Processing Plant D',
-        'description': 'Used to break down mined ore',
-        'common_failures': ['bearing_failure', 'liner_wear', 'motor_overheating', 'conveyor_jam'],
-        'failure_descriptions': {
-            'bearing_failure': 'Main bearing mechanical failure',
-            'liner_wear': 'Crushing liner wear requiring replacement',
-            'motor_overheating': 'Drive motor overheating',
-            'conveyor_jam': 'Material jam in conveyor system'
-        }
-    }
-]
-
 @machine_bp.route('/machines', methods=['GET'])
 def get_mining_machines():
-    """Get all 4 mining machines with current vitals and failure predictions"""
+    """Get mining machines with current vitals and failure predictions, optionally filtered by ?type=&location=&status="""
     try:
+        filters = {field: request.args[field] for field in INDEXED_FIELDS if request.args.get(field)}
         machines_with_data = []
-        with lock:
-            for machine in MINING_MACHINES:
-                stored = CURRENT_MACHINE_VITALS.get(machine['id'])
+        snapshot = FLEET_STATE.current()
+        for machine in MACHINE_REGISTRY.find(**filters):
+            stored = snapshot.get(machine['id'])
+            
+            if stored:
+                machine_vitals = {
+                    'temperature': stored.temperature,
+                    'pressure': stored.pressure,
+                    'vibration': stored.vibration,
+                    'timestamp': stored.timestamp.isoformat()
+                }
                 
-                if stored:
-                    machine_vitals = {
-                        'temperature': stored.get('temperature', DATASET_STATS['temperature']['mean']),
-                        'pressure': stored.get('pressure', DATASET_STATS['pressure']['mean']),
-                        'vibration': stored.get('vibration', DATASET_STATS['vibration']['mean']),
-                        'timestamp': stored.get('timestamp')
-                    }
-                    
-                    # Use stored prediction if available
-                    prediction = stored.get('prediction')
-                else:
-                    # fallback: derive from global simulator with small offsets
-                    current_vitals = simulator.get_current_readings()
-                    machine_vitals = {
-                        'temperature': _extract_sensor_value(current_vitals, 'temperature', DATASET_STATS['temperature']['mean']) + random.uniform(-5, 5),
-                        'pressure': _extract_sensor_value(current_vitals, 'pressure', DATASET_STATS['pressure']['mean']) + random.uniform(-8, 8),
-                        'vibration': _extract_sensor_value(current_vitals, 'vibration', DATASET_STATS['vibration']['mean']) + random.uniform(-0.2, 0.2),
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-                    prediction = None
-
-                # Calculate health status based on vitals
-                health_status = 'excellent'
-                if (machine_vitals['temperature'] > 95 or 
-                    machine_vitals['pressure'] > 180 or 
-                    machine_vitals['vibration'] > 4):
-                    health_status = 'critical'
-                elif (machine_vitals['temperature'] > 85 or 
-                      machine_vitals['pressure'] > 150 or 
-                      machine_vitals['vibration'] > 2):
-                    health_status = 'warning'
-                elif (machine_vitals['temperature'] > 70 or 
-                      machine_vitals['pressure'] > 120 or 
-                      machine_vitals['vibration'] > 1.5):
-                    health_status = 'good'
-
-                if prediction:
-                    # Use ML prediction
-                    failure_risk = prediction.get('failure_risk', 0)
-                    predicted_failure = prediction.get('predicted_failure_type', 'unknown')
-                    estimated_hours = prediction.get('estimated_hours', 'N/A')
-                    maintenance_priority = prediction.get('risk_level', 'low')
-                    
-                    if maintenance_priority == 'critical':
-                        recommended_action = 'Shut down and perform immediate inspection'
-                    elif maintenance_priority == 'high':
-                        recommended_action = 'Schedule maintenance in next 24 hours'
-                    elif maintenance_priority == 'medium':
-                        recommended_action = 'Monitor closely and schedule preventive maintenance'
-                    else:
-                        recommended_action = 'Continue normal operations'
-                    
-                    machine_data = {
-                        **machine,
-                        'health_status': health_status,
-                        'vitals': machine_vitals,
-                        'operating_hours': random.randint(1500, 4000),
-                        'efficiency': random.randint(70, 95),
-                        'last_maintenance': '2024-10-15',
-                        'next_maintenance': '2024-12-15',
-                        'failure_prediction': {
-                            'risk_level': failure_risk,
-                            'predicted_failure_type': predicted_failure,
-                            'failure_description': machine['failure_descriptions'].get(predicted_failure, ''),
-                            'estimated_time_to_failure': f"{estimated_hours} hours",
-                            'confidence': failure_risk,
-                            'maintenance_priority': maintenance_priority,
-                            'recommended_action': recommended_action,
-                            'last_updated': prediction.get('timestamp')
-                        }
-                    }
+                # Use stored prediction if available
+                prediction = stored.prediction
+            else:
+                # fallback: derive from global simulator with small offsets
+                current_vitals = simulator.get_current_readings()
+                machine_vitals = {
+                    'temperature': _extract_sensor_value(current_vitals, 'temperature', DATASET_STATS['temperature']['mean']) + random.uniform(-5, 5),
+                    'pressure': _extract_sensor_value(current_vitals, 'pressure', DATASET_STATS['pressure']['mean']) + random.uniform(-8, 8),
+                    'vibration': _extract_sensor_value(current_vitals, 'vibration', DATASET_STATS['vibration']['mean']) + random.uniform(-0.2, 0.2),
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+                prediction = None
+
+            # Calculate health status based on vitals
+            health_status = 'excellent'
+            if (machine_vitals['temperature'] > 95 or 
+                machine_vitals['pressure'] > 180 or 
+                machine_vitals['vibration'] > 4):
+                health_status = 'critical'
+            elif (machine_vitals['temperature'] > 85 or 
+                  machine_vitals['pressure'] > 150 or 
+                  machine_vitals['vibration'] > 2):
+                health_status = 'warning'
+            elif (machine_vitals['temperature'] > 70 or 
+                  machine_vitals['pressure'] > 120 or 
+                  machine_vitals['vibration'] > 1.5):
+                health_status = 'good'
+
+            if prediction:
+                # Use ML prediction
+                failure_risk = prediction.failure_risk
+                predicted_failure = prediction.failure_type or 'unknown'
+                estimated_hours = prediction.estimated_hours if prediction.estimated_hours is not None else 'N/A'
+                maintenance_priority = prediction.risk_level
+                
+                if maintenance_priority == 'critical':
+                    recommended_action = 'Shut down and perform immediate inspection'
+                elif maintenance_priority == 'high':
+                    recommended_action = 'Schedule maintenance in next 24 hours'
+                elif maintenance_priority == 'medium':
+                    recommended_action = 'Monitor closely and schedule preventive maintenance'
                 else:
-                    # Fallback without prediction
-                    machine_data = {
-                        **machine,
-                        'health_status': health_status,
-                        'vitals': machine_vitals,
-                        'operating_hours': random.randint(1500, 4000),
-                        'efficiency': random.randint(70, 95),
-                        'last_maintenance': '2024-10-15',
-                        'next_maintenance': '2024-12-15',
-                        'failure_prediction': None
+                    recommended_action = 'Continue normal operations'
+                
+                machine_data = {
+                    **machine,
+                    'health_status': health_status,
+                    'vitals': machine_vitals,
+                    'operating_hours': random.randint(1500, 4000),
+                    'efficiency': random.randint(70, 95),
+                    'last_maintenance': '2024-10-15',
+                    'next_maintenance': '2024-12-15',
+                    'failure_prediction': {
+                        'risk_level': failure_risk,
+                        'predicted_failure_type': predicted_failure,
+                        'failure_description': machine['failure_descriptions'].get(predicted_failure, ''),
+                        'estimated_time_to_failure': f"{estimated_hours} hours",
+                        'confidence': failure_risk,
+                        'maintenance_priority': maintenance_priority,
+                        'recommended_action': recommended_action,
+                        'model_version': prediction.model_version,
+                        'last_updated': prediction.timestamp.isoformat() if prediction.timestamp else None
                     }
+                }
+            else:
+                # Fallback without prediction
+                machine_data = {
+                    **machine,
+                    'health_status': health_status,
+                    'vitals': machine_vitals,
+                    'operating_hours': random.randint(1500, 4000),
+                    'efficiency': random.randint(70, 95),
+                    'last_maintenance': '2024-10-15',
+                    'next_maintenance': '2024-12-15',
+                    'failure_prediction': None
+                }
+
+            machines_with_data.append(machine_data)
 
-                machines_with_data.append(machine_data)
-        
         return jsonify({
             'success': True,
             'data': machines_with_data,
@@ -878,32 +1167,32 @@ def get_mining_machines():
 def get_machine_details(machine_id):
     """Get detailed information for a specific machine"""
     try:
-        machine = next((m for m in MINING_MACHINES if m['id'] == machine_id), None)
+        machine = MACHINE_REGISTRY.get(machine_id)
         if not machine:
             return jsonify({
                 'success': False,
                 'error': 'Machine not found'
             }), 404
         
-        # Use the latest in-memory vitals if available (kept updated by worker)
-        with lock:
-            stored = CURRENT_MACHINE_VITALS.get(machine_id)
-            if stored:
-                machine_vitals = {
-                    'temperature': stored.get('temperature'),
-                    'pressure': stored.get('pressure'),
-                    'vibration': stored.get('vibration'),
-                    'timestamp': stored.get('timestamp')
-                }
-            else:
-                # fallback to simulator-based values
-                current_vitals = simulator.get_current_readings()
-                machine_vitals = {
-                    'temperature': _extract_sensor_value(current_vitals, 'temperature', DATASET_STATS['temperature']['mean']) + random.uniform(-5, 5),
-                    'pressure': _extract_sensor_value(current_vitals, 'pressure', DATASET_STATS['pressure']['mean']) + random.uniform(-8, 8),
-                    'vibration': _extract_sensor_value(current_vitals, 'vibration', DATASET_STATS['vibration']['mean']) + random.uniform(-0.2, 0.2)
-                }
-        
+        # Use the latest published vitals if available (kept updated by worker)
+        snapshot = FLEET_STATE.current()
+        stored = snapshot.get(machine_id)
+        if stored:
+            machine_vitals = {
+                'temperature': stored.temperature,
+                'pressure': stored.pressure,
+                'vibration': stored.vibration,
+                'timestamp': stored.timestamp.isoformat()
+            }
+        else:
+            # fallback to simulator-based values
+            current_vitals = simulator.get_current_readings()
+            machine_vitals = {
+                'temperature': _extract_sensor_value(current_vitals, 'temperature', DATASET_STATS['temperature']['mean']) + random.uniform(-5, 5),
+                'pressure': _extract_sensor_value(current_vitals, 'pressure', DATASET_STATS['pressure']['mean']) + random.uniform(-8, 8),
+                'vibration': _extract_sensor_value(current_vitals, 'vibration', DATASET_STATS['vibration']['mean']) + random.uniform(-0.2, 0.2)
+            }
+
         try:
             # Build 3-row synthetic history as fallback and prefer real log history
             sample_history = []
@@ -953,7 +1242,8 @@ def get_machine_details(machine_id):
                     'estimated_time_to_failure': f"{prediction_result.get('most_likely_failure_estimated_hours', 'N/A')} hours",
                     'confidence': int(prediction_result.get('most_likely_failure_probability', 0)*100),
                     'maintenance_priority': maintenance_priority,
-                    'recommended_action': recommended_action
+                    'recommended_action': recommended_action,
+                    'model_version': prediction_result.get('model_version')
                 }
             }
         except Exception as e:
@@ -1002,8 +1292,7 @@ def update_machine_status(machine_id):
                 'error': 'Invalid status. Must be one of: online, offline, maintenance'
             }), 400
         
-        # Find the machine in MINING_MACHINES
-        machine = next((m for m in MINING_MACHINES if m['id'] == machine_id), None)
+        machine = MACHINE_REGISTRY.get(machine_id)
         if not machine:
             return jsonify({
                 'success': False,
@@ -1012,11 +1301,13 @@ def update_machine_status(machine_id):
         
         # Update the status
         with lock:
-            machine['status'] = new_status
+            MACHINE_REGISTRY.set_status(machine_id, new_status)
             
-            # Also update in CURRENT_MACHINE_VITALS if it exists
-            if machine_id in CURRENT_MACHINE_VITALS:
-                CURRENT_MACHINE_VITALS[machine_id]['status'] = new_status
+            # Also update the published vitals (copy-on-write) if the machine has any
+            FLEET_STATE.replace(machine_id, status=new_status)
+
+            # Suspend, resume or re-pace its sampling
+            SCHEDULER.update(machine_id, new_status)
         
         return jsonify({
             'success': True,
@@ -1,7 +1,8 @@
 # backend/routes/prediction_routes.py
 
 from flask import Blueprint, request, jsonify
-from services.prediction_service import get_prediction, get_machine_specific_prediction
+from services.prediction_service import get_prediction, get_machine_specific_prediction, get_batch_prediction, prediction_cache, inference_stats
+from ml.model_registry import model_registry
 from flask_cors import CORS # Make sure you installed Flask-CORS
 
 prediction_bp = Blueprint('prediction_bp', __name__)
@@ -62,4 +63,76 @@ def predict_machine_specific(machine_type):
         return jsonify({"error": str(re)}), 500
     except Exception as e:
         # Catch any other unexpected errors
-        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
+
+@prediction_bp.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many machine windows in one call"""
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    raw_data = request.get_json()
+
+    if not raw_data:
+        return jsonify({"error": "No data provided"}), 400
+
+    # Accept either a bare list of windows or {"windows": [...]}
+    windows = raw_data.get('windows') if isinstance(raw_data, dict) else raw_data
+
+    try:
+        results = get_batch_prediction(windows)
+        failed = sum(1 for r in results if 'error' in r)
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "failed": failed
+        }), 200
+    except ValueError as ve:
+        # Handle batch-level validation errors
+        return jsonify({"error": str(ve)}), 400
+    except RuntimeError as re:
+        # Handle general prediction errors
+        return jsonify({"error": str(re)}), 500
+    except Exception as e:
+        # Catch any other unexpected errors
+        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
+
+@prediction_bp.route('/cache/stats', methods=['GET'])
+def prediction_cache_stats():
+    """Hit/miss counters and occupancy of the prediction cache"""
+    return jsonify(prediction_cache.stats()), 200
+
+@prediction_bp.route('/inference/stats', methods=['GET'])
+def inference_batcher_stats():
+    """Queue depth and batch-size histograms of the micro-batching scheduler"""
+    return jsonify(inference_stats()), 200
+
+@prediction_bp.route('/models', methods=['GET'])
+def model_status():
+    """Active and previous model versions, versions on disk and deployment progress"""
+    try:
+        return jsonify(model_registry.status()), 200
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
+
+@prediction_bp.route('/models/<version>/deploy', methods=['POST'])
+def deploy_model(version):
+    """Load, validate and warm a model version in the background, then swap it in"""
+    try:
+        status = model_registry.deploy(version)
+        return jsonify(status), 202
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
+
+@prediction_bp.route('/models/rollback', methods=['POST'])
+def rollback_model():
+    """Swap back to the previously active model version"""
+    try:
+        restored = model_registry.rollback()
+        return jsonify({"active": restored.version}), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
@@ -0,0 +1,461 @@
+# backend/services/async_stream_server.py
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from services.stream_hub import CONNECTED_FRAME, HEARTBEAT_FRAME, frame_event_id
+
+# Port of the asyncio server for the streaming and snapshot endpoints; 0 = not started
+ASYNC_STREAM_PORT = int(os.getenv('ASYNC_STREAM_PORT', '0'))
+ASYNC_STREAM_HOST = os.getenv('ASYNC_STREAM_HOST', '127.0.0.1')
+
+# Bytes a client may have unsent in its socket buffer before it is resynchronized
+ASYNC_STREAM_WRITE_BUFFER = int(os.getenv('ASYNC_STREAM_WRITE_BUFFER', str(1 << 20)))
+
+HEARTBEAT_SECONDS = 5.0
+REQUEST_TIMEOUT = 10.0
+
+# Threads for the hub work the event loop must not wait on (catch-up, resolving and opening a filtered
+# stream take the hub's lock, which the broadcast stage holds for a whole tick; a keyframe may be encoded)
+OFFLOAD_WORKERS = 2
+
+SSE_HEADERS = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: text/event-stream\r\n'
+    b'Cache-Control: no-cache\r\n'
+    b'X-Accel-Buffering: no\r\n'
+    b'Connection: keep-alive\r\n'
+)
+
+REASONS = {200: b'OK', 400: b'Bad Request', 404: b'Not Found', 405: b'Method Not Allowed', 500: b'Internal Server Error'}
+
+
+class _Feed:
+    """A hub the server streams from: the bridge's subscription to it, and its clients"""
+    __slots__ = ('hub', 'keyframe', 'subscription', 'opening', 'clients', 'closed', 'last_id')
+
+    def __init__(self, hub, keyframe):
+        self.hub = hub
+        self.keyframe = keyframe
+        self.subscription = None
+        # Future of the subscription while a worker thread takes it
+        self.opening = None
+        self.clients = set()
+        self.closed = False
+        # Id of the last frame fanned out to the clients
+        self.last_id = 0
+
+
+class _Client:
+    __slots__ = ('feed', 'transport', 'last_id', 'resync', 'catching_up', 'delivered', 'dropped', 'resyncs',
+                 'connected_at')
+
+    def __init__(self, feed, transport):
+        self.feed = feed
+        self.transport = transport
+        self.last_id = 0
+        self.resync = False
+        # Frames are not written while its catch-up runs; the catch-up covers them
+        self.catching_up = True
+        self.delivered = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.connected_at = time.time()
+
+
+class AsyncStreamServer:
+    """
+    asyncio serving path for the vitals stream and the snapshot endpoints.
+
+    A minimal HTTP/1.1 server (asyncio.start_server) on its own event loop thread. Stream clients
+    cost a socket and a small record each - no thread, no per-connection timer: one bridge
+    thread, for every hub streamed from, takes their frames (the same encoded frames the Flask
+    stream sends) and hands them to the loop in batches, the loop writes each frame to that
+    hub's clients' transports, and a single loop-wide timer sends the shared heartbeat frame.
+    `resolve(query)` may map a stream request's query to another (hub, keyframe) - a filtered
+    stream - or None for the default one; it raises ValueError for a 400. A filtered hub is
+    subscribed to while it has clients. Clients get the same keyframe / Last-Event-ID replay as
+    the Flask route via hub.catch_up(). Everything that takes a hub's lock (resolve, subscribing,
+    catch-up) runs on a worker thread, so the loop never waits on it. A client whose socket
+    buffer holds more than `write_buffer` unsent bytes skips frames until it has drained, then
+    resyncs.
+
+    `snapshot(path)` returns (status, JSON body bytes) for the snapshot endpoints it serves
+    (path without the prefix), or None for a 404.
+    """
+
+    def __init__(self, hub, keyframe, snapshot=None, host: str = ASYNC_STREAM_HOST, port: int = ASYNC_STREAM_PORT,
+                 prefix: str = '/machine', stream_path: str = '/vitals/stream', origins=(),
+                 write_buffer: int = ASYNC_STREAM_WRITE_BUFFER, resolve=None):
+        self.hub = hub
+        self.keyframe = keyframe
+        self.snapshot = snapshot
+        self.resolve = resolve
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self.stream_path = stream_path
+        self.origins = set(origins)
+        self.write_buffer = write_buffer
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._bridge = None
+        # Feeds with frames waiting; None stops the bridge
+        self._ready = queue.SimpleQueue()
+        self._feed = None
+        self._feeds = {}
+        self._clients = set()
+        self._tasks = set()
+        self._executor = None
+        self._started = threading.Event()
+        self._error = None
+        self._stopping = False
+        self.connections = 0
+        self.requests = 0
+        self.snapshots = 0
+        self.frames = 0
+        self.batches = 0
+        self.closed_dropped = 0
+        self.closed_resyncs = 0
+
+    def start(self):
+        """Serve from a background thread; returns once the socket is listening"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._error = None
+        self._started.clear()
+        self._executor = ThreadPoolExecutor(OFFLOAD_WORKERS, thread_name_prefix='async-stream-worker')
+        self._thread = threading.Thread(target=self._run, daemon=True, name='async-stream')
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            self._executor.shutdown()
+            raise self._error
+        self._ready = queue.SimpleQueue()
+        self._bridge = threading.Thread(target=self._run_bridge, daemon=True, name='async-stream-bridge')
+        self._bridge.start()
+        self._feed = self._feeds[self.hub] = _Feed(self.hub, self.keyframe)
+        self._subscribe_feed(self._feed)
+        print(f"[Async Stream] Serving {self.prefix}{self.stream_path} on http://{self.host}:{self.port}")
+
+    def stop(self):
+        self._stopping = True
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._shutdown)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._ready.put(None)
+        if self._bridge is not None:
+            self._bridge.join(timeout=2)
+        for feed in list(self._feeds.values()):
+            feed.closed = True
+            if feed.subscription is not None:
+                feed.subscription.close()
+        self._feeds.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = self._bridge = self._feed = self._executor = None
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            # e.g. the port is taken; start() re-raises it
+            self._error = e
+            self._started.set()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        # Port 0 binds an ephemeral port (tests, load test)
+        self.port = self._server.sockets[0].getsockname()[1]
+        heartbeat = asyncio.create_task(self._heartbeat())
+        self._started.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+        heartbeat.cancel()
+
+    def _shutdown(self):
+        for client in list(self._clients):
+            client.transport.close()
+        self._server.close()
+
+    def _subscribe_feed(self, feed: _Feed):
+        """Subscribe the bridge to a feed's hub (off the loop: takes the hub's lock)"""
+        # Starts at the current event (clients skip older frames by id); if the loop falls so far
+        # behind that the bridge overflows, it resyncs to a keyframe, which the clients then get
+        feed.subscription = feed.hub.subscribe(feed.keyframe, last_event_id=feed.hub.last_event_id,
+                                               notify=lambda subscription: self._ready.put(feed))
+        feed.last_id = feed.subscription.last_id
+
+    async def _open_feed(self, query) -> _Feed:
+        """The feed a stream request's query resolves to, subscribed on first use; ValueError if invalid"""
+        if self.resolve is None:
+            return self._feed
+        target = await self.loop.run_in_executor(self._executor, self.resolve, query)
+        if target is None:
+            return self._feed
+        feed = self._feeds.get(target[0])
+        if feed is None:
+            feed = self._feeds[target[0]] = _Feed(*target)
+            feed.opening = self.loop.run_in_executor(self._executor, self._subscribe_feed, feed)
+        if feed.opening is None:
+            return feed
+        try:
+            # Shielded: another client waiting on the same feed must not cancel it
+            await asyncio.shield(feed.opening)
+        except Exception:
+            if self._feeds.get(feed.hub) is feed and not feed.clients:
+                self._close_feed(feed)
+            raise
+        return feed
+
+    def _close_feed(self, feed: _Feed):
+        feed.closed = True
+        if self._feeds.get(feed.hub) is feed:
+            del self._feeds[feed.hub]
+        if feed.subscription is not None:
+            try:
+                self._executor.submit(feed.subscription.close)
+            except RuntimeError:
+                # Shutting down: the worker threads are gone
+                feed.subscription.close()
+
+    def _run_bridge(self):
+        """
+        Hubs -> event loop, one thread for every feed: a subscription names its feed on `_ready`
+        when frames arrive, and each round drains the feeds that are ready and hands their frames
+        to the loop with one call_soon_threadsafe - not one per frame, feed or client.
+        """
+        ready = self._ready
+        while True:
+            feeds = [ready.get()]
+            try:
+                while True:
+                    feeds.append(ready.get_nowait())
+            except queue.Empty:
+                pass
+            batches = []
+            for feed in feeds:
+                if feed is None:
+                    return
+                if feed.closed:
+                    continue
+                frames = []
+                frame = feed.subscription.get(timeout=0)
+                while frame is not None:
+                    frames.append(frame)
+                    frame = feed.subscription.get(timeout=0)
+                if frames:
+                    batches.append((feed, frames))
+            if batches:
+                try:
+                    self.loop.call_soon_threadsafe(self._fan_out, batches)
+                except RuntimeError:
+                    # Loop already closed
+                    return
+
+    def _fan_out(self, batches):
+        self.batches += 1
+        for feed, frames in batches:
+            if feed.closed:
+                continue
+            for frame in frames:
+                event_id = frame_event_id(frame)
+                if event_id is not None and event_id > feed.last_id:
+                    feed.last_id = event_id
+                self.frames += 1
+                for client in tuple(feed.clients):
+                    self._deliver(client, frame, event_id)
+
+    def _deliver(self, client, frame, event_id):
+        transport = client.transport
+        if transport.is_closing() or client.catching_up:
+            return
+        if client.resync:
+            if transport.get_write_buffer_size() > self.write_buffer:
+                return
+            # The catch-up brings it past this frame too (it was published before it)
+            client.resync = False
+            client.resyncs += 1
+            client.catching_up = True
+            task = self.loop.create_task(self._catch_up(client, client.last_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        if event_id is not None:
+            if event_id <= client.last_id:
+                return
+            if transport.get_write_buffer_size() > self.write_buffer:
+                client.resync = True
+                client.dropped += 1
+                return
+            client.last_id = event_id
+        transport.write(frame)
+        client.delivered += 1
+
+    async def _catch_up(self, client, last_event_id):
+        """
+        Write a client the frames hub.catch_up() brings it up to date with, taken on a worker
+        thread. Frames fanned out meanwhile were skipped (catching_up), so it goes round again -
+        a backlog replay of just those - until it is level with what the loop has sent.
+        """
+        feed = client.feed
+        transport = client.transport
+        try:
+            while not transport.is_closing():
+                frames, event_id = await self.loop.run_in_executor(
+                    self._executor, feed.hub.catch_up, feed.keyframe, last_event_id)
+                if transport.is_closing():
+                    return
+                transport.writelines(frames)
+                client.delivered += len(frames)
+                client.last_id = last_event_id = event_id
+                if feed.last_id <= event_id:
+                    break
+        except Exception as e:
+            print(f"[Async Stream] Catch-up failed: {e}")
+            transport.close()
+        finally:
+            client.catching_up = False
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            for client in tuple(self._clients):
+                if client.resync:
+                    # Also picks up a client that fell behind right before the stream went quiet
+                    self._deliver(client, HEARTBEAT_FRAME, None)
+                elif not client.transport.is_closing():
+                    client.transport.write(HEARTBEAT_FRAME)
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return request_line.decode('latin-1').split(), headers
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            try:
+                request, headers = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError):
+                return
+            if len(request) != 3:
+                self._respond(writer, 400, {'success': False, 'error': 'Bad request'})
+                return
+            method, target, _ = request
+            self.requests += 1
+            url = urlsplit(target)
+            path = url.path[len(self.prefix):] if url.path.startswith(self.prefix) else None
+            cors = self._cors(headers)
+            if method == 'OPTIONS':
+                self._respond(writer, 200, None, cors + b'Access-Control-Allow-Headers: Last-Event-ID\r\n')
+                return
+            if method != 'GET':
+                self._respond(writer, 405, {'success': False, 'error': 'Method not allowed'}, cors)
+                return
+            if path == self.stream_path:
+                await self._stream(reader, writer, headers, parse_qs(url.query), cors)
+                return
+            response = None
+            if path is not None and self.snapshot is not None:
+                try:
+                    response = self.snapshot(path)
+                except Exception as e:
+                    response = 500, json.dumps({'success': False, 'error': str(e)}).encode()
+            if response is None:
+                response = 404, json.dumps({'success': False, 'error': 'Not found'}).encode()
+            self.snapshots += 1
+            self._respond(writer, response[0], response[1], cors)
+        finally:
+            writer.close()
+
+    async def _stream(self, reader, writer, headers, query, cors):
+        try:
+            feed = await self._open_feed(query)
+            while feed.closed:
+                # Its last client left while this one waited for it to open
+                feed = await self._open_feed(query)
+        except ValueError as e:
+            self._respond(writer, 400, {'success': False, 'error': str(e)}, cors)
+            return
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id', [None])[0]
+        try:
+            last_event_id = int(last_event_id) if last_event_id is not None else None
+        except ValueError:
+            last_event_id = None
+        transport = writer.transport
+        transport.write(SSE_HEADERS + cors + b'\r\n' + CONNECTED_FRAME)
+        client = _Client(feed, transport)
+        feed.clients.add(client)
+        self._clients.add(client)
+        try:
+            await self._catch_up(client, last_event_id)
+            # Nothing more is read from a stream client; EOF means it went away
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            feed.clients.discard(client)
+            if feed is not self._feed and not feed.clients:
+                self._close_feed(feed)
+            self.closed_dropped += client.dropped
+            self.closed_resyncs += client.resyncs
+
+    def _cors(self, headers) -> bytes:
+        origin = headers.get('origin')
+        if origin is not None and origin in self.origins:
+            return b'Access-Control-Allow-Origin: ' + origin.encode('latin-1') + b'\r\nVary: Origin\r\n'
+        return b''
+
+    def _respond(self, writer, status: int, body, extra_headers: bytes = b''):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        body = body or b''
+        writer.write(
+            b'HTTP/1.1 %d %s\r\n' % (status, REASONS.get(status, b'')) +
+            b'Content-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n' % len(body) +
+            extra_headers + b'\r\n' + body
+        )
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> dict:
+        clients = tuple(self._clients)
+        return {
+            'host': self.host,
+            'port': self.port,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'stream_clients': len(clients),
+            'feeds': len(self._feeds),
+            'connections': self.connections,
+            'requests': self.requests,
+            'snapshots': self.snapshots,
+            'frames': self.frames,
+            'batches': self.batches,
+            'slow_clients': sum(1 for c in clients if c.resync),
+            'dropped': self.closed_dropped + sum(c.dropped for c in clients),
+            'resyncs': self.closed_resyncs + sum(c.resyncs for c in clients),
+            'write_buffer_bytes': sum(c.transport.get_write_buffer_size() for c in clients)
+        }
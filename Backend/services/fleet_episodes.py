@@ -0,0 +1,133 @@
+# backend/services/fleet_episodes.py
+
+import threading
+import numpy as np
+from services.fleet_simulator import VITALS, VITAL_DECIMALS
+from services.sensor_simulation import simulator
+
+EPISODE_MODES = ['caution', 'critical']
+
+
+def episode_band(mode: str, vital: str) -> tuple:
+    """(low, high) readings of a vital during an episode - the SensorSimulator caution / critical range"""
+    ranges = simulator.sensor_ranges[vital]
+    if mode == 'caution':
+        return ranges.caution_min, ranges.caution_max
+    return ranges.critical_min, ranges.critical_max
+
+
+class Episode:
+    """One scripted caution / critical period of a machine, in simulated seconds"""
+
+    __slots__ = ('machine_id', 'mode', 'start', 'end')
+
+    def __init__(self, machine_id, mode: str, start: float, duration: float):
+        if mode not in EPISODE_MODES:
+            raise ValueError(f"Invalid episode mode '{mode}'. Must be one of: {EPISODE_MODES}")
+        if duration <= 0:
+            raise ValueError("Episode duration must be positive")
+        self.machine_id = machine_id
+        self.mode = mode
+        self.start = float(start)
+        self.end = float(start) + float(duration)
+
+    def to_dict(self) -> dict:
+        return {'machine_id': self.machine_id, 'mode': self.mode, 'start': self.start, 'end': self.end}
+
+
+class EpisodeScript:
+    """
+    Per-machine scripted episodes - the fleet version of force_caution_mode / force_critical_mode.
+
+    apply() is called for each sample of a machine: while one of its episodes is active the
+    sampled reading is overridden with a seeded draw from the episode's band, and the mode
+    ('normal', 'caution' or 'critical') is returned as the sample's label. The random walk
+    underneath is left alone, so readings fall back to it when the episode ends.
+    """
+
+    def __init__(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._episodes = {}   # machine id -> [Episode], in start order
+
+    def add(self, machine_id, mode: str, start: float, duration: float) -> Episode:
+        episode = Episode(machine_id, mode, start, duration)
+        with self._lock:
+            episodes = self._episodes.setdefault(machine_id, [])
+            episodes.append(episode)
+            episodes.sort(key=lambda e: e.start)
+        return episode
+
+    def clear(self, machine_id=None):
+        """Drop the episodes of one machine, or of every machine"""
+        with self._lock:
+            if machine_id is None:
+                self._episodes.clear()
+            else:
+                self._episodes.pop(machine_id, None)
+
+    def episodes(self, machine_id=None) -> list:
+        with self._lock:
+            if machine_id is not None:
+                return list(self._episodes.get(machine_id, []))
+            return [e for episodes in self._episodes.values() for e in episodes]
+
+    def active(self, machine_id, t: float):
+        """Mode of the machine's episode at simulated time t (critical wins), or None"""
+        mode = None
+        with self._lock:
+            episodes = self._episodes.get(machine_id)
+            if not episodes:
+                return None
+            for episode in episodes:
+                if episode.start > t:
+                    break
+                if t < episode.end:
+                    mode = episode.mode
+                    if mode == 'critical':
+                        break
+        return mode
+
+    def upcoming(self, t: float) -> dict:
+        """
+        Machine id -> the episode a process that cannot see the script should apply next: the
+        one active at simulated time t (critical wins), else the next to start. Machines
+        without such an episode are left out.
+        """
+        found = {}
+        with self._lock:
+            for machine_id, episodes in self._episodes.items():
+                chosen = None
+                for episode in episodes:
+                    if episode.end <= t:
+                        continue
+                    if episode.start > t:
+                        chosen = chosen or episode
+                        break
+                    if chosen is None or episode.mode == 'critical':
+                        chosen = episode
+                if chosen is not None:
+                    found[machine_id] = chosen
+        return found
+
+    def apply(self, reading: dict, machine_id, t: float) -> str:
+        """Override a reading dict in place if an episode is active; returns the sample's label"""
+        mode = self.active(machine_id, t)
+        if mode is None:
+            return 'normal'
+        for vital, decimals in zip(VITALS, VITAL_DECIMALS):
+            reading[vital] = round(float(self._rng.uniform(*episode_band(mode, vital))), decimals)
+        return mode
+
+    def schedule_random(self, machine_ids, duration: float, per_day: float = 1.0,
+                        caution_seconds=(600, 3600), critical_seconds=(300, 1800), critical_share: float = 0.3):
+        """Script random episodes over [0, duration): Poisson arrivals of `per_day` per machine"""
+        added = []
+        for machine_id in machine_ids:
+            count = self._rng.poisson(per_day * duration / 86400)
+            for start in np.sort(self._rng.uniform(0, duration, count)):
+                critical = self._rng.random() < critical_share
+                low, high = critical_seconds if critical else caution_seconds
+                added.append(self.add(machine_id, 'critical' if critical else 'caution',
+                                      float(start), float(self._rng.uniform(low, high))))
+        return added
@@ -0,0 +1,126 @@
+# backend/services/fleet_replay.py
+
+import csv
+import os
+import sys
+from datetime import datetime
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from ml.feature_state import RollingFeatureState
+from services.fleet_episodes import EpisodeScript
+from services.fleet_simulator import FleetSimulator, load_dataset_stats, DATASET_CSV
+from services.machine_registry import MachineRegistry
+from services.prediction_service import get_machine_predictions_from_features, risk_level_for
+from services.simulation_clock import SimulationClock
+from services.tick_scheduler import TickScheduler
+
+# Replays start here unless told otherwise, so a seed alone reproduces the timestamps too
+REPLAY_START = datetime(2025, 1, 1)
+
+DATASET_COLUMNS = ['Timestamp', 'Machine_ID', 'Machine_Type', 'Temperature', 'Vibration', 'Pressure',
+                   'Failure_Risk', 'Risk_Level', 'Mode']
+
+
+def replay_fleet(machines, duration: float, seed=None, episodes: EpisodeScript = None,
+                 start: datetime = REPLAY_START, dataset_stats: dict = None, predict: bool = True):
+    """
+    Fast-forward the fleet simulation for `duration` simulated seconds; yields one list of sample
+    dicts (DATASET_COLUMNS) per scheduler pass.
+
+    Same building blocks as the live simulation worker - FleetSimulator random walk, TickScheduler
+    cadences driven by predicted risk, rolling features and the forest - on a fast-forward
+    SimulationClock, with every random draw taken from `seed`. Mode is the label of the scripted
+    episode the sample fell in ('normal' outside episodes). Machines keep their configured status
+    (no auto-shutdown), and each pass is scored with one forest call.
+    """
+    machines = list(machines)
+    clock = SimulationClock(speed=0, start=start)
+    fleet = FleetSimulator(len(machines), dataset_stats or load_dataset_stats(DATASET_CSV), seed=seed)
+    episodes = episodes if episodes is not None else EpisodeScript(seed)
+    scheduler = TickScheduler(clock=clock)
+    positions = {machine['id']: index for index, machine in enumerate(machines)}
+    by_id = {machine['id']: machine for machine in machines}
+    states = {machine['id']: RollingFeatureState() for machine in machines}
+    for machine in machines:
+        scheduler.add(machine['id'], machine['status'])
+
+    while True:
+        next_due = scheduler.next_due()
+        if next_due is None or next_due >= duration:
+            return
+        clock.sleep(next_due - clock.now())
+        t = clock.now()
+        due_ids = scheduler.pop_due()
+        fleet.step([positions[mid] for mid in due_ids])
+
+        now = clock.datetime()
+        timestamp = now.isoformat()
+        samples = []
+        ready = []
+        for mid in due_ids:
+            index = positions[mid]
+            reading = fleet.reading(index)
+            mode = episodes.apply(reading, mid, t)
+            state = states[mid]
+            state.update(now, reading['temperature'], reading['vibration'], reading['pressure'])
+            samples.append({
+                'Timestamp': timestamp,
+                'Machine_ID': mid,
+                'Machine_Type': by_id[mid]['type'],
+                'Temperature': reading['temperature'],
+                'Vibration': reading['vibration'],
+                'Pressure': reading['pressure'],
+                'Failure_Risk': None,
+                'Risk_Level': None,
+                'Mode': mode
+            })
+            if predict and state.ready:
+                ready.append((len(samples) - 1, state.features()))
+
+        if ready:
+            predictions = get_machine_predictions_from_features(
+                [samples[i]['Machine_Type'] for i, _ in ready],
+                np.vstack([features for _, features in ready]),
+                direct=True
+            )
+            for (i, _), prediction in zip(ready, predictions):
+                probability = prediction.get('most_likely_failure_probability', 0)
+                samples[i]['Failure_Risk'] = int(probability * 100)
+                samples[i]['Risk_Level'] = risk_level_for(probability)
+
+        for sample in samples:
+            scheduler.complete(sample['Machine_ID'], by_id[sample['Machine_ID']]['status'], sample['Risk_Level'])
+        yield samples
+
+
+def write_dataset(path, batches) -> int:
+    """Write replay batches to a CSV file; returns the number of rows"""
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=DATASET_COLUMNS)
+        writer.writeheader()
+        for samples in batches:
+            writer.writerows(samples)
+            rows += len(samples)
+    return rows
+
+
+def synthetic_fleet(n_machines: int, registry: MachineRegistry = None) -> list:
+    """n online machines cycling through the machine types of the configured fleet"""
+    registry = registry or MachineRegistry.from_file()
+    types = sorted({machine['type'] for machine in registry})
+    return [{'id': str(i + 1), 'type': types[i % len(types)], 'status': 'online'} for i in range(n_machines)]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 5:
+        print("Usage: python services/fleet_replay.py <machines> <days> <seed> <out.csv>")
+        sys.exit(1)
+    n_machines, days, seed, out = int(sys.argv[1]), float(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+    duration = days * 86400
+    fleet_machines = synthetic_fleet(n_machines)
+    script = EpisodeScript(seed)
+    script.schedule_random([machine['id'] for machine in fleet_machines], duration)
+    rows = write_dataset(out, replay_fleet(fleet_machines, duration, seed=seed, episodes=script))
+    print(f"Wrote {rows:,} samples of {n_machines} machines over {days:g} days "
+          f"({len(script.episodes())} scripted episodes) to {out}")
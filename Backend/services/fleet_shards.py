@@ -0,0 +1,416 @@
+# backend/services/fleet_shards.py
+
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.fleet_episodes import EPISODE_MODES, episode_band
+from services.fleet_simulator import FleetSimulator, VITALS, VITAL_DECIMALS
+from services.machine_registry import MACHINE_STATUSES
+from services.prediction_service import MACHINE_FAILURE_WEIGHTS
+from services.simulation_clock import SimulationClock
+
+# Simulation worker processes; 0 = simulate in the Flask process (one simulation thread)
+SIMULATION_SHARDS = int(os.getenv('SIMULATION_SHARDS', '0'))
+
+# Seconds without a heartbeat before the supervisor restarts a shard
+SHARD_HEARTBEAT_TIMEOUT = 10.0
+
+# Seconds a read waits for a shard to finish writing its rows (a write takes microseconds; a shard
+# killed mid-write leaves its seq odd until the supervisor restarts it)
+SHARD_READ_TIMEOUT = 0.5
+
+RISK_LEVELS = ['low', 'medium', 'high', 'critical']
+SAMPLE_MODES = ['normal'] + EPISODE_MODES
+FAILURE_TYPES = sorted({failure for weights in MACHINE_FAILURE_WEIGHTS.values() for failure in weights})
+
+# One row per machine (registry position); shards write their rows, the Flask process writes status
+MACHINE_DTYPE = np.dtype([
+    ('temperature', 'f8'),      # latest reading (an episode's draw while one is active)
+    ('pressure', 'f8'),
+    ('vibration', 'f8'),
+    ('walk', 'f8', (3,)),       # random-walk state under the readings, in VITALS order
+    ('sampled_at', 'f8'),       # simulated seconds of the latest sample
+    ('samples', 'u4'),          # samples taken; readers compare it to spot new ones
+    ('failure_risk', 'i2'),     # percent, -1 = no prediction
+    ('risk_level', 'i1'),       # index into RISK_LEVELS, -1 = no prediction
+    ('failure_type', 'i1'),     # index into FAILURE_TYPES, -1 = no prediction
+    ('estimated_hours', 'i4'),
+    ('mode', 'i1'),             # index into SAMPLE_MODES of the latest sample
+    ('status', 'i1'),           # index into MACHINE_STATUSES
+    ('episode', 'i1'),          # index into EPISODE_MODES of the scripted episode to apply, -1 = none
+    ('episode_start', 'f8'),    # simulated seconds
+    ('episode_end', 'f8')
+])
+
+# One row per shard
+SHARD_DTYPE = np.dtype([
+    ('seq', 'u8'),              # seqlock: odd while the shard is writing its machine rows
+    ('pid', 'i8'),
+    ('heartbeat', 'f8'),        # time.time() of the shard's latest loop
+    ('samples', 'u8'),
+    ('errors', 'u8'),
+    ('stop', 'u1'),
+    ('model_version', 'S32'),   # version that scored the shard's latest predictions
+    ('active_model', 'S32')     # version the Flask process serves; the shard follows it
+])
+
+
+def shard_ranges(n_machines: int, n_shards: int) -> list:
+    """Contiguous [lo, hi) registry positions per shard, sizes differing by at most one"""
+    bounds = np.linspace(0, n_machines, n_shards + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+class FleetSharedState:
+    """
+    Machine and shard rows in two multiprocessing.shared_memory blocks, viewed as NumPy arrays.
+
+    The creating process owns the blocks (close() then unlink()); workers attach by name. Each
+    shard bumps its seq before and after writing its machine rows, so read() can copy a shard's
+    rows without a lock and retry the rare copy that overlapped a write.
+    """
+
+    def __init__(self, n_machines: int, n_shards: int, names: tuple = None):
+        create = names is None
+        self._blocks = [
+            shared_memory.SharedMemory(create=True, size=max(1, count * dtype.itemsize)) if create
+            else shared_memory.SharedMemory(name=name)
+            for count, dtype, name in zip((n_machines, n_shards), (MACHINE_DTYPE, SHARD_DTYPE), names or (None, None))
+        ]
+        self.machines = np.ndarray((n_machines,), dtype=MACHINE_DTYPE, buffer=self._blocks[0].buf)
+        self.shards = np.ndarray((n_shards,), dtype=SHARD_DTYPE, buffer=self._blocks[1].buf)
+        if create:
+            self.machines[:] = np.zeros(1, dtype=MACHINE_DTYPE)
+            self.machines[['failure_risk', 'risk_level', 'failure_type', 'episode']] = (-1, -1, -1, -1)
+            self.shards[:] = np.zeros(1, dtype=SHARD_DTYPE)
+
+    @property
+    def names(self) -> tuple:
+        return tuple(block.name for block in self._blocks)
+
+    def read(self, shard: int, lo: int, hi: int, timeout: float = SHARD_READ_TIMEOUT, alive=None) -> np.ndarray:
+        """
+        Consistent copy of one shard's machine rows. Raises RuntimeError if the shard stays
+        mid-write for `timeout` seconds, or as soon as `alive()` says its writer is gone.
+        """
+        seq = self.shards['seq']
+        deadline = None
+        while True:
+            before = int(seq[shard])
+            if before % 2 == 0:
+                rows = self.machines[lo:hi].copy()
+                if int(seq[shard]) == before:
+                    return rows
+            elif alive is not None and not alive():
+                raise RuntimeError(f"Shard {shard} died while writing its rows")
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise RuntimeError(f"Shard {shard} has been writing its rows for over {timeout}s")
+            time.sleep(0)
+
+    def close(self):
+        # Drop the array views first; a mapped buffer cannot be closed while exported
+        self.machines = self.shards = None
+        for block in self._blocks:
+            block.close()
+
+    def unlink(self):
+        for block in self._blocks:
+            block.unlink()
+
+
+def apply_episode(row, reading: dict, t: float, rng) -> int:
+    """
+    Shard side of EpisodeScript.apply(): override a reading with a draw from the band of the
+    machine's episode if it is active at simulated time t; returns the SAMPLE_MODES index.
+    """
+    episode = int(row['episode'])
+    if episode < 0 or not row['episode_start'] <= t < row['episode_end']:
+        return 0
+    for vital, decimals in zip(VITALS, VITAL_DECIMALS):
+        reading[vital] = round(float(rng.uniform(*episode_band(EPISODE_MODES[episode], vital))), decimals)
+    return episode + 1
+
+
+def run_shard(shard, lo, hi, machine_types, names, n_machines, n_shards, dataset_stats, seed, speed, start, offset):
+    """Shard process: sample, score and publish machines [lo, hi) until told to stop"""
+    # Imported here so the Flask process does not build a feature pipeline it never uses
+    from ml.feature_state import RollingFeatureState
+    from ml.model_registry import model_registry
+    from services.prediction_service import get_machine_predictions_from_features, risk_level_for
+    from services.tick_scheduler import TickScheduler
+
+    state = FleetSharedState(n_machines, n_shards, names)
+    rows = state.machines[lo:hi]
+    control = state.shards[shard:shard + 1]
+    control['pid'] = os.getpid()
+
+    clock = SimulationClock(speed, start)
+    clock.advance(offset)
+    # Continue the walk from the published rows, so a restarted shard picks up where the last one stopped
+    fleet = FleetSimulator(hi - lo, dataset_stats, seed=seed)
+    fleet.values[:] = rows['walk'].T
+    episode_rng = np.random.default_rng(seed)
+    failed_model = None
+    feature_states = [RollingFeatureState() for _ in range(hi - lo)]
+    scheduler = TickScheduler(clock=clock)
+    statuses = rows['status'].copy()
+    for i, status in enumerate(statuses):
+        scheduler.add(i, MACHINE_STATUSES[status])
+
+    while not control['stop'][0]:
+        control['heartbeat'] = time.time()
+        # Follow deploys / rollbacks of the Flask process
+        wanted = control['active_model'][0].decode()
+        if wanted and wanted != failed_model and wanted != model_registry.active().version:
+            try:
+                model_registry.follow(wanted)
+            except Exception as e:
+                print(f"[Shard {shard}] Could not load model version '{wanted}': {e}")
+                failed_model = wanted
+        changed = np.flatnonzero(rows['status'] != statuses)
+        statuses[changed] = rows['status'][changed]
+        for i in changed:
+            scheduler.update(int(i), MACHINE_STATUSES[statuses[i]])
+
+        next_due = scheduler.next_due()
+        wait = 1.0 if next_due is None else next_due - clock.now()
+        if wait > 0:
+            # At most 1s of real time per nap, so stop flags and status changes are seen promptly
+            if next_due is None or not clock.fast_forward:
+                time.sleep(min(wait / (clock.speed or 1.0), 1.0))
+            else:
+                clock.sleep(wait)
+            continue
+
+        due = scheduler.pop_due()
+        risk_levels = [None] * len(due)
+        try:
+            fleet.step(due)
+            t = clock.now()
+            now = clock.datetime(t)
+            ready = []
+            readings = []
+            modes = []
+            for k, i in enumerate(due):
+                reading = fleet.reading(i)
+                modes.append(apply_episode(rows[i], reading, t, episode_rng))
+                readings.append(reading)
+                feature_states[i].update(now, reading['temperature'], reading['vibration'], reading['pressure'])
+                if feature_states[i].ready:
+                    ready.append(k)
+            predictions = get_machine_predictions_from_features(
+                [machine_types[due[k]] for k in ready],
+                np.vstack([feature_states[due[k]].features() for k in ready]),
+                direct=True
+            ) if ready else []
+
+            control['seq'] += 1
+            for vital in VITALS:
+                rows[vital][due] = [reading[vital] for reading in readings]
+            rows['walk'][due] = fleet.values[:, due].T
+            rows['mode'][due] = modes
+            rows['sampled_at'][due] = t
+            rows['samples'][due] += 1
+            for k, prediction in zip(ready, predictions):
+                i = due[k]
+                probability = prediction.get('most_likely_failure_probability', 0)
+                risk_levels[k] = risk_level_for(probability)
+                rows['failure_risk'][i] = int(probability * 100)
+                rows['risk_level'][i] = RISK_LEVELS.index(risk_levels[k])
+                failure = prediction.get('most_likely_failure')
+                rows['failure_type'][i] = FAILURE_TYPES.index(failure) if failure in FAILURE_TYPES else -1
+                rows['estimated_hours'][i] = prediction.get('most_likely_failure_estimated_hours') or 0
+            control['seq'] += 1
+            control['samples'] += len(due)
+            if predictions:
+                control['model_version'] = str(predictions[-1].get('model_version') or '').encode()[:32]
+        except Exception as e:
+            print(f"[Shard {shard}] Sampling error: {e}")
+            control['errors'] += 1
+            if control['seq'][0] % 2:
+                control['seq'] += 1
+        for k, i in enumerate(due):
+            scheduler.complete(i, MACHINE_STATUSES[statuses[i]], risk_levels[k])
+
+    state.close()
+
+
+class ShardSupervisor:
+    """
+    Runs the fleet simulation in `n_shards` worker processes over shared memory.
+
+    Machines are split into contiguous registry ranges, one per shard. Each shard process keeps
+    its own random walk, rolling features, scheduler and forest, and writes readings and
+    predictions into its rows of FleetSharedState; the Flask process reads them with
+    read_shard() without pickling. check() restarts any shard whose process died or stopped
+    sending heartbeats; restart() does it on request. Only that shard's machines are affected.
+
+    check() runs on the simulation worker and restart() on a request thread, so start / restart /
+    check / stop / stats hold `_lock`: a shard is never restarted twice at once, and nothing is
+    restarted once stop() has freed the shared rows (restart() raises RuntimeError then).
+    """
+
+    def __init__(self, n_shards: int, machines: list, dataset_stats: dict, clock: SimulationClock, seed=None):
+        if n_shards < 1:
+            raise ValueError("Sharded simulation needs at least one shard")
+        self.machines = list(machines)
+        self.n_shards = min(n_shards, max(1, len(self.machines)))
+        self.ranges = shard_ranges(len(self.machines), self.n_shards)
+        self.dataset_stats = dataset_stats
+        self.clock = clock
+        self.seed = seed
+        self.state = None
+        self.restarts = [0] * self.n_shards
+        self.read_failures = [0] * self.n_shards
+        self._last_rows = [None] * self.n_shards
+        self._processes = [None] * self.n_shards
+        self._lock = threading.RLock()
+        # spawn, not fork: the Flask process has threads (and locks) a forked child would inherit
+        self._context = mp.get_context('spawn')
+
+    def start(self, values: np.ndarray, statuses: list):
+        """Create the shared rows from the (3, n_machines) starting vitals and start every shard"""
+        with self._lock:
+            self.state = FleetSharedState(len(self.machines), self.n_shards)
+            for row, vital in enumerate(VITALS):
+                self.state.machines[vital] = values[row]
+            self.state.machines['walk'] = values.T
+            self.set_statuses(statuses)
+            self._last_rows = [self.state.machines[lo:hi].copy() for lo, hi in self.ranges]
+            for shard in range(self.n_shards):
+                self._spawn(shard)
+
+    def _spawn(self, shard: int):
+        lo, hi = self.ranges[shard]
+        self.state.shards['stop'][shard] = 0
+        self.state.shards['heartbeat'][shard] = time.time()
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard, lo, hi, [machine['type'] for machine in self.machines[lo:hi]], self.state.names,
+                  len(self.machines), self.n_shards, self.dataset_stats,
+                  None if self.seed is None else self.seed + shard + self.n_shards * self.restarts[shard],
+                  self.clock.speed, self.clock.start, self.clock.now()),
+            name=f"fleet-shard-{shard}",
+            daemon=True
+        )
+        process.start()
+        self._processes[shard] = process
+
+    def _end(self, shard: int, timeout: float = 5.0):
+        process = self._processes[shard]
+        if process is None:
+            return
+        self.state.shards['stop'][shard] = 1
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        self._processes[shard] = None
+
+    def restart(self, shard: int):
+        """Stop one shard (killing it if it does not stop) and start a fresh process for its machines"""
+        if not 0 <= shard < self.n_shards:
+            raise ValueError(f"Invalid shard {shard}. Must be between 0 and {self.n_shards - 1}")
+        with self._lock:
+            if self.state is None:
+                raise RuntimeError("Sharded simulation is not running")
+            self._end(shard)
+            # A shard killed mid-write leaves its seq odd; readers would spin on it forever
+            if self.state.shards['seq'][shard] % 2:
+                self.state.shards['seq'][shard] += 1
+            self.restarts[shard] += 1
+            self._spawn(shard)
+        print(f"[Shard Supervisor] Restarted shard {shard} (machines {self.ranges[shard][0]}-{self.ranges[shard][1] - 1})")
+
+    def check(self) -> list:
+        """Restart shards whose process died or whose heartbeat is stale; returns their numbers"""
+        with self._lock:
+            if self.state is None:
+                return []
+            now = time.time()
+            stale = [
+                shard for shard, process in enumerate(self._processes)
+                if process is None or not process.is_alive()
+                or now - self.state.shards['heartbeat'][shard] > SHARD_HEARTBEAT_TIMEOUT
+            ]
+            for shard in stale:
+                self.restart(shard)
+            return stale
+
+    def read_shard(self, shard: int) -> np.ndarray:
+        """
+        A shard's rows; if the shard died (or hangs) mid-write, its last consistent rows - the
+        next check() restarts it, which evens its seq.
+        """
+        lo, hi = self.ranges[shard]
+        process = self._processes[shard]
+        try:
+            rows = self.state.read(shard, lo, hi, alive=process.is_alive if process is not None else None)
+        except RuntimeError as e:
+            print(f"[Shard Supervisor] {e}; serving its last consistent rows")
+            self.read_failures[shard] += 1
+            return self._last_rows[shard]
+        self._last_rows[shard] = rows
+        return rows
+
+    def set_episodes(self, episodes: dict):
+        """Publish each machine's episode to apply (registry position -> Episode, e.g. EpisodeScript.upcoming())"""
+        n = len(self.machines)
+        mode, start, end = np.full(n, -1, dtype='i1'), np.zeros(n), np.zeros(n)
+        for position, episode in episodes.items():
+            mode[position] = EPISODE_MODES.index(episode.mode)
+            start[position] = episode.start
+            end[position] = episode.end
+        machines = self.state.machines
+        machines['episode_start'] = start
+        machines['episode_end'] = end
+        machines['episode'] = mode
+
+    def set_model_version(self, version: str):
+        """Publish the model version the shards should score with"""
+        self.state.shards['active_model'] = version.encode()[:32]
+
+    def set_statuses(self, statuses: list):
+        """Publish every machine's status (registry order) to the shards"""
+        self.state.machines['status'] = [MACHINE_STATUSES.index(status) for status in statuses]
+
+    def stop(self) -> np.ndarray:
+        """Stop every shard and free the shared memory; returns the final (3, n_machines) random-walk state"""
+        with self._lock:
+            for shard in range(self.n_shards):
+                self.state.shards['stop'][shard] = 1
+            for shard in range(self.n_shards):
+                self._end(shard)
+            values = self.state.machines['walk'].T.copy()
+            self.state.close()
+            self.state.unlink()
+            self.state = None
+            return values
+
+    def stats(self) -> list:
+        with self._lock:
+            now = time.time()
+            shards = []
+            for shard, (lo, hi) in enumerate(self.ranges):
+                process = self._processes[shard]
+                control = self.state.shards[shard] if self.state is not None else None
+                shards.append({
+                    'shard': shard,
+                    'machines': hi - lo,
+                    'pid': process.pid if process is not None else None,
+                    'alive': process is not None and process.is_alive(),
+                    'restarts': self.restarts[shard],
+                    'read_failures': self.read_failures[shard],
+                    'samples': int(control['samples']) if control is not None else 0,
+                    'errors': int(control['errors']) if control is not None else 0,
+                    'heartbeat_age_s': round(now - float(control['heartbeat']), 3) if control is not None else None,
+                    'model_version': control['model_version'].decode() or None if control is not None else None
+                })
+            return shards
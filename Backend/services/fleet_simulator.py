@@ -0,0 +1,144 @@
+# backend/services/fleet_simulator.py
+
+import csv
+import os
+import statistics
+import numpy as np
+
+# Vitals in row order of FleetSimulator.values
+VITALS = ['temperature', 'pressure', 'vibration']
+
+# Random-walk clamps and reading precision per vital (same bounds the per-machine loop used)
+VITAL_LOW = np.array([20.0, 30.0, 0.05], dtype=np.float32)
+VITAL_HIGH = np.array([120.0, 220.0, 8.0], dtype=np.float32)
+VITAL_DECIMALS = [2, 2, 3]
+
+# Step size is this fraction of the dataset std, with a floor per vital
+STEP_FRACTION = 0.15
+MIN_STEP = np.array([0.5, 1.0, 0.02], dtype=np.float32)
+
+# Machines start uniformly within +/- this offset of the dataset mean
+SEED_OFFSET = np.array([5.0, 8.0, 0.2], dtype=np.float32)
+
+# Path to the training dataset (used to seed realistic vitals)
+DATASET_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml', 'data', 'simulated_sensors.csv')
+
+
+# Compute simple statistics from the dataset so per-machine vitals match training distribution
+def load_dataset_stats(path):
+    stats = {
+        'temperature': {'mean': 75.0, 'std': 8.0},
+        'pressure': {'mean': 100.0, 'std': 8.0},
+        'vibration': {'mean': 0.4, 'std': 0.15}
+    }
+    try:
+        temps = []
+        press = []
+        vib = []
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as csvfile:
+                reader = csv.DictReader(csvfile)
+                for row in reader:
+                    # tolerate header spacing and comma formatting
+                    try:
+                        t = row.get('Temperature') or row.get(' Temperature ') or row.get(' Temperature')
+                        v = row.get('Vibration') or row.get(' Vibration ')
+                        p = row.get('Pressure') or row.get(' Pressure ')
+                        if t is not None and p is not None and v is not None:
+                            temps.append(float(t))
+                            vib.append(float(v))
+                            press.append(float(p))
+                    except Exception:
+                        continue
+        if temps and press and vib:
+            stats['temperature']['mean'] = statistics.mean(temps)
+            stats['temperature']['std'] = statistics.pstdev(temps) if len(temps) > 1 else stats['temperature']['std']
+            stats['pressure']['mean'] = statistics.mean(press)
+            stats['pressure']['std'] = statistics.pstdev(press) if len(press) > 1 else stats['pressure']['std']
+            stats['vibration']['mean'] = statistics.mean(vib)
+            stats['vibration']['std'] = statistics.pstdev(vib) if len(vib) > 1 else stats['vibration']['std']
+    except Exception:
+        # keep defaults on any failure
+        pass
+    return stats
+
+
+class FleetSimulator:
+    """
+    Gaussian random walk of temperature / pressure / vibration for a whole fleet at once.
+
+    State is a (3, n_machines) float32 array (rows in VITALS order); step() advances every
+    machine with one vectorized draw, clamps to VITAL_LOW / VITAL_HIGH and rounds each vital to
+    its reading precision. Seeded from dataset statistics as returned by load_dataset_stats().
+    """
+
+    def __init__(self, n_machines: int, dataset_stats: dict, seed=None):
+        if n_machines < 0:
+            raise ValueError("n_machines must be non-negative")
+        self.n_machines = int(n_machines)
+        self._rng = np.random.default_rng(seed)
+        mean = np.array([dataset_stats[v]['mean'] for v in VITALS], dtype=np.float32)
+        std = np.array([dataset_stats[v]['std'] for v in VITALS], dtype=np.float32)
+        self._step = np.maximum(MIN_STEP, std * STEP_FRACTION)[:, None]
+        self._low = VITAL_LOW[:, None]
+        self._high = VITAL_HIGH[:, None]
+
+        offsets = self._rng.uniform(-1.0, 1.0, (len(VITALS), self.n_machines)).astype(np.float32)
+        self.values = mean[:, None] + offsets * SEED_OFFSET[:, None]
+        self._noise = np.empty_like(self.values)
+        self._round()
+        self.ticks = 0
+
+    @property
+    def temperature(self) -> np.ndarray:
+        return self.values[0]
+
+    @property
+    def pressure(self) -> np.ndarray:
+        return self.values[1]
+
+    @property
+    def vibration(self) -> np.ndarray:
+        return self.values[2]
+
+    def _round(self, values=None):
+        values = self.values if values is None else values
+        for row, decimals in enumerate(VITAL_DECIMALS):
+            np.round(values[row], decimals, out=values[row])
+
+    def step(self, indices=None) -> np.ndarray:
+        """
+        Advance every machine (or only the machines at `indices`) by one tick; returns the
+        (3, n_machines) state (not a copy)
+        """
+        if indices is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            noise = self._rng.standard_normal((len(VITALS), len(indices)), dtype=np.float32)
+            columns = self.values[:, indices] + noise * self._step
+            np.clip(columns, self._low, self._high, out=columns)
+            self._round(columns)
+            self.values[:, indices] = columns
+            self.ticks += 1
+            return self.values
+        self._rng.standard_normal(out=self._noise, dtype=np.float32)
+        self._noise *= self._step
+        self.values += self._noise
+        np.clip(self.values, self._low, self._high, out=self.values)
+        self._round()
+        self.ticks += 1
+        return self.values
+
+    def reading(self, index: int) -> dict:
+        """Python-float vitals of one machine, rounded to the reading precision"""
+        return {
+            vital: round(float(self.values[row, index]), decimals)
+            for row, (vital, decimals) in enumerate(zip(VITALS, VITAL_DECIMALS))
+        }
+
+    def set_reading(self, index: int, **vitals):
+        """Override vitals of one machine (e.g. to script a fault); unknown names raise ValueError"""
+        for vital, value in vitals.items():
+            if vital not in VITALS:
+                raise ValueError(f"Unknown vital '{vital}'. Must be one of: {VITALS}")
+            row = VITALS.index(vital)
+            self.values[row, index] = np.clip(value, VITAL_LOW[row], VITAL_HIGH[row])
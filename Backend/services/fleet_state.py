@@ -0,0 +1,160 @@
+# backend/services/fleet_state.py
+
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+
+# Lock wait / hold histogram bucket lower bounds, in milliseconds
+LOCK_BUCKETS_MS = [0, 0.1, 1, 10, 100, 1000]
+
+
+def _bucket_labels():
+    labels = []
+    for i, low in enumerate(LOCK_BUCKETS_MS):
+        if i + 1 < len(LOCK_BUCKETS_MS):
+            labels.append(f"{low}-{LOCK_BUCKETS_MS[i + 1]}ms")
+        else:
+            labels.append(f"{low}ms+")
+    return labels
+
+
+def _bucket_index(ms: float) -> int:
+    for i in range(len(LOCK_BUCKETS_MS) - 1, -1, -1):
+        if ms >= LOCK_BUCKETS_MS[i]:
+            return i
+    return 0
+
+
+class InstrumentedLock:
+    """
+    threading.Lock that records how long callers waited to acquire it and how long it was held.
+    Drop-in for `with lock:` blocks; stats() reports counts, totals, maxima and histograms.
+    """
+
+    def __init__(self, name: str = 'lock'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._labels = _bucket_labels()
+        self._acquired_at = None
+        self.reset()
+
+    def reset(self):
+        with self._stats_lock:
+            self.acquisitions = 0
+            self.contended = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.hold_total_ms = 0.0
+            self.hold_max_ms = 0.0
+            self.wait_histogram = [0] * len(LOCK_BUCKETS_MS)
+            self.hold_histogram = [0] * len(LOCK_BUCKETS_MS)
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(False)
+        contended = not acquired
+        if not acquired and blocking:
+            acquired = self._lock.acquire(True, timeout)
+        if acquired:
+            now = time.perf_counter()
+            self._acquired_at = now
+            waited = (now - start) * 1000
+            with self._stats_lock:
+                self.acquisitions += 1
+                self.contended += contended
+                self.wait_total_ms += waited
+                self.wait_max_ms = max(self.wait_max_ms, waited)
+                self.wait_histogram[_bucket_index(waited)] += 1
+        return acquired
+
+    def release(self):
+        held = (time.perf_counter() - self._acquired_at) * 1000
+        self._lock.release()
+        with self._stats_lock:
+            self.hold_total_ms += held
+            self.hold_max_ms = max(self.hold_max_ms, held)
+            self.hold_histogram[_bucket_index(held)] += 1
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            n = self.acquisitions
+            return {
+                "name": self.name,
+                "acquisitions": n,
+                "contended": self.contended,
+                "wait_total_ms": round(self.wait_total_ms, 3),
+                "wait_mean_ms": round(self.wait_total_ms / n, 4) if n else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "hold_total_ms": round(self.hold_total_ms, 3),
+                "hold_mean_ms": round(self.hold_total_ms / n, 4) if n else 0.0,
+                "hold_max_ms": round(self.hold_max_ms, 3),
+                "wait_histogram": dict(zip(self._labels, self.wait_histogram)),
+                "hold_histogram": dict(zip(self._labels, self.hold_histogram))
+            }
+
+
+class FleetSnapshot:
+    """
+    One published state of the fleet: machine id -> vitals record, plus the tick that produced it.
+
+    Snapshots are never modified after publication - writers build new vitals records and a new
+    snapshot - so readers can use one without holding any lock.
+    """
+
+    __slots__ = ('machines', 'tick', 'published_at')
+
+    def __init__(self, machines: dict, tick: int = 0):
+        self.machines = MappingProxyType(dict(machines))
+        self.tick = tick
+        self.published_at = datetime.utcnow().isoformat()
+
+    def get(self, machine_id):
+        return self.machines.get(machine_id)
+
+
+class SnapshotStore:
+    """
+    RCU-style holder of the current FleetSnapshot.
+
+    current() is a plain attribute read - readers never block. Writers serialize on write_lock
+    (held only for the reference swap, never for a whole simulation tick) and either publish()
+    a freshly built snapshot or replace() selected machines copy-on-write.
+    """
+
+    def __init__(self, write_lock=None):
+        self.write_lock = write_lock or threading.Lock()
+        self._snapshot = FleetSnapshot({})
+
+    def current(self) -> FleetSnapshot:
+        return self._snapshot
+
+    def publish(self, machines: dict, tick: int = None) -> FleetSnapshot:
+        """Swap in a new snapshot; caller must hold write_lock"""
+        snapshot = FleetSnapshot(machines, self._snapshot.tick + 1 if tick is None else tick)
+        self._snapshot = snapshot
+        return snapshot
+
+    def replace(self, machine_id, **fields) -> FleetSnapshot:
+        """Publish a copy of the current snapshot with fields of one machine changed; caller holds write_lock"""
+        current = self._snapshot
+        if machine_id not in current.machines:
+            return current
+        machines = dict(current.machines)
+        vitals = machines[machine_id]
+        # Records (MachineVitals) copy themselves; plain dicts are merged
+        machines[machine_id] = {**vitals, **fields} if isinstance(vitals, dict) else vitals.replace(**fields)
+        snapshot = FleetSnapshot(machines, current.tick)
+        self._snapshot = snapshot
+        return snapshot
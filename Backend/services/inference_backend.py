@@ -0,0 +1,114 @@
+# backend/services/inference_backend.py
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threadpoolctl import threadpool_limits
+
+# Per-process state of pool workers
+_worker_engines = {}  # model version -> engine
+_worker_limits = None
+
+# Engines kept per worker: the active version and the rollback target
+WORKER_ENGINE_SLOTS = 2
+
+
+def _init_worker(threads_per_worker: int, version: str):
+    """Pool initializer: pin native thread pools, then load the active engine once per process"""
+    global _worker_limits
+    # Keep BLAS/OpenMP pools at the per-worker budget so N workers don't oversubscribe the cores
+    _worker_limits = threadpool_limits(limits=threads_per_worker)
+    _worker_engine(version)
+
+
+def _worker_engine(version):
+    engine = _worker_engines.get(version)
+    if engine is None:
+        # A hot-swapped version: the parent has validated it, the worker only loads it
+        from ml.model_registry import model_registry
+        engine = model_registry.load_engine(version)
+        _worker_engines[version] = engine
+        while len(_worker_engines) > WORKER_ENGINE_SLOTS:
+            del _worker_engines[next(iter(_worker_engines))]
+    return engine
+
+
+def _worker_predict_proba(rows, version):
+    return _worker_engine(version).predict_proba(rows)
+
+
+def _worker_info(_=None):
+    from threadpoolctl import threadpool_info
+    return {
+        'pid': os.getpid(),
+        'thread_pools': [{'api': p['internal_api'], 'threads': p['num_threads']} for p in threadpool_info()]
+    }
+
+
+class ProcessPoolBackend:
+    """
+    Scores feature matrices in a pool of worker processes, off the Flask process' GIL.
+
+    Each worker loads an engine once per model version (ml.model_registry) and has its native
+    thread pools limited to threads_per_worker. Batches from the InferenceBatcher are sent whole,
+    so the IPC cost is paid once per batch rather than once per request.
+    """
+
+    def __init__(self, workers: int = None, threads_per_worker: int = None):
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus - 1)
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.workers)
+        self._pool = None
+        self._lock = threading.Lock()  # guards _pool: creation, the broken-pool reset and shutdown
+
+    def _get_pool(self, version: str) -> ProcessPoolExecutor:
+        """The running pool, started on first use; callers keep the returned pool for the call"""
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded Flask process is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker, version)
+                )
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def start(self, version: str):
+        self._get_pool(version)
+        return self
+
+    def warm_up(self, version: str):
+        """Block until every worker has started and loaded the engine of a model version"""
+        return list(self._get_pool(version).map(_worker_info, range(self.workers)))
+
+    def predict_proba(self, rows, version: str):
+        pool = self._get_pool(version)
+        try:
+            return pool.submit(_worker_predict_proba, rows, version).result()
+        except BrokenProcessPool:
+            # A worker died: replace the pool so the next call gets fresh workers. Every caller
+            # in flight sees the same broken pool; only the first one drops it
+            with self._lock:
+                if self._pool is pool:
+                    print("[Inference Backend] Worker pool broken; restarting")
+                    self._pool = None
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            'backend': 'process',
+            'workers': self.workers,
+            'threads_per_worker': self.threads_per_worker,
+            'running': self._pool is not None
+        }
@@ -0,0 +1,155 @@
+# backend/services/inference_batcher.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+# Histogram buckets (inclusive lower bounds) for batch sizes and queue depths
+HISTOGRAM_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def _bucket_labels():
+    labels = []
+    for i, low in enumerate(HISTOGRAM_BUCKETS):
+        if i + 1 < len(HISTOGRAM_BUCKETS):
+            high = HISTOGRAM_BUCKETS[i + 1] - 1
+            labels.append(str(low) if high == low else f"{low}-{high}")
+        else:
+            labels.append(f"{low}+")
+    return labels
+
+
+def _bucket_index(value: int) -> int:
+    for i in range(len(HISTOGRAM_BUCKETS) - 1, -1, -1):
+        if value >= HISTOGRAM_BUCKETS[i]:
+            return i
+    return 0
+
+
+class InferenceBatcher:
+    """
+    Micro-batching queue in front of the forest.
+
+    Request threads submit their feature rows and block; a single scheduler thread collects
+    everything that arrives within max_wait_ms of the first queued request (or until max_batch
+    rows are gathered), scores it with one score_fn call and hands each caller its own slice.
+    The window is cut short once every caller currently blocked in score() is in the batch,
+    since nobody else can arrive until they are answered - a lone caller never waits.
+    Submissions that already hold max_batch rows or more are scored inline.
+
+    An optional context (e.g. the model snapshot a request started with) is passed through to
+    score_fn as a second argument; rows submitted with different contexts never share a call.
+    """
+
+    def __init__(self, score_fn, max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._labels = _bucket_labels()
+        self._waiting = 0  # callers blocked in score()
+        self.batches = 0
+        self.rows = 0
+        self.inline_calls = 0
+        self.max_queue_depth = 0
+        self.batch_size_histogram = [0] * len(HISTOGRAM_BUCKETS)
+        self.queue_depth_histogram = [0] * len(HISTOGRAM_BUCKETS)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._thread.start()
+
+    def _call(self, rows, context):
+        return self.score_fn(rows) if context is None else self.score_fn(rows, context)
+
+    def score(self, rows: np.ndarray, context=None) -> np.ndarray:
+        """Score a 2-D block of feature rows, sharing the forest call with concurrent callers"""
+        if len(rows) >= self.max_batch:
+            with self._stats_lock:
+                self.inline_calls += 1
+            return self._call(rows, context)
+
+        self._ensure_started()
+        future = Future()
+        with self._stats_lock:
+            self._waiting += 1
+        self._queue.put((rows, context, future))
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self.queue_depth_histogram[_bucket_index(depth)] += 1
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+        try:
+            return future.result()
+        finally:
+            with self._stats_lock:
+                self._waiting -= 1
+
+    def _run(self):
+        max_wait = self.max_wait_ms / 1000.0
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + max_wait
+            while size < self.max_batch and len(batch) < self._waiting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._process(batch)
+
+    def _process(self, batch):
+        # Group by context identity (contexts are referenced by the batch, so ids are unique)
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+
+        for group in groups.values():
+            group_size = sum(len(rows) for rows, _, _ in group)
+            try:
+                probabilities = self._call(np.vstack([rows for rows, _, _ in group]), group[0][1])
+            except Exception as e:
+                for _, _, future in group:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self.batches += 1
+                self.rows += group_size
+                self.batch_size_histogram[_bucket_index(group_size)] += 1
+
+            offset = 0
+            for rows, _, future in group:
+                future.set_result(probabilities[offset:offset + len(rows)])
+                offset += len(rows)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "enabled": True,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": self.batches,
+                "rows": self.rows,
+                "inline_calls": self.inline_calls,
+                "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+                "batch_size_histogram": dict(zip(self._labels, self.batch_size_histogram)),
+                "queue_depth_histogram": dict(zip(self._labels, self.queue_depth_histogram))
+            }
@@ -0,0 +1,160 @@
+# backend/services/machine_registry.py
+
+import csv
+import json
+import os
+from threading import Lock
+
+# Default fleet definition; MACHINES_CONFIG may point to another .json or .csv file
+MACHINES_CONFIG = os.getenv(
+    'MACHINES_CONFIG',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'machines.json')
+)
+
+MACHINE_STATUSES = ['online', 'offline', 'maintenance']
+REQUIRED_FIELDS = ['id', 'name', 'type', 'status', 'location']
+
+# Fields with a secondary index
+INDEXED_FIELDS = ['type', 'location', 'status']
+
+
+class MachineRegistry:
+    """
+    The fleet of machines, keyed by id, with secondary indexes by type, location and status.
+
+    Lookups by id and by indexed value are dict lookups; iteration follows the config order,
+    and position(id) gives a machine's stable column in fleet-wide arrays. Machines are plain
+    dicts (what the routes serialize); change their status only through set_status() so the
+    status index stays in sync.
+    """
+
+    def __init__(self, machines=()):
+        self._lock = Lock()
+        self._by_id = {}
+        self._positions = {}
+        # field -> value -> {id: machine}; inner dicts keep config order, except status buckets
+        # a machine moved into out of order (listed in _unordered until the next sorted read)
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._unordered = set()
+        for machine in machines:
+            self.add(machine)
+
+    @classmethod
+    def from_file(cls, path=MACHINES_CONFIG):
+        """Load a fleet from JSON (a list, or {"machines": [...]}) or CSV"""
+        if path.lower().endswith('.csv'):
+            return cls(_read_csv(path))
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data['machines'] if isinstance(data, dict) else data)
+
+    def add(self, machine: dict) -> dict:
+        missing = [field for field in REQUIRED_FIELDS if machine.get(field) in (None, '')]
+        if missing:
+            raise ValueError(f"Machine is missing required fields: {missing}")
+        if machine['status'] not in MACHINE_STATUSES:
+            raise ValueError(f"Invalid status '{machine['status']}'. Must be one of: {MACHINE_STATUSES}")
+
+        machine = {
+            'description': '',
+            'common_failures': [],
+            'failure_descriptions': {},
+            **machine,
+            'id': str(machine['id'])
+        }
+        with self._lock:
+            if machine['id'] in self._by_id:
+                raise ValueError(f"Duplicate machine id '{machine['id']}'")
+            self._positions[machine['id']] = len(self._by_id)
+            self._by_id[machine['id']] = machine
+            for field in INDEXED_FIELDS:
+                self._indexes[field].setdefault(machine[field], {})[machine['id']] = machine
+        return machine
+
+    def get(self, machine_id):
+        """The machine dict, or None"""
+        return self._by_id.get(str(machine_id))
+
+    def position(self, machine_id) -> int:
+        """Config-order position of a machine (its column in fleet-wide arrays)"""
+        return self._positions[str(machine_id)]
+
+    def __contains__(self, machine_id):
+        return str(machine_id) in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        with self._lock:
+            machines = list(self._by_id.values())
+        return iter(machines)
+
+    def by_type(self, machine_type) -> list:
+        return self.find(type=machine_type)
+
+    def by_location(self, location) -> list:
+        return self.find(location=location)
+
+    def by_status(self, status) -> list:
+        return self.find(status=status)
+
+    def find(self, **filters) -> list:
+        """Machines matching every given indexed field, in config order"""
+        unknown = [field for field in filters if field not in INDEXED_FIELDS]
+        if unknown:
+            raise ValueError(f"Cannot filter on {unknown}. Indexed fields: {INDEXED_FIELDS}")
+        with self._lock:
+            if not filters:
+                return list(self._by_id.values())
+            buckets = [self._indexes[field].get(value, {}) for field, value in filters.items()]
+            if len(buckets) == 1:
+                bucket = buckets[0]
+                key = ('status', filters.get('status'))
+                if key in self._unordered:
+                    ordered = sorted(bucket, key=self._positions.__getitem__)
+                    bucket.clear()
+                    bucket.update((mid, self._by_id[mid]) for mid in ordered)
+                    self._unordered.discard(key)
+                return list(bucket.values())
+            # Intersect the id sets starting from the smallest bucket
+            buckets.sort(key=len)
+            ids = buckets[0].keys()
+            for bucket in buckets[1:]:
+                ids = ids & bucket.keys()
+            return [self._by_id[mid] for mid in sorted(ids, key=self._positions.__getitem__)]
+
+    def counts(self, field) -> dict:
+        """Number of machines per value of an indexed field"""
+        with self._lock:
+            return {value: len(bucket) for value, bucket in self._indexes[field].items() if bucket}
+
+    def set_status(self, machine_id, status) -> dict:
+        """Update a machine's status in place (and its status index); returns the machine"""
+        if status not in MACHINE_STATUSES:
+            raise ValueError(f"Invalid status. Must be one of: {', '.join(MACHINE_STATUSES)}")
+        with self._lock:
+            machine = self._by_id.get(str(machine_id))
+            if machine is None:
+                raise KeyError(machine_id)
+            old = machine['status']
+            if old != status:
+                del self._indexes['status'][old][machine['id']]
+                bucket = self._indexes['status'].setdefault(status, {})
+                if bucket and self._positions[next(reversed(bucket))] > self._positions[machine['id']]:
+                    self._unordered.add(('status', status))
+                bucket[machine['id']] = machine
+                machine['status'] = status
+        return machine
+
+
+def _read_csv(path) -> list:
+    """CSV rows -> machine dicts; common_failures is ';'-separated, failure_descriptions a JSON object"""
+    machines = []
+    with open(path, 'r', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            row = {k.strip(): (v or '').strip() for k, v in row.items() if k}
+            row['common_failures'] = [f.strip() for f in row.get('common_failures', '').split(';') if f.strip()]
+            row['failure_descriptions'] = json.loads(row['failure_descriptions']) if row.get('failure_descriptions') else {}
+            machines.append(row)
+    return machines
@@ -1,14 +1,20 @@
 # backend/services/prediction_service.py
 
-from ml.utils import load_ml_artifacts, preprocess_input_data
-import pandas as pd # Import pandas here as well for data handling
+from ml.utils import engineer_features, timestamp_features, SENSOR_COLUMNS
+from services.inference_batcher import InferenceBatcher
+from services.inference_backend import ProcessPoolBackend
+from ml.model_registry import model_registry
+import numpy as np
 import random
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from threading import Lock
 import os
 
-# Load artifacts once when this module is imported
-# This ensures the model and scaler are ready before the first request
-model, scaler = load_ml_artifacts()
+# The active model version is loaded lazily by model_registry.active() on first use (or preloaded by
+# app.py), so importing this module never unpickles the sklearn model and worker startup stays cheap.
+# Each request scores with the ModelVersion snapshot it started with, so hot-swaps drop nothing.
 
 # Machine-specific failure prediction weights
 MACHINE_FAILURE_WEIGHTS = {
@@ -36,58 +42,253 @@ MACHINE_FAILURE_WEIGHTS = {
     }
 }
 
-def get_prediction(raw_input_data: dict) -> dict:
-    try:
-        # Convert the incoming data (which might be a list of dicts for windowing) to a DataFrame
-        # Ensure it handles single dict or list of dicts correctly
-        if isinstance(raw_input_data, dict):
-            input_df = pd.DataFrame([raw_input_data])
-        elif isinstance(raw_input_data, list):
-            input_df = pd.DataFrame(raw_input_data)
-        else:
-            raise ValueError("Input data must be a dictionary or a list of dictionaries.")
+# Column names accepted from clients (lower or Title case) mapped to the training names
+INPUT_COLUMN_MAP = {
+    'temperature': 'Temperature',
+    'vibration': 'Vibration',
+    'pressure': 'Pressure',
+    'timestamp': 'Timestamp'
+}
 
+# Upper bound on windows accepted by a single batch request
+MAX_BATCH_WINDOWS = 1000
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache of prediction results.
+
+    Keys are the model version and machine type plus the raw feature vector quantized to the
+    sensor precision (readings are rounded to 2-3 decimals by the simulator), so repeated
+    dashboard views of an unchanged machine skip the forest. Entries optionally expire after
+    ttl_seconds.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = None, decimals: int = 3):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, machine_type, features, version):
+        quantized = np.round(np.asarray(features, dtype=np.float64), self.decimals)
+        return version, machine_type, quantized.tobytes()
+
+    def get(self, machine_type, features, version=None):
+        """Cached result (a shallow copy) or None"""
+        if self.max_size <= 0:
+            return None
+        key = self._key(machine_type, features, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, machine_type, features, result: dict, version=None):
+        if self.max_size <= 0:
+            return
+        key = self._key(machine_type, features, version)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+# PREDICTION_CACHE_SIZE=0 disables caching; PREDICTION_CACHE_TTL is in seconds (0 = no expiry)
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv('PREDICTION_CACHE_SIZE', '4096')),
+    ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', '0')) or None
+)
+# Entries of a replaced model version can never hit again
+model_registry.on_swap(lambda new, old: prediction_cache.clear())
+
+# Where the forest runs: 'inline' in this process, or 'process' in a pool of worker processes
+# (INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER), which keeps scoring off this process' GIL.
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'inline').lower()
+if INFERENCE_BACKEND not in ('inline', 'process'):
+    raise ValueError(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}'; expected 'inline' or 'process'")
+inference_backend = ProcessPoolBackend(
+    workers=int(os.getenv('INFERENCE_WORKERS', '0')) or None,
+    threads_per_worker=int(os.getenv('INFERENCE_THREADS_PER_WORKER', '0')) or None
+) if INFERENCE_BACKEND == 'process' else None
+
+def _predict_proba(feature_rows, active=None):
+    active = active or model_registry.active()
+    if inference_backend is not None:
+        return inference_backend.predict_proba(feature_rows, active.version)
+    return active.engine.predict_proba(feature_rows)
+
+# Micro-batching of concurrent forest calls. INFERENCE_BATCH_WINDOW_MS=0 scores every call inline.
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '2'))
+inference_batcher = InferenceBatcher(
+    _predict_proba,
+    max_batch=int(os.getenv('INFERENCE_MAX_BATCH', '64')),
+    max_wait_ms=INFERENCE_BATCH_WINDOW_MS
+) if INFERENCE_BATCH_WINDOW_MS > 0 else None
+
+def inference_stats() -> dict:
+    """Queue depth and batch-size histograms of the inference batcher, plus the scoring backend"""
+    stats = inference_batcher.stats() if inference_batcher is not None else {"enabled": False}
+    stats["backend"] = inference_backend.stats() if inference_backend is not None else {"backend": "inline"}
+    return stats
+
+def _window_arrays(raw_input_data):
+    """Turn a reading (dict) or window of readings (list of dicts) into per-column float arrays"""
+    # Ensure it handles single dict or list of dicts correctly
+    if isinstance(raw_input_data, dict):
+        rows = [raw_input_data]
+    elif isinstance(raw_input_data, list):
+        rows = raw_input_data
+    else:
+        raise ValueError("Input data must be a dictionary or a list of dictionaries.")
+
+    sensors = {column: np.empty(len(rows), dtype=np.float64) for column in SENSOR_COLUMNS}
+    timestamps = []
+    seen = set()
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError("Input data must be a dictionary or a list of dictionaries.")
         # Normalize column names (accept both lower and Title case keys)
-        col_map = {}
-        mapping = {
-            'temperature': 'Temperature',
-            'vibration': 'Vibration',
-            'pressure': 'Pressure',
-            'timestamp': 'Timestamp'
+        normalized = {}
+        for key, value in row.items():
+            column = INPUT_COLUMN_MAP.get(str(key).strip().lower())
+            if column:
+                normalized[column] = value
+        seen.update(normalized)
+        for column in SENSOR_COLUMNS:
+            value = normalized.get(column)
+            try:
+                sensors[column][i] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{column} must be numeric, got {value!r}")
+        timestamps.append(normalized.get('Timestamp'))
+
+    missing = [c for c in SENSOR_COLUMNS if c not in seen]
+    if rows and missing:
+        raise ValueError(f"Missing sensor column(s): {', '.join(missing)}")
+
+    # If Timestamp is missing, create recent timestamps (1 minute apart ending at 'now')
+    if all(ts is None for ts in timestamps):
+        now = datetime.utcnow()
+        timestamps = [now - timedelta(minutes=(len(rows) - i - 1)) for i in range(len(rows))]
+
+    hour = np.empty(len(rows), dtype=np.float64)
+    day_of_week = np.empty(len(rows), dtype=np.float64)
+    for i, ts in enumerate(timestamps):
+        hour[i], day_of_week[i] = timestamp_features(ts)
+
+    return sensors['Temperature'], sensors['Vibration'], sensors['Pressure'], hour, day_of_week
+
+def _latest_features(raw_input_data):
+    """Return the raw feature row of the most recent reading in a window"""
+    # Feature engineering runs on plain arrays; the engine has the scaler folded in,
+    # so no separate scaling pass is needed
+    processed_data_for_prediction = engineer_features(*_window_arrays(raw_input_data))
+
+    # The *last* row represents the most current reading's features
+    return processed_data_for_prediction[-1]
+
+def _score_features(feature_rows, active, direct: bool = False) -> list:
+    """Score a 2-D array of raw feature rows with a single forest call of one model version"""
+    # predict() is argmax over predict_proba(), so one call yields both label and probabilities.
+    # The flattened engine (scaler folded in) matches model.predict_proba on scaled rows exactly.
+    # Concurrent callers are coalesced into one forest call by the batcher when enabled.
+    if inference_batcher is not None and not direct:
+        probabilities = inference_batcher.score(feature_rows, active)
+    else:
+        probabilities = _predict_proba(feature_rows, active)
+    labels = active.engine.classes_.take(probabilities.argmax(axis=1))
+
+    return [
+        {
+            "prediction": int(label), # Convert numpy int to Python int
+            "probability_no_failure": float(proba[0]),
+            "probability_failure": float(proba[1]),
+            "model_version": active.version
         }
-        for c in input_df.columns:
-            lc = str(c).strip().lower()
-            if lc in mapping:
-                col_map[c] = mapping[lc]
-
-        if col_map:
-            input_df = input_df.rename(columns=col_map)
-
-        # If Timestamp is missing, create recent timestamps so rolling features can be computed
-        if 'Timestamp' not in input_df.columns:
-            now = datetime.utcnow()
-            # create timestamps spaced 1 minute apart ending at 'now'
-            rows = input_df.shape[0]
-            generated = [((now - timedelta(minutes=(rows - i - 1))).isoformat()) for i in range(rows)]
-            input_df['Timestamp'] = generated
-
-        # Preprocess the input data
-        # This function handles feature engineering and scaling
-        processed_data_for_prediction = preprocess_input_data(input_df)
-
-        # Make prediction. Predict on the *last* row of the processed data,
-        # as that represents the most current reading's features.
-        # Ensure it's reshaped for single sample prediction: (1, -1)
-        single_sample_for_prediction = processed_data_for_prediction[-1].reshape(1, -1)
-
-        prediction_label = model.predict(single_sample_for_prediction)[0]
-        prediction_proba = model.predict_proba(single_sample_for_prediction)[0].tolist() # Convert numpy array to list
+        for label, proba in zip(labels, probabilities)
+    ]
 
+def _with_machine_analysis(machine_type, raw_features, general_prediction: dict) -> dict:
+    """Attach the machine-specific failure analysis (from the raw readings in the feature row)"""
+    if machine_type is None:
+        return general_prediction
+    if machine_type not in MACHINE_FAILURE_WEIGHTS:
         return {
-            "prediction": int(prediction_label), # Convert numpy int to Python int
-            "probability_no_failure": prediction_proba[0],
-            "probability_failure": prediction_proba[1]
+            **general_prediction,
+            "machine_type": machine_type,
+            "specific_failure_predictions": {}
         }
+
+    # The first three features are the raw readings, in SENSOR_COLUMNS order
+    latest = dict(zip(SENSOR_COLUMNS, raw_features[:len(SENSOR_COLUMNS)].tolist()))
+    return {
+        **general_prediction,
+        "machine_type": machine_type,
+        **_machine_failure_analysis(machine_type, latest)
+    }
+
+def _predict_feature_rows(machine_types: list, feature_rows, direct: bool = False) -> list:
+    """
+    Predict many raw feature rows (machine_type None = general prediction only).
+    Cache hits skip the forest; all misses share a single forest call. direct=True bypasses
+    the cache and the micro-batcher (offline callers whose rows never repeat).
+    """
+    active = model_registry.active()
+    if direct:
+        general_predictions = _score_features(feature_rows, active, direct=True)
+        return [
+            _with_machine_analysis(machine_type, row, general_prediction)
+            for machine_type, row, general_prediction in zip(machine_types, feature_rows, general_predictions)
+        ]
+    results = [prediction_cache.get(machine_type, row, active.version) for machine_type, row in zip(machine_types, feature_rows)]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        general_predictions = _score_features(feature_rows[misses], active)
+        for i, general_prediction in zip(misses, general_predictions):
+            results[i] = _with_machine_analysis(machine_types[i], feature_rows[i], general_prediction)
+            prediction_cache.put(machine_types[i], feature_rows[i], results[i], active.version)
+    return results
+
+def _predict_features(machine_type, raw_features) -> dict:
+    """Predict a single raw feature row (see _predict_feature_rows)"""
+    return _predict_feature_rows([machine_type], raw_features.reshape(1, -1))[0]
+
+def get_prediction(raw_input_data: dict) -> dict:
+    try:
+        return _predict_features(None, _latest_features(raw_input_data))
     except ValueError as ve:
         # Catch specific data processing errors
         print(f"Data processing error: {ve}")
@@ -97,55 +298,151 @@ def get_prediction(raw_input_data: dict) -> dict:
         print(f"Error during prediction: {e}")
         raise RuntimeError(f"An error occurred during prediction: {e}")
 
+def _expand_history(raw_input_data) -> list:
+    """
+    Ensure we have at least 3 rows for rolling features required by the model.
+    A single dict is expanded into 3 similar timestamped rows and short lists are padded.
+    """
+    if isinstance(raw_input_data, dict):
+        base = raw_input_data
+        now = datetime.utcnow()
+        history_for_prediction = []
+        for i in range(3):
+            # small deterministic offsets (no randomness)
+            history_for_prediction.append({
+                'Timestamp': (now - timedelta(minutes=(2 - i))).isoformat(),
+                'Temperature': base.get('temperature') or base.get('Temperature'),
+                'Pressure': base.get('pressure') or base.get('Pressure'),
+                'Vibration': base.get('vibration') or base.get('Vibration')
+            })
+        return history_for_prediction
+
+    if isinstance(raw_input_data, list):
+        if len(raw_input_data) >= 3:
+            return raw_input_data
+        # pad by repeating last element with adjusted timestamps
+        now = datetime.utcnow()
+        history_for_prediction = []
+        for i in range(3 - len(raw_input_data)):
+            history_for_prediction.append({
+                'Timestamp': (now - timedelta(minutes=(2 - i))).isoformat(),
+                'Temperature': raw_input_data[0].get('temperature') or raw_input_data[0].get('Temperature'),
+                'Pressure': raw_input_data[0].get('pressure') or raw_input_data[0].get('Pressure'),
+                'Vibration': raw_input_data[0].get('vibration') or raw_input_data[0].get('Vibration')
+            })
+        # append existing
+        for item in raw_input_data:
+            history_for_prediction.append(item)
+        return history_for_prediction
+
+    return []
+
+def _latest_reading(raw_input_data, history_for_prediction) -> dict:
+    """Extract the latest reading (support dict or list of dicts)"""
+    if isinstance(raw_input_data, list) and raw_input_data:
+        return raw_input_data[-1]
+    if isinstance(raw_input_data, dict):
+        return raw_input_data
+    if isinstance(history_for_prediction, list) and history_for_prediction:
+        return history_for_prediction[-1]
+    return {}
+
+def _machine_failure_analysis(machine_type: str, latest: dict) -> dict:
+    """Score each known failure mode of a machine type from its latest sensor reading"""
+    # Support either lowercase or Title-case keys
+    def _get_val(d, *keys, default=0):
+        for k in keys:
+            if k in d:
+                return d[k]
+        # try lower-case keys
+        for k in keys:
+            if k.lower() in d:
+                return d[k.lower()]
+        return default
+
+    temp = _get_val(latest, 'temperature', 'Temperature', default=0)
+    pressure = _get_val(latest, 'pressure', 'Pressure', default=0)
+    vibration = _get_val(latest, 'vibration', 'Vibration', default=0)
+
+    # Normalize sensor values (assuming normal ranges)
+    # Normalize using ranges similar to the training data:
+    # Temperature roughly 60-110 °C, Pressure roughly 80-125 (dataset units), Vibration roughly 0-1 mm/s
+    try:
+        temp_val = float(temp)
+    except Exception:
+        temp_val = 0.0
+    try:
+        pressure_val = float(pressure)
+    except Exception:
+        pressure_val = 0.0
+    try:
+        vibration_val = float(vibration)
+    except Exception:
+        vibration_val = 0.0
+
+    temp_normalized = min(max((temp_val - 60) / 50, 0), 1)
+    pressure_normalized = min(max((pressure_val - 80) / 45, 0), 1)
+    vibration_normalized = min(max(vibration_val / 1.2, 0), 1)
+
+    specific_failure_predictions = {}
+    failure_weights = MACHINE_FAILURE_WEIGHTS[machine_type]
+
+    for failure_type, weights in failure_weights.items():
+        # Calculate weighted score based on sensor readings
+        failure_score = (
+            temp_normalized * weights.get('temp_weight', 0) +
+            pressure_normalized * weights.get('pressure_weight', 0) +
+            vibration_normalized * weights.get('vibration_weight', 0)
+        )
+
+        # Deterministic scale to probability (no randomness)
+        failure_probability = min(max(failure_score, 0), 1)
+
+        # Estimate time to failure in hours: higher probability => shorter ETA
+        estimated_hours = max(1, int((1.0 - failure_probability) * 168))  # scale up to 1 week (168 hours)
+
+        specific_failure_predictions[failure_type] = {
+            "probability": failure_probability,
+            "risk_level": "critical" if failure_probability > 0.7 else 
+                        "high" if failure_probability > 0.5 else 
+                        "medium" if failure_probability > 0.3 else "low",
+            "estimated_time_to_failure_hours": estimated_hours
+        }
+
+    # Find the most likely failure type
+    most_likely_failure = max(specific_failure_predictions.items(), 
+                            key=lambda x: x[1]['probability'])
+
+    return {
+        "most_likely_failure": most_likely_failure[0],
+        "most_likely_failure_probability": most_likely_failure[1]['probability'],
+        "most_likely_failure_estimated_hours": most_likely_failure[1]['estimated_time_to_failure_hours'],
+        "specific_failure_predictions": specific_failure_predictions
+    }
+
 def get_machine_specific_prediction(machine_type: str, raw_input_data: dict) -> dict:
     """
     Get prediction with machine-specific failure type analysis
     """
     try:
-        # Ensure we have at least 3 rows for rolling features required by the model.
-        # If a single dict is provided, expand it into 3 similar timestamped rows.
-        if isinstance(raw_input_data, dict):
-            base = raw_input_data
-            now = datetime.utcnow()
-            history_for_prediction = []
-            for i in range(3):
-                # small deterministic offsets (no randomness)
-                history_for_prediction.append({
-                    'Timestamp': (now - timedelta(minutes=(2 - i))).isoformat(),
-                    'Temperature': base.get('temperature') or base.get('Temperature'),
-                    'Pressure': base.get('pressure') or base.get('Pressure'),
-                    'Vibration': base.get('vibration') or base.get('Vibration')
-                })
-        elif isinstance(raw_input_data, list):
-            if len(raw_input_data) >= 3:
-                history_for_prediction = raw_input_data
-            else:
-                # pad by repeating last element with adjusted timestamps
-                now = datetime.utcnow()
-                history_for_prediction = []
-                for i in range(3 - len(raw_input_data)):
-                    history_for_prediction.append({
-                        'Timestamp': (now - timedelta(minutes=(2 - i))).isoformat(),
-                        'Temperature': raw_input_data[0].get('temperature') or raw_input_data[0].get('Temperature'),
-                        'Pressure': raw_input_data[0].get('pressure') or raw_input_data[0].get('Pressure'),
-                        'Vibration': raw_input_data[0].get('vibration') or raw_input_data[0].get('Vibration')
-                    })
-                # append existing
-                for item in raw_input_data:
-                    history_for_prediction.append(item)
-        else:
-            history_for_prediction = []
-
-        # First get the general failure prediction (on padded/expanded history)
+        history_for_prediction = _expand_history(raw_input_data)
+
+        # First get the features of the latest reading (on padded/expanded history)
         try:
-            general_prediction = get_prediction(history_for_prediction) if history_for_prediction else get_prediction(raw_input_data)
+            features = _latest_features(history_for_prediction if history_for_prediction else raw_input_data)
         except Exception:
-            # If general prediction fails, continue with machine-specific heuristic only
-            general_prediction = {
-                "prediction": None,
-                "probability_no_failure": None,
-                "probability_failure": None
-            }
+            features = None
+
+        if features is not None:
+            return _predict_features(machine_type, features)
+
+        # If general prediction fails, continue with machine-specific heuristic only
+        general_prediction = {
+            "prediction": None,
+            "probability_no_failure": None,
+            "probability_failure": None,
+            "model_version": None
+        }
 
         # If no machine-specific weights available, return general prediction
         if machine_type not in MACHINE_FAILURE_WEIGHTS:
@@ -155,87 +452,12 @@ def get_machine_specific_prediction(machine_type: str, raw_input_data: dict) ->
                 "specific_failure_predictions": {}
             }
 
-        # Extract the latest reading (support dict or list of dicts)
-        if isinstance(raw_input_data, list) and raw_input_data:
-            latest = raw_input_data[-1]
-        elif isinstance(raw_input_data, dict):
-            latest = raw_input_data
-        elif isinstance(history_for_prediction, list) and history_for_prediction:
-            latest = history_for_prediction[-1]
-        else:
-            latest = {}
-
-        # Support either lowercase or Title-case keys
-        def _get_val(d, *keys, default=0):
-            for k in keys:
-                if k in d:
-                    return d[k]
-            # try lower-case keys
-            for k in keys:
-                if k.lower() in d:
-                    return d[k.lower()]
-            return default
-
-        temp = _get_val(latest, 'temperature', 'Temperature', default=0)
-        pressure = _get_val(latest, 'pressure', 'Pressure', default=0)
-        vibration = _get_val(latest, 'vibration', 'Vibration', default=0)
-
-        # Normalize sensor values (assuming normal ranges)
-        # Normalize using ranges similar to the training data:
-        # Temperature roughly 60-110 °C, Pressure roughly 80-125 (dataset units), Vibration roughly 0-1 mm/s
-        try:
-            temp_val = float(temp)
-        except Exception:
-            temp_val = 0.0
-        try:
-            pressure_val = float(pressure)
-        except Exception:
-            pressure_val = 0.0
-        try:
-            vibration_val = float(vibration)
-        except Exception:
-            vibration_val = 0.0
-
-        temp_normalized = min(max((temp_val - 60) / 50, 0), 1)
-        pressure_normalized = min(max((pressure_val - 80) / 45, 0), 1)
-        vibration_normalized = min(max(vibration_val / 1.2, 0), 1)
-
-        specific_failure_predictions = {}
-        failure_weights = MACHINE_FAILURE_WEIGHTS[machine_type]
-
-        for failure_type, weights in failure_weights.items():
-            # Calculate weighted score based on sensor readings
-            failure_score = (
-                temp_normalized * weights.get('temp_weight', 0) +
-                pressure_normalized * weights.get('pressure_weight', 0) +
-                vibration_normalized * weights.get('vibration_weight', 0)
-            )
-
-            # Deterministic scale to probability (no randomness)
-            failure_probability = min(max(failure_score, 0), 1)
-
-            # Estimate time to failure in hours: higher probability => shorter ETA
-            estimated_hours = max(1, int((1.0 - failure_probability) * 168))  # scale up to 1 week (168 hours)
-
-            specific_failure_predictions[failure_type] = {
-                "probability": failure_probability,
-                "risk_level": "critical" if failure_probability > 0.7 else 
-                            "high" if failure_probability > 0.5 else 
-                            "medium" if failure_probability > 0.3 else "low",
-                "estimated_time_to_failure_hours": estimated_hours
-            }
-
-        # Find the most likely failure type
-        most_likely_failure = max(specific_failure_predictions.items(), 
-                                key=lambda x: x[1]['probability'])
+        latest = _latest_reading(raw_input_data, history_for_prediction)
 
         return {
             **general_prediction,
             "machine_type": machine_type,
-            "most_likely_failure": most_likely_failure[0],
-            "most_likely_failure_probability": most_likely_failure[1]['probability'],
-            "most_likely_failure_estimated_hours": most_likely_failure[1]['estimated_time_to_failure_hours'],
-            "specific_failure_predictions": specific_failure_predictions
+            **_machine_failure_analysis(machine_type, latest)
         }
         
     except Exception as e:
@@ -246,4 +468,88 @@ def get_machine_specific_prediction(machine_type: str, raw_input_data: dict) ->
             **general_prediction,
             "machine_type": machine_type,
             "error": f"Machine-specific analysis failed: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+def get_machine_prediction_from_features(machine_type: str, raw_features) -> dict:
+    """
+    Machine-specific prediction from a precomputed raw feature vector, e.g. the output of
+    ml.feature_state.RollingFeatureState.features(). Skips all window parsing and feature engineering.
+    """
+    try:
+        return _predict_features(machine_type, np.asarray(raw_features, dtype=np.float64))
+    except ValueError as ve:
+        print(f"Data processing error: {ve}")
+        raise ValueError(f"Invalid input data for prediction: {ve}")
+    except Exception as e:
+        print(f"Error during prediction: {e}")
+        raise RuntimeError(f"An error occurred during prediction: {e}")
+
+def get_machine_predictions_from_features(machine_types: list, feature_rows, direct: bool = False) -> list:
+    """
+    Machine-specific predictions for many precomputed raw feature rows (one per machine type),
+    scored with a single forest call; see get_machine_prediction_from_features. direct=True
+    scores in the calling thread without the prediction cache, e.g. for fleet replays.
+    """
+    try:
+        feature_rows = np.asarray(feature_rows, dtype=np.float64).reshape(len(machine_types), -1)
+        return _predict_feature_rows(list(machine_types), feature_rows, direct=direct)
+    except ValueError as ve:
+        print(f"Data processing error: {ve}")
+        raise ValueError(f"Invalid input data for prediction: {ve}")
+    except Exception as e:
+        print(f"Error during prediction: {e}")
+        raise RuntimeError(f"An error occurred during prediction: {e}")
+
+def risk_level_for(failure_probability: float) -> str:
+    """Fleet risk level of a failure probability (drives the vitals UI and sampling cadence)"""
+    return ('critical' if failure_probability > 0.7
+            else 'high' if failure_probability >= 0.5
+            else 'medium' if failure_probability >= 0.3
+            else 'low')
+
+def get_batch_prediction(windows: list) -> list:
+    """
+    Score many machine windows with a single forest call (cached windows skip the forest).
+
+    Each window is either a reading / list of readings (general prediction) or a dict of the form
+    {"machine_type": "...", "readings": [...]} which also gets the machine-specific analysis.
+    Invalid windows are reported individually and do not fail the rest of the batch.
+    """
+    if not isinstance(windows, list):
+        raise ValueError("Batch input must be a list of windows.")
+    if len(windows) > MAX_BATCH_WINDOWS:
+        raise ValueError(f"Batch too large: {len(windows)} windows (maximum is {MAX_BATCH_WINDOWS}).")
+
+    results = [None] * len(windows)
+    pending = []  # (index, machine_type) for windows that produced features
+    feature_rows = []
+
+    for index, window in enumerate(windows):
+        machine_type = None
+        readings = window
+        if isinstance(window, dict) and 'readings' in window:
+            machine_type = window.get('machine_type')
+            readings = window['readings']
+
+        try:
+            if machine_type is not None and machine_type not in MACHINE_FAILURE_WEIGHTS:
+                raise ValueError(f"Invalid machine type. Must be one of: {list(MACHINE_FAILURE_WEIGHTS)}")
+
+            # Machine-specific windows are padded the same way as the single-window endpoint
+            history = _expand_history(readings) if machine_type else readings
+            feature_rows.append(_latest_features(history))
+            pending.append((index, machine_type or None))
+        except Exception as e:
+            results[index] = {"index": index, "error": f"Invalid input data for prediction: {e}"}
+
+    if feature_rows:
+        try:
+            predictions = _predict_feature_rows([mt for _, mt in pending], np.vstack(feature_rows))
+        except Exception as e:
+            print(f"Error during batch prediction: {e}")
+            raise RuntimeError(f"An error occurred during batch prediction: {e}")
+
+        for (index, _), prediction in zip(pending, predictions):
+            results[index] = {"index": index, **prediction}
+
+    return results
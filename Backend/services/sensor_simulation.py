@@ -5,10 +5,12 @@ import time
 import threading
 import smtplib
 import os
+import json
 from datetime import datetime
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
+from services.simulation_clock import SIMULATION_SEED
 
 # Email imports - fix for Python 3.13
 try:
@@ -20,6 +22,12 @@ except ImportError:
     EMAIL_AVAILABLE = False
     print("Email functionality not available")
 
+# Seconds between steps of the sensor random walk (readers only ever see the latest step)
+SENSOR_TICK_SECONDS = float(os.getenv('SENSOR_TICK_SECONDS', '1'))
+
+# Sensor values the simulation starts from (all in the normal range)
+STARTING_VALUES = {'temperature': 45.0, 'pressure': 100.0, 'vibration': 1.0}
+
 class SensorStatus(Enum):
     NORMAL = "normal"
     CAUTION = "caution"
@@ -35,17 +43,35 @@ class SensorRange:
     critical_min: float
     critical_max: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SensorReading:
     """Individual sensor reading"""
     value: float
     status: SensorStatus
     timestamp: datetime
 
+    def to_dict(self) -> Dict:
+        return {
+            'value': self.value,
+            'status': self.status.value,
+            'timestamp': self.timestamp.isoformat()
+        }
+
 class SensorSimulator:
-    """Advanced sensor simulation with configurable ranges and alert system"""
+    """
+    Advanced sensor simulation with configurable ranges and alert system.
+
+    tick() advances the random walk, publishes the readings as an immutable snapshot (dict and
+    pre-serialized JSON) and then checks alerts; start_ticker() calls it every
+    SENSOR_TICK_SECONDS. get_current_readings() only returns the latest snapshot, so how often
+    clients poll changes neither the simulation speed nor the alert volume.
+    """
     
-    def __init__(self):
+    def __init__(self, seed=None, clock=time.time):
+        # Own random stream (reproducible with a seed) and clock for forced-mode timing
+        self.random = random.Random(seed)
+        self.clock = clock
+        
         # Define sensor ranges
         self.sensor_ranges = {
             'temperature': SensorRange(
@@ -66,11 +92,7 @@ class SensorSimulator:
         }
         
         # Current sensor values
-        self.current_values = {
-            'temperature': 45.0,  # Start in normal range
-            'pressure': 100.0,    # Start in normal range
-            'vibration': 1.0      # Start in normal range
-        }
+        self.current_values = dict(STARTING_VALUES)
         
         # Simulation control
         self.simulation_mode = "normal"  # normal, caution, critical
@@ -93,6 +115,13 @@ class SensorSimulator:
                 'maintenance@company.com'
             ]
         }
+        
+        # Latest published readings; replaced (never modified) under _state_lock by tick() / mode changes
+        self._state_lock = threading.Lock()
+        self._ticker = None
+        self._ticker_stop = threading.Event()
+        self.ticks = 0
+        self._publish()
     
     def get_sensor_status(self, sensor_type: str, value: float) -> SensorStatus:
         """Determine sensor status based on value and ranges"""
@@ -111,52 +140,71 @@ class SensorSimulator:
     def generate_normal_variation(self, current_value: float, sensor_type: str) -> float:
         """Generate small variations for normal operation"""
         # Small random variation (±1-3% of current value)
-        variation_percent = random.uniform(-0.03, 0.03)
+        variation_percent = self.random.uniform(-0.03, 0.03)
         new_value = current_value * (1 + variation_percent)
         
         # Ensure we stay within reasonable bounds
         ranges = self.sensor_ranges[sensor_type]
         if new_value < ranges.normal_min:
-            new_value = ranges.normal_min + random.uniform(0, 5)
+            new_value = ranges.normal_min + self.random.uniform(0, 5)
         elif new_value > ranges.normal_max:
-            new_value = ranges.normal_max - random.uniform(0, 5)
+            new_value = ranges.normal_max - self.random.uniform(0, 5)
             
         return round(new_value, 2)
     
     def generate_caution_spike(self, sensor_type: str) -> float:
         """Generate values in caution range"""
         ranges = self.sensor_ranges[sensor_type]
-        return round(random.uniform(ranges.caution_min, ranges.caution_max), 2)
+        return round(self.random.uniform(ranges.caution_min, ranges.caution_max), 2)
     
     def generate_critical_spike(self, sensor_type: str) -> float:
         """Generate values in critical range"""
         ranges = self.sensor_ranges[sensor_type]
-        return round(random.uniform(ranges.critical_min, ranges.critical_max), 2)
+        return round(self.random.uniform(ranges.critical_min, ranges.critical_max), 2)
     
     def force_caution_mode(self, duration_seconds: int = 300):
         """Force sensors into caution mode for specified duration"""
-        self.forced_mode = "caution"
-        self.forced_mode_duration = duration_seconds
-        self.forced_mode_start_time = time.time()
-        
-        # Immediately spike values to caution range
-        for sensor_type in self.current_values:
-            self.current_values[sensor_type] = self.generate_caution_spike(sensor_type)
+        with self._state_lock:
+            self.forced_mode = "caution"
+            self.forced_mode_duration = duration_seconds
+            self.forced_mode_start_time = self.clock()
+            
+            # Immediately spike values to caution range
+            for sensor_type in self.current_values:
+                self.current_values[sensor_type] = self.generate_caution_spike(sensor_type)
+            self._publish()
     
     def force_critical_mode(self, duration_seconds: int = 180):
         """Force sensors into critical mode for specified duration"""
-        self.forced_mode = "critical"
-        self.forced_mode_duration = duration_seconds
-        self.forced_mode_start_time = time.time()
-        
-        # Immediately spike values to critical range
-        for sensor_type in self.current_values:
-            self.current_values[sensor_type] = self.generate_critical_spike(sensor_type)
+        with self._state_lock:
+            self.forced_mode = "critical"
+            self.forced_mode_duration = duration_seconds
+            self.forced_mode_start_time = self.clock()
+            
+            # Immediately spike values to critical range
+            for sensor_type in self.current_values:
+                self.current_values[sensor_type] = self.generate_critical_spike(sensor_type)
+            self._publish()
+    
+    def reset_normal_mode(self):
+        """Drop any forced mode; the next tick's normal variation brings the values back in range"""
+        with self._state_lock:
+            self.forced_mode = None
+            self.forced_mode_start_time = None
+            self.forced_mode_duration = 0
+            self.simulation_mode = "normal"
+            self._publish()
+
+    def reset_values(self):
+        """Put the sensors back at their starting values (the current mode is kept)"""
+        with self._state_lock:
+            self.current_values = dict(STARTING_VALUES)
+            self._publish()
     
     def check_forced_mode_expiry(self):
         """Check if forced mode should expire"""
         if self.forced_mode and self.forced_mode_start_time:
-            elapsed = time.time() - self.forced_mode_start_time
+            elapsed = self.clock() - self.forced_mode_start_time
             if elapsed >= self.forced_mode_duration:
                 self.forced_mode = None
                 self.forced_mode_start_time = None
@@ -182,7 +230,7 @@ class SensorSimulator:
                 else:
                     # Small variations within caution range
                     ranges = self.sensor_ranges[sensor_type]
-                    variation = random.uniform(-5, 5)
+                    variation = self.random.uniform(-5, 5)
                     new_value = self.current_values[sensor_type] + variation
                     self.current_values[sensor_type] = max(ranges.caution_min, 
                                                           min(ranges.caution_max, new_value))
@@ -193,25 +241,61 @@ class SensorSimulator:
                 else:
                     # Small variations within critical range
                     ranges = self.sensor_ranges[sensor_type]
-                    variation = random.uniform(-3, 8)
+                    variation = self.random.uniform(-3, 8)
                     new_value = self.current_values[sensor_type] + variation
                     self.current_values[sensor_type] = max(ranges.critical_min,
                                                           min(ranges.critical_max, new_value))
     
-    def get_current_readings(self) -> Dict:
-        """Get current sensor readings with status"""
-        self.update_sensor_values()
+    def tick(self) -> Dict:
+        """Advance the simulation one step, publish the new readings and send any alerts"""
+        with self._state_lock:
+            self.update_sensor_values()
+            readings = self._publish()
+            self.ticks += 1
+        
+        # Check for alerts (outside the lock: SMTP can take seconds)
+        self.check_and_send_alerts(readings)
         
-        readings = {}
+        return readings
+    
+    def get_current_readings(self) -> Dict:
+        """Latest published sensor readings with status (no side effects; do not modify)"""
+        return self._readings
+    
+    def get_current_readings_json(self) -> str:
+        """get_current_readings() serialized once per tick"""
+        return self._readings_json
+    
+    def start_ticker(self, interval: float = SENSOR_TICK_SECONDS):
+        """Tick every `interval` seconds on a daemon thread"""
+        if self._ticker is not None and self._ticker.is_alive():
+            return
+        self._ticker_stop.clear()
+        self._ticker = threading.Thread(target=self._run_ticker, args=(interval,), name='sensor-ticker', daemon=True)
+        self._ticker.start()
+    
+    def stop_ticker(self):
+        self._ticker_stop.set()
+        if self._ticker is not None:
+            self._ticker.join()
+            self._ticker = None
+    
+    def _run_ticker(self, interval: float):
+        while not self._ticker_stop.wait(interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[Sensor Simulator] Tick error: {e}")
+    
+    def _publish(self) -> Dict:
+        """Build readings from the current values and swap them in as the snapshot; caller holds _state_lock"""
+        now = datetime.now()
+        sensor_readings = {}
         overall_status = SensorStatus.NORMAL
         
         for sensor_type, value in self.current_values.items():
             status = self.get_sensor_status(sensor_type, value)
-            readings[sensor_type] = {
-                'value': value,
-                'status': status.value,
-                'timestamp': datetime.now().isoformat()
-            }
+            sensor_readings[sensor_type] = SensorReading(value, status, now)
             
             # Determine overall status (worst case)
             if status == SensorStatus.CRITICAL:
@@ -219,16 +303,18 @@ class SensorSimulator:
             elif status == SensorStatus.CAUTION and overall_status != SensorStatus.CRITICAL:
                 overall_status = SensorStatus.CAUTION
         
+        # The JSON shape (dicts) is built once here, for every reader until the next tick
+        readings = {sensor_type: reading.to_dict() for sensor_type, reading in sensor_readings.items()}
         readings['overall_status'] = overall_status.value
         readings['forced_mode'] = self.forced_mode
         readings['mode_remaining'] = (
-            max(0, self.forced_mode_duration - (time.time() - self.forced_mode_start_time))
+            max(0, self.forced_mode_duration - (self.clock() - self.forced_mode_start_time))
             if self.forced_mode_start_time else 0
         )
         
-        # Check for alerts
-        self.check_and_send_alerts(readings)
-        
+        self.sensor_readings = sensor_readings
+        self._readings = readings
+        self._readings_json = json.dumps(readings)
         return readings
     
     def should_send_alert(self, sensor_type: str, status: SensorStatus) -> bool:
@@ -546,4 +632,4 @@ class SensorSimulator:
         return html
 
 # Global simulator instance
-simulator = SensorSimulator()
+simulator = SensorSimulator(seed=SIMULATION_SEED)
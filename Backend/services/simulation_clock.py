@@ -0,0 +1,71 @@
+# backend/services/simulation_clock.py
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Simulated seconds per wall-clock second; 0 = fast-forward (sleeping only advances the clock)
+SIMULATION_SPEED = float(os.getenv('SIMULATION_SPEED', '1'))
+
+# Seed for the fleet random walk and scripted episodes; unset = a fresh run every time
+SIMULATION_SEED = int(os.environ['SIMULATION_SEED']) if os.getenv('SIMULATION_SEED') else None
+
+
+class SimulationClock:
+    """
+    Simulated time in seconds since `start` (a datetime), for the simulation worker and replays.
+
+    At speed s the clock runs s times faster than the wall clock and sleep(x) waits x / s real
+    seconds. At speed 0 (fast-forward) the clock only moves when someone sleeps or advances it,
+    so a month of simulation takes as long as the work done in it. Callable, so it can be passed
+    as a TickScheduler clock.
+    """
+
+    def __init__(self, speed: float = SIMULATION_SPEED, start: datetime = None):
+        if speed < 0:
+            raise ValueError("Simulation speed must be >= 0 (0 = fast-forward)")
+        self.start = start or datetime.utcnow()
+        self._lock = threading.Lock()
+        self._sim = 0.0
+        self._real = time.monotonic()
+        self.speed = float(speed)
+
+    @property
+    def fast_forward(self) -> bool:
+        return self.speed == 0
+
+    def now(self) -> float:
+        """Simulated seconds since start"""
+        if self.fast_forward:
+            return self._sim
+        return self._sim + (time.monotonic() - self._real) * self.speed
+
+    __call__ = now
+
+    def datetime(self, seconds: float = None) -> datetime:
+        """Simulated wall time, now or at `seconds` since start"""
+        return self.start + timedelta(seconds=self.now() if seconds is None else seconds)
+
+    def sleep(self, seconds: float):
+        """Wait `seconds` of simulated time"""
+        if seconds <= 0:
+            return
+        if self.fast_forward:
+            self.advance(seconds)
+        else:
+            time.sleep(seconds / self.speed)
+
+    def advance(self, seconds: float):
+        """Jump the clock forward"""
+        with self._lock:
+            self._sim += seconds
+
+    def set_speed(self, speed: float):
+        """Change speed from now on, without a jump in simulated time"""
+        if speed < 0:
+            raise ValueError("Simulation speed must be >= 0 (0 = fast-forward)")
+        with self._lock:
+            self._sim = self.now()
+            self._real = time.monotonic()
+            self.speed = float(speed)
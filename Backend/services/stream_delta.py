@@ -0,0 +1,115 @@
+# backend/services/stream_delta.py
+
+import os
+
+# Stream events between two keyframes (full fleet state); the events in between carry only changes
+STREAM_KEYFRAME_INTERVAL = int(os.getenv('STREAM_KEYFRAME_INTERVAL', '30'))
+
+_MISSING = object()
+
+
+def diff_fields(old: dict, new: dict) -> dict:
+    """Fields of `new` that differ from `old`; dict-valued fields are diffed one level down"""
+    changed = {}
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if value == previous:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            value = {k: v for k, v in value.items() if previous.get(k, _MISSING) != v}
+        changed[key] = value
+    return changed
+
+
+def merge_change(entry: dict, change: dict) -> dict:
+    """A new entry: `entry` with a delta change (or a later change) merged in; neither is modified"""
+    merged = dict(entry)
+    for field, value in change.items():
+        previous = merged.get(field)
+        merged[field] = {**previous, **value} if isinstance(value, dict) and isinstance(previous, dict) else value
+    return merged
+
+
+def apply_delta(state: dict, machines: list, key: str = 'machine_id') -> dict:
+    """Merge the machines of a delta event into `state` (id -> entry), as a stream client would"""
+    for change in machines:
+        state[change[key]] = merge_change(state.get(change[key], {}), change)
+    return state
+
+
+class DeltaEncoder:
+    """
+    Turns the per-machine stream entries of each tick into delta or keyframe messages.
+
+    A 'delta' carries, per machine, the id plus only the fields that changed since the entry last
+    sent for it (nested dicts such as 'vitals' only their changed keys; a machine seen for the
+    first time in full); machines without changes are left out, and a tick without any change
+    yields no message. Every `keyframe_interval`-th message is a 'keyframe' with the full last
+    sent entry of every machine, so a client can always resynchronize; resync() makes the next
+    message a keyframe early. keyframe() is also what a newly connected client starts from. `changes` holds the last update()'s changes by id.
+
+    Not thread-safe: the caller serializes update() and keyframe() (the stream hub's lock), so
+    that a keyframe always matches the event id it is sent with.
+    """
+
+    def __init__(self, keyframe_interval: int = STREAM_KEYFRAME_INTERVAL, key: str = 'machine_id'):
+        if keyframe_interval < 1:
+            raise ValueError("Keyframe interval must be at least 1")
+        self.keyframe_interval = keyframe_interval
+        self.key = key
+        self.state = {}
+        self.changes = {}
+        self.timestamp = None
+        self.since_keyframe = 0
+        self.deltas = 0
+        self.keyframes = 0
+        self.entries_in = 0
+        self.entries_out = 0
+
+    def update(self, entries: list, timestamp: str):
+        """Record a tick's entries; returns the message to publish for it, or None"""
+        changes = self.changes = {}
+        state = self.state
+        for entry in entries:
+            entry_id = entry[self.key]
+            previous = state.get(entry_id)
+            state[entry_id] = entry
+            if previous is None:
+                changes[entry_id] = entry
+                continue
+            changed = diff_fields(previous, entry)
+            if changed:
+                changes[entry_id] = {self.key: entry_id, **changed}
+        self.entries_in += len(entries)
+        self.timestamp = timestamp
+
+        if not changes:
+            return None
+        if self.since_keyframe + 1 >= self.keyframe_interval:
+            return self.keyframe(publish=True)
+        self.since_keyframe += 1
+        self.deltas += 1
+        self.entries_out += len(changes)
+        return {'type': 'delta', 'data': {'timestamp': timestamp, 'machines': list(changes.values())}}
+
+    def resync(self):
+        """Send the next message as a keyframe, e.g. after updates were lost before reaching update()"""
+        self.since_keyframe = self.keyframe_interval
+
+    def keyframe(self, publish: bool = False) -> dict:
+        """The full last sent state; publish=True when it goes out as a periodic keyframe event"""
+        if publish:
+            self.since_keyframe = 0
+            self.keyframes += 1
+            self.entries_out += len(self.state)
+        return {'type': 'keyframe', 'data': {'timestamp': self.timestamp, 'machines': list(self.state.values())}}
+
+    def stats(self) -> dict:
+        return {
+            'machines': len(self.state),
+            'keyframe_interval': self.keyframe_interval,
+            'deltas': self.deltas,
+            'keyframes': self.keyframes,
+            'entries_in': self.entries_in,
+            'entries_out': self.entries_out
+        }
@@ -0,0 +1,285 @@
+# backend/services/stream_filters.py
+
+import os
+import threading
+import time
+from services.stream_delta import merge_change
+from services.stream_hub import StreamHub, encode_event
+
+# Lowest to highest, as risk_level_for() grades a failure probability
+RISK_ORDER = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+# Seconds a filtered stream is kept without subscribers (so a reconnecting client can still resume)
+STREAM_CHANNEL_IDLE_SECONDS = float(os.getenv('STREAM_CHANNEL_IDLE_SECONDS', '60'))
+
+
+class StreamFilter:
+    """
+    What a stream client subscribed to: machine ids, machine type and location (matched against
+    the registry once, when its channel is created), minimum risk level (checked per update, as
+    a machine's risk changes) and maximum events per second.
+    """
+
+    __slots__ = ('machine_ids', 'machine_type', 'location', 'min_risk', 'max_rate')
+
+    def __init__(self, machine_ids=None, machine_type=None, location=None, min_risk=None, max_rate=None):
+        if min_risk is not None and min_risk not in RISK_ORDER:
+            raise ValueError(f"Unknown risk level '{min_risk}'. Valid: {list(RISK_ORDER)}")
+        if max_rate is not None and not max_rate > 0:
+            raise ValueError("max_rate must be a positive number of updates per second")
+        self.machine_ids = frozenset(machine_ids) if machine_ids else None
+        self.machine_type = machine_type
+        self.location = location
+        self.min_risk = min_risk
+        self.max_rate = max_rate
+
+    @classmethod
+    def from_args(cls, args):
+        """From stream query parameters (?machine_id=1,2&type=&location=&min_risk=&max_rate=); None if unfiltered"""
+        machine_ids = [mid for value in args.getlist('machine_id') for mid in value.split(',') if mid]
+        max_rate = args.get('max_rate')
+        if max_rate is not None:
+            try:
+                max_rate = float(max_rate)
+            except ValueError:
+                raise ValueError("max_rate must be a positive number of updates per second")
+        stream_filter = cls(machine_ids, args.get('type') or None, args.get('location') or None,
+                            args.get('min_risk') or None, max_rate)
+        return None if stream_filter.key == (None,) * 5 else stream_filter
+
+    @property
+    def key(self) -> tuple:
+        return (self.machine_ids, self.machine_type, self.location, self.min_risk, self.max_rate)
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the filter names machines (ids, type or location), so updates reach it through the index"""
+        return self.machine_ids is not None or self.machine_type is not None or self.location is not None
+
+    def accepts(self, entry: dict) -> bool:
+        """Whether a machine's current stream entry passes the risk filter"""
+        if self.min_risk is None:
+            return True
+        prediction = entry.get('prediction')
+        return prediction is not None and RISK_ORDER.get(prediction.get('risk_level'), -1) >= RISK_ORDER[self.min_risk]
+
+    def to_dict(self) -> dict:
+        return {
+            'machine_ids': sorted(self.machine_ids) if self.machine_ids else None,
+            'type': self.machine_type,
+            'location': self.location,
+            'min_risk': self.min_risk,
+            'max_rate': self.max_rate
+        }
+
+
+class StreamChannel:
+    """
+    The stream of every client with the same filter: its own StreamHub (event ids, backlog,
+    subscriber queues), so each filtered frame is encoded once per filter, not per client.
+
+    `members` are the machines its clients currently hold. A machine that starts passing the
+    filter is sent in full, one that stops passing it is listed under 'removed'; changes are
+    collected in `pending` and published at most max_rate times a second (changes held back are
+    flushed by FilteredStreams once the interval has passed, even if no other update comes).
+    """
+
+    def __init__(self, stream_filter: StreamFilter, lock, members=()):
+        self.filter = stream_filter
+        self.hub = StreamHub(lock=lock)
+        self.members = set(members)
+        self.pending = {}
+        self.removed = set()
+        self.min_interval = 1.0 / stream_filter.max_rate if stream_filter.max_rate else 0.0
+        self.last_flush = 0.0
+        self.idle_since = time.monotonic()
+        self.coalesced = 0
+        self._keyframe = (None, None)
+
+    def offer(self, machine_id, change: dict, entry: dict):
+        """A machine's change from the last update, with its full entry after it"""
+        if self.filter.accepts(entry):
+            if machine_id in self.members:
+                pending = self.pending.get(machine_id)
+                self.pending[machine_id] = merge_change(pending, change) if pending is not None else change
+                self.coalesced += pending is not None
+            else:
+                self.members.add(machine_id)
+                self.pending[machine_id] = entry
+                self.removed.discard(machine_id)
+        elif machine_id in self.members:
+            self.members.discard(machine_id)
+            self.pending.pop(machine_id, None)
+            self.removed.add(machine_id)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.pending or self.removed)
+
+    def flush(self, now: float, timestamp: str) -> bool:
+        """Publish the pending changes unless max_rate holds them back; False while they are held"""
+        if now - self.last_flush < self.min_interval:
+            return False
+        data = {'timestamp': timestamp, 'machines': list(self.pending.values())}
+        if self.removed:
+            data['removed'] = sorted(self.removed)
+        self.hub.publish({'type': 'delta', 'data': data})
+        self.pending = {}
+        self.removed = set()
+        self.last_flush = now
+        return True
+
+    def keyframe_frame(self, state: dict, timestamp: str, event_id: int) -> bytes:
+        """Keyframe of the members' entries as of event_id (cached per event id); caller holds the lock"""
+        cached, frame = self._keyframe
+        if cached != event_id:
+            machines = [state[mid] for mid in self.members if mid in state]
+            frame = encode_event({'type': 'keyframe', 'data': {'timestamp': timestamp, 'machines': machines}},
+                                 event_id or None)
+            self._keyframe = (event_id, frame)
+        return frame
+
+    def stats(self) -> dict:
+        return {
+            'filter': self.filter.to_dict(),
+            'members': len(self.members),
+            'coalesced': self.coalesced,
+            **{field: value for field, value in self.hub.stats().items() if field != 'clients'}
+        }
+
+
+class FilteredStreams:
+    """
+    Channels of the filtered vitals streams, fed from a DeltaEncoder's changes.
+
+    Clients with equal filters share one channel. Channels that name machines (ids, type,
+    location) are indexed by machine id - matched once through the registry's `find` when the
+    channel is created - so an update only visits the channels of the machines it changed
+    (plus the channels filtering on risk / rate alone), never the subscribers one by one.
+    Channels without subscribers are dropped after `idle_seconds`. Changes max_rate holds back
+    are flushed by a timer armed for the earliest held channel, not left for the next update.
+
+    Not thread-safe on its own: update() and channel() run under `lock`, the lock the
+    unfiltered stream hub and the encoder are used under.
+    """
+
+    def __init__(self, encoder, find, lock, idle_seconds: float = STREAM_CHANNEL_IDLE_SECONDS):
+        self.encoder = encoder
+        self.find = find
+        self.lock = lock
+        self.idle_seconds = idle_seconds
+        self._channels = {}
+        self._by_machine = {}
+        self._unindexed = []
+        self._held = set()
+        self._timer = None
+        self._timer_due = None
+        self._last_sweep = time.monotonic()
+        self.offers = 0
+
+    def channel(self, stream_filter: StreamFilter) -> StreamChannel:
+        """The channel of a filter, created (and indexed) on first use"""
+        with self.lock:
+            channel = self._channels.get(stream_filter.key)
+            if channel is not None:
+                channel.idle_since = time.monotonic()
+                return channel
+            state = self.encoder.state
+            if stream_filter.indexed:
+                fields = {field: value for field, value in (('type', stream_filter.machine_type),
+                                                            ('location', stream_filter.location)) if value}
+                machine_ids = [machine['id'] for machine in self.find(**fields)]
+                if stream_filter.machine_ids is not None:
+                    machine_ids = [mid for mid in machine_ids if mid in stream_filter.machine_ids]
+            else:
+                machine_ids = list(state)
+            channel = StreamChannel(stream_filter, self.lock,
+                                    [mid for mid in machine_ids if mid in state and stream_filter.accepts(state[mid])])
+            self._channels[stream_filter.key] = channel
+            if stream_filter.indexed:
+                for mid in machine_ids:
+                    self._by_machine.setdefault(mid, []).append(channel)
+            else:
+                self._unindexed.append(channel)
+            return channel
+
+    def keyframe(self, channel: StreamChannel):
+        """Keyframe callable for subscribing to a channel"""
+        return lambda event_id: channel.keyframe_frame(self.encoder.state, self.encoder.timestamp, event_id)
+
+    def subscribe(self, stream_filter: StreamFilter, last_event_id: int = None):
+        """Subscription to the channel of a filter"""
+        with self.lock:
+            channel = self.channel(stream_filter)
+            return channel.hub.subscribe(self.keyframe(channel), last_event_id)
+
+    def update(self, timestamp: str):
+        """Route the encoder's last changes to the channels they concern and flush them; caller holds the lock"""
+        state = self.encoder.state
+        held = self._held
+        if self._channels:
+            unindexed = self._unindexed
+            by_machine = self._by_machine
+            for mid, change in self.encoder.changes.items():
+                entry = state[mid]
+                for channel in by_machine.get(mid, ()):
+                    channel.offer(mid, change, entry)
+                    held.add(channel)
+                for channel in unindexed:
+                    channel.offer(mid, change, entry)
+                    held.add(channel)
+                self.offers += len(by_machine.get(mid, ())) + len(unindexed)
+        now = time.monotonic()
+        self._flush_held(now, timestamp)
+        if now - self._last_sweep >= min(self.idle_seconds, 10.0):
+            self._sweep(now)
+
+    def _flush_held(self, now: float, timestamp: str):
+        """Flush the channels max_rate lets through and arm the timer for the rest; caller holds the lock"""
+        held = self._held
+        for channel in list(held):
+            if not channel.dirty or channel.flush(now, timestamp):
+                held.discard(channel)
+        if not held:
+            return
+        due = min(channel.last_flush + channel.min_interval for channel in held)
+        if self._timer is None or due < self._timer_due:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer_due = due
+            self._timer = threading.Timer(max(due - now, 0.0), self._flush_timer, args=(due,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_timer(self, due: float):
+        with self.lock:
+            # A timer replaced by an earlier one may still get here: it flushes, but leaves the new one armed
+            if self._timer_due == due:
+                self._timer = None
+            self._flush_held(time.monotonic(), self.encoder.timestamp)
+
+    def _sweep(self, now: float):
+        """Drop channels that have had no subscribers for idle_seconds"""
+        self._last_sweep = now
+        for key, channel in list(self._channels.items()):
+            if channel.hub.subscribers:
+                channel.idle_since = now
+            elif now - channel.idle_since >= self.idle_seconds:
+                del self._channels[key]
+                self._held.discard(channel)
+                if channel in self._unindexed:
+                    self._unindexed.remove(channel)
+                for channels in self._by_machine.values():
+                    if channel in channels:
+                        channels.remove(channel)
+
+    def stats(self) -> dict:
+        channels = list(self._channels.values())
+        return {
+            'channels': len(channels),
+            'indexed_machines': sum(1 for channels in self._by_machine.values() if channels),
+            'unindexed_channels': len(self._unindexed),
+            'offers': self.offers,
+            'subscribers': sum(channel.hub.subscribers for channel in channels),
+            'streams': [channel.stats() for channel in channels]
+        }
@@ -0,0 +1,237 @@
+# backend/services/stream_hub.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Frames each stream client may have waiting; a client that falls further behind is resynchronized
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', '32'))
+
+# Published events kept for clients that reconnect with Last-Event-ID
+STREAM_BACKLOG = int(os.getenv('STREAM_BACKLOG', '256'))
+
+
+def encode_event(message: dict, event_id: int = None) -> bytes:
+    """One Server-Sent Events frame carrying `message` as JSON (and `event_id` as its id)"""
+    frame = b'data: ' + json.dumps(message).encode() + b'\n\n'
+    return frame if event_id is None else b'id: %d\n' % event_id + frame
+
+
+def frame_event_id(frame: bytes):
+    """The id of an encoded frame, None if it has none"""
+    return int(frame[4:frame.index(b'\n')]) if frame.startswith(b'id: ') else None
+
+
+# Frames that never change, encoded once for every client
+CONNECTED_FRAME = encode_event({'type': 'connected', 'message': 'Connected to vitals stream'})
+HEARTBEAT_FRAME = encode_event({'type': 'heartbeat'})
+
+
+class Subscription:
+    """
+    One stream client: a bounded queue of frames.
+
+    Events build on each other (deltas), so a client must not silently miss one: when its queue
+    overflows, everything queued is dropped and the next get() resynchronizes - replays what it
+    missed from the hub's backlog, or starts over from `initial` (a fresh keyframe) - and then
+    skips frames it has already been given.
+
+    `notify(subscription)`, if given, is called (under the hub's lock) whenever frames arrive
+    for a subscription that was drained, so one consumer can wait on many subscriptions.
+    """
+
+    def __init__(self, hub, maxsize: int, initial=None, last_id: int = 0, notify=None):
+        self.hub = hub
+        self.maxsize = maxsize
+        self.initial = initial
+        self.last_id = last_id
+        self.notify = notify
+        self._queue = deque()
+        self._replay = deque()
+        self._resync = False
+        self._ready = threading.Event()
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.max_backlog = 0
+
+    def put(self, frame: bytes) -> bool:
+        """Queue a frame; False if the queue overflowed and was dropped for a resync"""
+        overflow = len(self._queue) >= self.maxsize
+        if overflow:
+            self.dropped += len(self._queue)
+            self._queue.clear()
+            # Set before the frame is queued: whoever gets that frame also sees the flag
+            self._resync = True
+        self._queue.append(frame)
+        if len(self._queue) > self.max_backlog:
+            self.max_backlog = len(self._queue)
+        # Setting an Event takes its lock; a client that has not woken up yet needs no second wake-up
+        if not self._ready.is_set():
+            self._ready.set()
+            if self.notify is not None:
+                self.notify(self)
+        return not overflow
+
+    def get(self, timeout: float = None):
+        """Next frame, or None if none arrived within timeout"""
+        while True:
+            if self._resync:
+                self._resync = False
+                frames, self.last_id = self.hub.catch_up(self.initial, self.last_id)
+                self._replay.extend(frames)
+                self.resyncs += 1
+            if self._replay:
+                self.delivered += 1
+                return self._replay.popleft()
+            try:
+                frame = self._queue.popleft()
+            except IndexError:
+                if not self._ready.wait(timeout):
+                    return None
+                self._ready.clear()
+                continue
+            if self._resync:
+                # Queued after an overflow; the resync covers it
+                continue
+            event_id = frame_event_id(frame)
+            if event_id is not None:
+                if event_id <= self.last_id:
+                    continue
+                self.last_id = event_id
+            self.delivered += 1
+            return frame
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class StreamHub:
+    """
+    Pub/sub fan-out for the vitals stream.
+
+    publish() gives a message the next event id and encodes it into its SSE frame once; every
+    subscriber queues (and its client writes) that same immutable bytes object, walking an
+    immutable tuple of subscribers. Every subscriber has its own bounded queue, so each update
+    reaches every client, and a slow client only costs itself a resync (counted in stats())
+    without holding up the publisher or anyone else. The last `backlog` frames are kept so that
+    a client reconnecting with Last-Event-ID (or resyncing) is replayed what it missed instead
+    of starting over.
+
+    `lock` (reentrant) is held while an event is published and while a client catches up; a
+    publisher that derives messages from its own state (e.g. a delta encoder) holds it around
+    both, so the state a client starts from always matches the event id it is tagged with. Hubs
+    fed from the same state (filtered streams) share one `lock`.
+    """
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_SIZE, backlog: int = STREAM_BACKLOG, lock=None):
+        if maxsize < 1:
+            raise ValueError("Subscriber queues need room for at least one message")
+        self.maxsize = maxsize
+        self.lock = lock if lock is not None else threading.RLock()
+        self._subscribers = ()
+        self._backlog = deque(maxlen=backlog)
+        self.last_event_id = 0
+        self.published = 0
+        self.total_subscribed = 0
+        self.closed_dropped = 0
+        self.closed_resyncs = 0
+        self.resumed = 0
+        self.replayed = 0
+        self.resume_misses = 0
+
+    def catch_up(self, initial=None, last_event_id: int = None):
+        """
+        (frames, event id they bring a client up to). With the `last_event_id` of a client, the
+        events it missed if the backlog still holds all of them; otherwise `initial` - a frame
+        (e.g. the latest fleet snapshot) or a callable returning one for the current event id.
+        """
+        with self.lock:
+            missed = self._missed(last_event_id) if last_event_id is not None else None
+            if missed is not None:
+                self.resumed += 1
+                self.replayed += len(missed)
+                return [frame for _, frame in missed], self.last_event_id
+            if last_event_id is not None:
+                self.resume_misses += 1
+            frame = initial(self.last_event_id) if callable(initial) else initial
+            return ([frame] if frame is not None else []), self.last_event_id
+
+    def subscribe(self, initial=None, last_event_id: int = None, notify=None) -> Subscription:
+        """New subscriber, starting from catch_up(initial, last_event_id); `initial` is also what it resyncs from"""
+        with self.lock:
+            frames, event_id = self.catch_up(initial, last_event_id)
+            subscription = Subscription(self, self.maxsize, initial, event_id, notify)
+            subscription._replay.extend(frames)
+            self._subscribers = self._subscribers + (subscription,)
+            self.total_subscribed += 1
+        return subscription
+
+    def _missed(self, last_event_id: int):
+        """Backlog events after last_event_id, or None if some of them are gone (or it is unknown)"""
+        if last_event_id > self.last_event_id:
+            return None
+        if last_event_id == self.last_event_id:
+            return []
+        missed = [event for event in self._backlog if event[0] > last_event_id]
+        if not missed or missed[0][0] != last_event_id + 1:
+            return None
+        return missed
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            if subscription in self._subscribers:
+                self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+                self.closed_dropped += subscription.dropped
+                self.closed_resyncs += subscription.resyncs
+
+    def publish(self, message: dict) -> int:
+        """Publish a message as the next event; returns how many subscribers overflowed"""
+        with self.lock:
+            self.last_event_id += 1
+            frame = encode_event(message, self.last_event_id)
+            self._backlog.append((self.last_event_id, frame))
+            dropped = 0
+            for subscription in self._subscribers:
+                dropped += not subscription.put(frame)
+            self.published += 1
+            return dropped
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def stats(self) -> dict:
+        subscribers = self._subscribers
+        return {
+            'subscribers': len(subscribers),
+            'total_subscribed': self.total_subscribed,
+            'published': self.published,
+            'last_event_id': self.last_event_id,
+            'backlog': len(self._backlog),
+            'resumed': self.resumed,
+            'replayed': self.replayed,
+            'resume_misses': self.resume_misses,
+            'queue_size': self.maxsize,
+            'slow_consumers': sum(1 for s in subscribers if s.dropped),
+            'dropped': self.closed_dropped + sum(s.dropped for s in subscribers),
+            'resyncs': self.closed_resyncs + sum(s.resyncs for s in subscribers),
+            'max_backlog': max((s.max_backlog for s in subscribers), default=0),
+            'clients': [
+                {
+                    'connected_s': round(time.time() - s.connected_at, 1),
+                    'delivered': s.delivered,
+                    'dropped': s.dropped,
+                    'resyncs': s.resyncs,
+                    'backlog': s.backlog
+                }
+                for s in subscribers
+            ]
+        }
@@ -0,0 +1,209 @@
+# backend/services/tick_pipeline.py
+
+import os
+import queue
+import threading
+import time
+
+# Items each stage may have waiting before its policy applies (block the producer, or drop)
+STAGE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '64'))
+
+WHEN_FULL_POLICIES = ['block', 'drop']
+
+_STOP = object()
+
+
+class StageRun:
+    """One start() of a stage: the queue and worker threads only that run's stop() ends"""
+
+    __slots__ = ('queue', 'threads')
+
+    def __init__(self, queue, threads):
+        self.queue = queue
+        self.threads = threads
+
+
+class PipelineStage:
+    """
+    One stage: a bounded input queue drained by its own worker threads.
+
+    Each worker calls fn(item); a non-None result is put on every downstream stage. When the
+    queue is full put() either blocks the producer (back-pressure) or drops the item, per
+    when_full; a dropped item is handed to on_drop(item) (or just logged, without one). If fn
+    raises, on_error(item, exc) is called so the caller can release whatever the item was
+    holding. maxsize=0 makes the queue unbounded. stats() reports throughput, latency and backlog.
+
+    Every start() begins a new run on a fresh queue and returns it; put() feeds the latest run.
+    A run stopped late (e.g. by a worker that was restarted) only drains and ends its own
+    threads, never the ones of the run that replaced it.
+    """
+
+    def __init__(self, name: str, fn, workers: int = 1, maxsize: int = STAGE_QUEUE_SIZE,
+                 when_full: str = 'block', downstream=(), on_error=None, on_drop=None):
+        if when_full not in WHEN_FULL_POLICIES:
+            raise ValueError(f"Invalid when_full '{when_full}'. Must be one of: {WHEN_FULL_POLICIES}")
+        if workers < 1:
+            raise ValueError("A stage needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.when_full = when_full
+        self.downstream = list(downstream)
+        self.on_error = on_error
+        self.on_drop = on_drop
+        self.maxsize = maxsize
+        self._run = StageRun(queue.Queue(maxsize), [])
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.started_at = time.perf_counter()
+            self.received = 0
+            self.processed = 0
+            self.errors = 0
+            self.dropped = 0
+            self.blocked = 0
+            self.max_backlog = 0
+            self.busy_ms = 0.0
+            self.max_ms = 0.0
+
+    def put(self, item) -> bool:
+        """Queue an item; False if it was dropped"""
+        stage_queue = self._run.queue
+        try:
+            stage_queue.put_nowait(item)
+        except queue.Full:
+            if self.when_full == 'drop':
+                with self._stats_lock:
+                    self.dropped += 1
+                    dropped = self.dropped
+                if self.on_drop is not None:
+                    self.on_drop(item)
+                else:
+                    print(f"[Pipeline] Stage '{self.name}' is full, dropped an item ({dropped} so far)")
+                return False
+            with self._stats_lock:
+                self.blocked += 1
+            stage_queue.put(item)
+        with self._stats_lock:
+            self.received += 1
+            self.max_backlog = max(self.max_backlog, stage_queue.qsize())
+        return True
+
+    def start(self) -> StageRun:
+        """Start a new run of workers on a fresh queue; returns it for stop()"""
+        stage_queue = queue.Queue(self.maxsize)
+        run = StageRun(stage_queue, [
+            threading.Thread(target=self._work, args=(stage_queue,), name=f"pipeline-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ])
+        for t in run.threads:
+            t.start()
+        self._run = run
+        return run
+
+    def stop(self, timeout: float = None, run: StageRun = None):
+        """Let a run's workers (default: the latest run's) finish what is queued, then end them"""
+        run = run or self._run
+        threads, run.threads = run.threads, []
+        for _ in threads:
+            run.queue.put(_STOP)
+        for t in threads:
+            t.join(timeout)
+
+    def join(self):
+        """Wait until every queued item has been processed and handed downstream"""
+        self._run.queue.join()
+
+    def _work(self, stage_queue):
+        while True:
+            item = stage_queue.get()
+            try:
+                if item is _STOP:
+                    break
+                self._process(item)
+            finally:
+                stage_queue.task_done()
+
+    def _process(self, item):
+        start = time.perf_counter()
+        try:
+            result = self.fn(item)
+        except Exception as e:
+            print(f"[Pipeline] Stage '{self.name}' failed: {e}")
+            with self._stats_lock:
+                self.errors += 1
+            if self.on_error is not None:
+                self.on_error(item, e)
+            return
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self.busy_ms += elapsed
+                self.max_ms = max(self.max_ms, elapsed)
+        with self._stats_lock:
+            self.processed += 1
+        if result is not None:
+            for stage in self.downstream:
+                stage.put(result)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            uptime = time.perf_counter() - self.started_at
+            done = self.processed + self.errors
+            return {
+                'workers': self.workers,
+                'when_full': self.when_full,
+                'backlog': self._run.queue.qsize(),
+                'max_backlog': self.max_backlog,
+                'capacity': self.maxsize,
+                'received': self.received,
+                'processed': self.processed,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'blocked_puts': self.blocked,
+                'throughput_per_s': round(self.processed / uptime, 3) if uptime else 0.0,
+                'mean_ms': round(self.busy_ms / done, 3) if done else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'utilization': round(self.busy_ms / 1000 / uptime / self.workers, 4) if uptime else 0.0
+            }
+
+
+class Pipeline:
+    """Named stages wired by their downstream lists; items enter with submit(stage, item)"""
+
+    def __init__(self, stages=()):
+        self.stages = {}
+        for stage in stages:
+            self.stages[stage.name] = stage
+
+    def __getitem__(self, name) -> PipelineStage:
+        return self.stages[name]
+
+    def submit(self, name, item) -> bool:
+        return self.stages[name].put(item)
+
+    def start(self) -> dict:
+        """Start a new run of every stage; returns the runs (stage name -> StageRun) for stop()"""
+        runs = {}
+        for name, stage in self.stages.items():
+            stage.reset_stats()
+            runs[name] = stage.start()
+        return runs
+
+    def drain(self, *names):
+        """Wait for the named stages, in order, to work through their queues"""
+        for name in names:
+            self.stages[name].join()
+
+    def stop(self, timeout: float = None, runs: dict = None):
+        """
+        Drain and stop stages in order, so upstream stages flush into downstream ones first.
+        With the runs a start() returned, only those are stopped, not a later start()'s.
+        """
+        for name, stage in self.stages.items():
+            stage.stop(timeout, runs[name] if runs is not None else None)
+
+    def stats(self) -> dict:
+        return {name: stage.stats() for name, stage in self.stages.items()}
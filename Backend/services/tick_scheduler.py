@@ -0,0 +1,160 @@
+# backend/services/tick_scheduler.py
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# Seconds between samples of an online machine, by the risk_level of its last prediction
+# (None: no prediction yet)
+RISK_CADENCE = {'critical': 5.0, 'high': 10.0, 'medium': 20.0, 'low': 60.0, None: 30.0}
+
+# Status overrides: machines in maintenance are sampled slowly, offline machines are suspended
+STATUS_CADENCE = {'maintenance': 120.0, 'offline': None}
+
+# What to do with a machine that is due again before its late sample ran (an overrun):
+#   skip   drop the missed samples; next sample one cadence from now
+#   align  drop the missed samples but stay on the original due-time grid
+#   burst  replay up to BURST_LIMIT missed samples back to back, then align
+CATCH_UP_POLICIES = ['skip', 'align', 'burst']
+CATCH_UP_POLICY = os.getenv('SCHEDULER_CATCH_UP', 'skip')
+BURST_LIMIT = 3
+
+
+def cadence_for(status, risk_level=None):
+    """Seconds between samples of a machine, or None if it should not be sampled"""
+    if status in STATUS_CADENCE:
+        return STATUS_CADENCE[status]
+    return RISK_CADENCE.get(risk_level, RISK_CADENCE[None])
+
+
+class TickScheduler:
+    """
+    Per-machine sampling schedule: a min-heap of (next due time, machine id).
+
+    pop_due() takes every machine whose time has come; once the caller has sampled them it
+    reports each back with complete(), which picks the next due time from the machine's
+    status and risk level (see cadence_for) and the catch-up policy. update() applies status
+    changes made outside the sampling loop. Work per pass is proportional to the machines that
+    are due, not the fleet size. Superseded heap entries are skipped lazily when popped.
+    """
+
+    def __init__(self, clock=time.monotonic, catch_up: str = CATCH_UP_POLICY):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Invalid catch-up policy '{catch_up}'. Must be one of: {CATCH_UP_POLICIES}")
+        self.clock = clock
+        self.catch_up = catch_up
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.clear()
+
+    def clear(self):
+        """Forget every machine and reset the statistics"""
+        with self._lock:
+            self._heap = []
+            self._due = {}        # machine id -> due time of its live heap entry
+            self._cadence = {}    # machine id -> seconds between samples (None: suspended)
+            self._risk = {}       # machine id -> risk level of the last prediction
+            self._running = {}    # machine id -> due time, popped but not yet completed
+            self.runs = 0
+            self.overruns = 0
+            self.missed = 0
+            self.max_lateness = 0.0
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, machine_id):
+        return machine_id in self._cadence
+
+    def _push(self, machine_id, due):
+        self._due[machine_id] = due
+        heapq.heappush(self._heap, (due, next(self._seq), machine_id))
+
+    def add(self, machine_id, status='online', risk_level=None, delay: float = 0.0):
+        """Start scheduling a machine; its first sample is due after `delay` seconds"""
+        with self._lock:
+            self._risk[machine_id] = risk_level
+            cadence = self._cadence[machine_id] = cadence_for(status, risk_level)
+            self._due.pop(machine_id, None)
+            if cadence is not None:
+                self._push(machine_id, self.clock() + delay)
+
+    def update(self, machine_id, status):
+        """Apply a status change: suspends, resumes (due now) or re-paces a machine"""
+        with self._lock:
+            if machine_id not in self._cadence or machine_id in self._running:
+                # Machines being sampled pick the change up in complete()
+                return
+            cadence = self._cadence[machine_id] = cadence_for(status, self._risk.get(machine_id))
+            due = self._due.get(machine_id)
+            now = self.clock()
+            if cadence is None:
+                self._due.pop(machine_id, None)
+            elif due is None:
+                self._push(machine_id, now)
+            elif now + cadence < due:
+                self._push(machine_id, now + cadence)
+
+    def pop_due(self, now: float = None) -> list:
+        """Ids of machines due at `now`, most overdue first; they stay off the heap until complete()"""
+        now = self.clock() if now is None else now
+        due_ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, _, machine_id = heapq.heappop(self._heap)
+                if self._due.get(machine_id) != due:
+                    continue
+                del self._due[machine_id]
+                self._running[machine_id] = due
+                self.max_lateness = max(self.max_lateness, now - due)
+                due_ids.append(machine_id)
+        return due_ids
+
+    def complete(self, machine_id, status, risk_level=None, now: float = None) -> float:
+        """Schedule a sampled machine's next sample; returns its due time (None if suspended)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            due = self._running.pop(machine_id, now)
+            self.runs += 1
+            self._risk[machine_id] = risk_level
+            cadence = self._cadence[machine_id] = cadence_for(status, risk_level)
+            if cadence is None:
+                return None
+            missed = int((now - due) // cadence)
+            if missed > 0:
+                self.overruns += 1
+                self.missed += missed
+            if missed == 0 or (self.catch_up == 'burst' and missed <= BURST_LIMIT):
+                next_due = due + cadence
+            elif self.catch_up == 'skip':
+                next_due = now + cadence
+            else:
+                next_due = due + (missed + 1) * cadence
+            self._push(machine_id, next_due)
+            return next_due
+
+    def next_due(self):
+        """Earliest due time of any scheduled machine, or None"""
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            cadences = {}
+            for cadence in self._cadence.values():
+                key = 'suspended' if cadence is None else f"{cadence:g}s"
+                cadences[key] = cadences.get(key, 0) + 1
+            return {
+                'catch_up': self.catch_up,
+                'scheduled': len(self._due),
+                'running': len(self._running),
+                'cadences': cadences,
+                'runs': self.runs,
+                'overruns': self.overruns,
+                'missed_samples': self.missed,
+                'max_lateness_s': round(self.max_lateness, 3)
+            }
@@ -0,0 +1,83 @@
+# backend/services/vitals_history.py
+
+import os
+from datetime import datetime
+import numpy as np
+from services.fleet_simulator import VITALS, VITAL_DECIMALS
+
+# Readings kept per machine (about 22 bytes each)
+HISTORY_DEPTH = int(os.getenv('VITALS_HISTORY_DEPTH', '10000'))
+
+# One history record; failure_risk is the predicted risk in percent, NO_RISK before the first prediction
+HISTORY_DTYPE = np.dtype([
+    ('timestamp', 'datetime64[us]'),
+    ('temperature', np.float32),
+    ('pressure', np.float32),
+    ('vibration', np.float32),
+    ('failure_risk', np.int16)
+])
+NO_RISK = -1
+
+
+class VitalsRingBuffer:
+    """
+    Fixed-depth circular buffer of one machine's readings, stored as HISTORY_DTYPE records.
+
+    append() writes one record in place (no reallocation, no copy of older readings) and
+    window() returns the newest readings as views into the buffer - one slice, or two when the
+    window wraps around the end. records() serializes a window to the API's history dicts.
+
+    Single writer: the slot is filled before the count moves, so lock-free readers never see a
+    half-written record. A window as deep as the buffer can have its oldest record overwritten
+    by a concurrent append, so serialize windows promptly rather than holding on to the views.
+    """
+
+    def __init__(self, depth: int = HISTORY_DEPTH):
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+        self.depth = int(depth)
+        self._data = np.zeros(self.depth, dtype=HISTORY_DTYPE)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.depth)
+
+    def append(self, timestamp: datetime, temperature: float, pressure: float, vibration: float,
+               failure_risk=None):
+        """Store one reading, overwriting the oldest once the buffer is full"""
+        self._data[self._count % self.depth] = (
+            np.datetime64(timestamp, 'us'),
+            temperature,
+            pressure,
+            vibration,
+            NO_RISK if failure_risk is None else failure_risk
+        )
+        self._count += 1
+
+    def window(self, limit: int = None) -> tuple:
+        """Views of the newest `limit` readings (all if None), oldest first; one or two slices"""
+        count = self._count
+        size = min(count, self.depth)
+        n = size if limit is None else max(0, min(int(limit), size))
+        end = count % self.depth or (self.depth if count else 0)
+        start = end - n
+        if start >= 0:
+            return (self._data[start:end],)
+        return (self._data[start:], self._data[:end])
+
+    def records(self, limit: int = None) -> list:
+        """Newest `limit` readings as history dicts (Timestamp, Temperature, ..., Failure_Risk)"""
+        out = []
+        for view in self.window(limit):
+            if not len(view):
+                continue
+            columns = [np.datetime_as_string(view['timestamp'], unit='us').tolist()]
+            for vital, decimals in zip(VITALS, VITAL_DECIMALS):
+                # float32 -> float64 before rounding so 83.77 serializes as 83.77
+                columns.append(np.round(view[vital].astype(np.float64), decimals).tolist())
+            columns.append([None if r == NO_RISK else r for r in view['failure_risk'].tolist()])
+            out.extend(
+                {'Timestamp': ts, 'Temperature': t, 'Pressure': p, 'Vibration': v, 'Failure_Risk': risk}
+                for ts, t, p, v, risk in zip(*columns)
+            )
+        return out
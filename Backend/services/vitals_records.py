@@ -0,0 +1,101 @@
+# backend/services/vitals_records.py
+
+from datetime import datetime
+from services.prediction_service import risk_level_for
+
+
+class Prediction:
+    """
+    Failure prediction of one sample. Slotted, with the timestamp kept as a datetime; to_dict()
+    builds the JSON shape (and the ISO string) only when a response, log line or stream frame
+    needs it.
+    """
+
+    __slots__ = ('failure_risk', 'failure_type', 'estimated_hours', 'risk_level', 'model_version', 'timestamp')
+
+    def __init__(self, failure_risk: int, failure_type, estimated_hours, risk_level: str,
+                 model_version=None, timestamp: datetime = None):
+        self.failure_risk = failure_risk
+        self.failure_type = failure_type
+        self.estimated_hours = estimated_hours
+        self.risk_level = risk_level
+        self.model_version = model_version
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_result(cls, prediction_result: dict, timestamp: datetime):
+        """From a machine prediction result (get_machine_prediction_from_features)"""
+        failure_probability = prediction_result.get('most_likely_failure_probability', 0)
+        return cls(
+            int(failure_probability * 100),
+            prediction_result.get('most_likely_failure'),
+            prediction_result.get('most_likely_failure_estimated_hours'),
+            risk_level_for(failure_probability),
+            prediction_result.get('model_version'),
+            timestamp
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'failure_risk': self.failure_risk,
+            'predicted_failure_type': self.failure_type,
+            'estimated_hours': self.estimated_hours,
+            'risk_level': self.risk_level,
+            'model_version': self.model_version,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+        }
+
+
+class MachineVitals:
+    """
+    Latest vitals of one machine as published in fleet snapshots.
+
+    Records are built by the simulation (sample() starts a new one from the previous) and
+    never modified once published; replace() copies with fields changed. to_dict() is the
+    JSON shape the routes return.
+    """
+
+    __slots__ = ('machine_id', 'machine_name', 'machine_type', 'temperature', 'pressure', 'vibration',
+                 'timestamp', 'status', 'mode', 'prediction')
+
+    def __init__(self, machine_id, machine_name, machine_type, temperature: float, pressure: float,
+                 vibration: float, timestamp: datetime, status=None, mode: str = 'normal',
+                 prediction: Prediction = None):
+        self.machine_id = machine_id
+        self.machine_name = machine_name
+        self.machine_type = machine_type
+        self.temperature = temperature
+        self.pressure = pressure
+        self.vibration = vibration
+        self.timestamp = timestamp
+        self.status = status
+        self.mode = mode
+        self.prediction = prediction
+
+    def sample(self, temperature: float, pressure: float, vibration: float, timestamp: datetime,
+               mode: str = 'normal') -> 'MachineVitals':
+        """A new, not yet scored record of the same machine"""
+        return MachineVitals(self.machine_id, self.machine_name, self.machine_type, temperature, pressure,
+                             vibration, timestamp, self.status, mode)
+
+    def replace(self, **fields) -> 'MachineVitals':
+        record = MachineVitals.__new__(MachineVitals)
+        for name in MachineVitals.__slots__:
+            setattr(record, name, fields.pop(name) if name in fields else getattr(self, name))
+        if fields:
+            raise ValueError(f"Unknown vitals fields: {sorted(fields)}")
+        return record
+
+    def to_dict(self) -> dict:
+        return {
+            'machine_id': self.machine_id,
+            'machine_name': self.machine_name,
+            'machine_type': self.machine_type,
+            'temperature': self.temperature,
+            'pressure': self.pressure,
+            'vibration': self.vibration,
+            'timestamp': self.timestamp.isoformat(),
+            'status': self.status,
+            'mode': self.mode,
+            'prediction': self.prediction.to_dict() if self.prediction is not None else None
+        }
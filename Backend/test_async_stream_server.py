@@ -0,0 +1,167 @@
+# asyncio serving path of the vitals stream
+import json
+import socket
+import threading
+import time
+from services.async_stream_server import AsyncStreamServer
+from services.stream_hub import StreamHub
+
+
+def request(port, target, headers=''):
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    sock.sendall(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n'.encode())
+    return sock
+
+
+def read_until(sock, marker, buffer=b''):
+    while marker not in buffer:
+        chunk = sock.recv(65536)
+        assert chunk, 'connection closed'
+        buffer += chunk
+    return buffer
+
+
+def events(buffer):
+    """Messages of the complete SSE frames in buffer"""
+    frames = buffer.split(b'\r\n\r\n', 1)[-1].split(b'\n\n')
+    return [json.loads(frame.split(b'data: ', 1)[1]) for frame in frames if b'data: ' in frame]
+
+
+def start_server():
+    hub = StreamHub()
+    keyframe = lambda event_id: b'id: %d\ndata: {"type": "keyframe", "id": %d}\n\n' % (event_id, event_id)
+    snapshot = lambda path: (200, b'{"success": true}') if path == '/vitals/current' else None
+    server = AsyncStreamServer(hub, keyframe, snapshot, host='127.0.0.1', port=0, origins=['http://localhost:3000'])
+    server.start()
+    return hub, server
+
+
+def wait_for_clients(server, n):
+    deadline = time.time() + 5
+    while server.clients < n and time.time() < deadline:
+        time.sleep(0.01)
+    assert server.clients == n
+
+
+def test_stream_keyframe_then_updates():
+    hub, server = start_server()
+    try:
+        hub.publish({'type': 'delta', 'n': 1})
+        sock = request(server.port, '/machine/vitals/stream', 'Origin: http://localhost:3000\r\n')
+        buffer = read_until(sock, b'"keyframe"')
+        assert buffer.startswith(b'HTTP/1.1 200 OK') and b'text/event-stream' in buffer
+        assert b'Access-Control-Allow-Origin: http://localhost:3000' in buffer
+        wait_for_clients(server, 1)
+        hub.publish({'type': 'delta', 'n': 2})
+        buffer = read_until(sock, b'"n": 2', buffer)
+        assert [m['type'] for m in events(buffer)] == ['connected', 'keyframe', 'delta']
+        assert events(buffer)[1]['id'] == 1
+        sock.close()
+        deadline = time.time() + 5
+        while server.clients and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.clients == 0 and server.stats()['frames'] == 2
+    finally:
+        server.stop()
+    print(' - Stream: keyframe, then the hub\'s frames: OK')
+
+
+def test_last_event_id_and_snapshots():
+    hub, server = start_server()
+    try:
+        for n in range(3):
+            hub.publish({'type': 'delta', 'n': n})
+        sock = request(server.port, '/machine/vitals/stream', 'Last-Event-ID: 1\r\n')
+        buffer = read_until(sock, b'"n": 2')
+        assert [m.get('n') for m in events(buffer)] == [None, 1, 2]
+        sock.close()
+
+        sock = request(server.port, '/machine/vitals/current')
+        buffer = read_until(sock, b'}')
+        assert buffer.startswith(b'HTTP/1.1 200 OK') and buffer.endswith(b'{"success": true}')
+        sock.close()
+        sock = request(server.port, '/machine/machines/404/vitals/current')
+        assert read_until(sock, b'}').startswith(b'HTTP/1.1 404')
+        sock.close()
+    finally:
+        server.stop()
+    print(' - Last-Event-ID replay and snapshot endpoints: OK')
+
+
+def test_catch_up_does_not_block_the_loop():
+    hub, server = start_server()
+    try:
+        with hub.lock:
+            # The broadcast stage holds the lock: a new client's catch-up waits, the loop does not
+            sock = request(server.port, '/machine/vitals/stream')
+            buffer = read_until(sock, b'"connected"')
+            start = time.time()
+            snapshot = request(server.port, '/machine/vitals/current')
+            assert read_until(snapshot, b'}').startswith(b'HTTP/1.1 200 OK') and time.time() - start < 1.0
+            snapshot.close()
+            hub.publish({'type': 'delta', 'n': 1})
+        # Caught up once the lock is free: the keyframe already covers event 1
+        buffer = read_until(sock, b'"keyframe"', buffer)
+        wait_for_clients(server, 1)
+        hub.publish({'type': 'delta', 'n': 2})
+        buffer = read_until(sock, b'"n": 2', buffer)
+        assert [(m['type'], m.get('id', m.get('n'))) for m in events(buffer)] == \
+            [('connected', None), ('keyframe', 1), ('delta', 2)]
+        sock.close()
+    finally:
+        server.stop()
+    print(' - Catch-up runs off the event loop: OK')
+
+
+def test_filtered_streams_share_one_bridge():
+    hub = StreamHub()
+    hubs = {str(n): StreamHub() for n in range(20)}
+    keyframe = lambda event_id: b'id: %d\ndata: {"type": "keyframe"}\n\n' % event_id
+
+    def resolve(query):
+        machine_id = query.get('machine_id', [None])[0]
+        if machine_id is None:
+            return None
+        if machine_id not in hubs:
+            raise ValueError(f"Unknown machine '{machine_id}'")
+        return hubs[machine_id], keyframe
+    server = AsyncStreamServer(hub, keyframe, host='127.0.0.1', port=0, resolve=resolve)
+    server.start()
+    try:
+        socks = {mid: request(server.port, f'/machine/vitals/stream?machine_id={mid}') for mid in hubs}
+        buffers = {mid: read_until(sock, b'"keyframe"') for mid, sock in socks.items()}
+        wait_for_clients(server, len(hubs))
+        assert server.stats()['feeds'] == len(hubs) + 1
+        assert sum(t.name == 'async-stream-bridge' for t in threading.enumerate()) == 1
+        for mid in ('3', '7'):
+            hubs[mid].publish({'type': 'delta', 'machine': mid})
+        for mid in ('3', '7'):
+            buffers[mid] = read_until(socks[mid], b'"delta"', buffers[mid])
+            assert [m['type'] for m in events(buffers[mid])] == ['connected', 'keyframe', 'delta']
+        assert server.stats()['frames'] == 2
+
+        bad = request(server.port, '/machine/vitals/stream?machine_id=99')
+        assert read_until(bad, b'}').startswith(b'HTTP/1.1 400')
+        bad.close()
+        for sock in socks.values():
+            sock.close()
+        deadline = time.time() + 5
+        while server.stats()['feeds'] > 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.stats()['feeds'] == 1
+        deadline = time.time() + 5
+        while any(h.subscribers for h in hubs.values()) and time.time() < deadline:
+            time.sleep(0.01)
+        assert not any(h.subscribers for h in hubs.values())
+    finally:
+        server.stop()
+    print(' - Filtered streams share one bridge thread: OK')
+
+
+if __name__ == '__main__':
+    print('Running async stream server tests...')
+    test_stream_keyframe_then_updates()
+    test_last_event_id_and_snapshots()
+    test_catch_up_does_not_block_the_loop()
+    test_filtered_streams_share_one_bridge()
+    print('All tests completed.')
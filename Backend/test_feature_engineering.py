@@ -0,0 +1,109 @@
+# Parity tests: NumPy feature fast path vs the original pandas preprocessing
+import os
+import numpy as np
+import pandas as pd
+from ml.utils import (load_ml_artifacts, preprocess_input_data, preprocess_input_arrays,
+                      engineer_features, timestamp_features, EXPECTED_FEATURES)
+from ml.feature_state import RollingFeatureState
+from services.prediction_service import get_prediction, get_machine_prediction_from_features
+
+DATASET_CSV = os.path.join(os.path.dirname(__file__), 'ml', 'data', 'simulated_sensors.csv')
+
+model, scaler = load_ml_artifacts()
+
+
+def _load_dataset():
+    df = pd.read_csv(DATASET_CSV)
+    df.columns = df.columns.str.strip()
+    return df[['Timestamp', 'Temperature', 'Vibration', 'Pressure']]
+
+
+def _arrays_from_frame(df):
+    parts = [timestamp_features(ts) for ts in df['Timestamp']]
+    return (df['Temperature'].to_numpy(), df['Vibration'].to_numpy(), df['Pressure'].to_numpy(),
+            np.array([p[0] for p in parts], dtype=float), np.array([p[1] for p in parts], dtype=float))
+
+
+def test_full_dataset_parity():
+    df = _load_dataset()
+    reference = preprocess_input_data(df.copy())
+    fast = preprocess_input_arrays(*_arrays_from_frame(df))
+
+    assert fast.shape == reference.shape == (len(df) - 2, len(EXPECTED_FEATURES))
+    assert np.allclose(fast, reference, rtol=1e-12, atol=1e-9)
+    assert (model.predict_proba(fast) == model.predict_proba(reference)).all()
+    print(' - Full dataset parity: OK')
+
+
+def test_window_parity():
+    df = _load_dataset()
+    for start in range(0, len(df) - 10, 37):
+        window = df.iloc[start:start + 3 + start % 5].reset_index(drop=True)
+        reference = preprocess_input_data(window.copy())
+        fast = preprocess_input_arrays(*_arrays_from_frame(window))
+        assert np.allclose(fast, reference, rtol=1e-12, atol=1e-9)
+    print(' - Sliding window parity: OK')
+
+
+def test_get_prediction_matches_pandas_path():
+    history = [
+        {'timestamp': '2025-10-22T00:00:00', 'temperature': 60, 'pressure': 100, 'vibration': 1.5},
+        {'timestamp': '2025-10-22T00:01:00', 'temperature': 62, 'pressure': 101, 'vibration': 1.6},
+        {'timestamp': '2025-10-22T00:02:00', 'temperature': 65, 'pressure': 102, 'vibration': 1.8}
+    ]
+    frame = pd.DataFrame(history).rename(columns=str.title)
+    expected = model.predict_proba(preprocess_input_data(frame)[-1].reshape(1, -1))[0]
+
+    result = get_prediction(history)
+    assert np.isclose(result['probability_failure'], expected[1])
+    assert np.isclose(result['probability_no_failure'], expected[0])
+    print(' - get_prediction parity: OK')
+
+
+def test_insufficient_history():
+    try:
+        get_prediction([{'temperature': 70, 'pressure': 110, 'vibration': 2.0}])
+        assert False, 'expected ValueError'
+    except ValueError:
+        print(' - Insufficient history raises ValueError: OK')
+
+
+def test_rolling_state_matches_batch_features():
+    df = _load_dataset()
+    expected = engineer_features(*_arrays_from_frame(df))
+    state = RollingFeatureState()
+    streamed = []
+    for row in df.itertuples(index=False):
+        state.update(row.Timestamp, row.Temperature, row.Vibration, row.Pressure)
+        if state.ready:
+            streamed.append(state.features())
+
+    assert np.allclose(np.array(streamed), expected, rtol=1e-12, atol=1e-9)
+    print(' - Streaming feature state parity: OK')
+
+
+def test_prediction_from_features():
+    history = [
+        {'Timestamp': '2025-10-22T00:00:00', 'Temperature': 60, 'Pressure': 100, 'Vibration': 1.5},
+        {'Timestamp': '2025-10-22T00:01:00', 'Temperature': 62, 'Pressure': 101, 'Vibration': 1.6},
+        {'Timestamp': '2025-10-22T00:02:00', 'Temperature': 65, 'Pressure': 102, 'Vibration': 1.8}
+    ]
+    state = RollingFeatureState()
+    for r in history:
+        state.update(r['Timestamp'], r['Temperature'], r['Vibration'], r['Pressure'])
+
+    result = get_machine_prediction_from_features('Crusher', state.features())
+    assert np.isclose(result['probability_failure'], get_prediction(history)['probability_failure'])
+    assert result['most_likely_failure'] in result['specific_failure_predictions']
+    print(' - Prediction from streamed features: OK')
+
+
+if __name__ == '__main__':
+    print('Running feature engineering parity tests...')
+    test_full_dataset_parity()
+    test_window_parity()
+    test_get_prediction_matches_pandas_path()
+    test_insufficient_history()
+    test_rolling_state_matches_batch_features()
+    test_prediction_from_features()
+    print('All tests completed.')
@@ -0,0 +1,129 @@
+# Sharded simulation: shared-memory rows, shard processes and restarts
+import time
+import numpy as np
+from services.fleet_episodes import Episode, episode_band
+from services.fleet_shards import FleetSharedState, ShardSupervisor, shard_ranges, SAMPLE_MODES
+from services.fleet_simulator import FleetSimulator
+from services.simulation_clock import SimulationClock
+
+STATS = {
+    'temperature': {'mean': 75.0, 'std': 8.0},
+    'pressure': {'mean': 100.0, 'std': 8.0},
+    'vibration': {'mean': 0.4, 'std': 0.15}
+}
+
+
+def _wait_for(condition, timeout=60.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.1)
+
+
+def test_shard_ranges_and_seqlock_read():
+    assert shard_ranges(10, 3) == [(0, 3), (3, 7), (7, 10)]
+    assert shard_ranges(2, 2) == [(0, 1), (1, 2)]
+    state = FleetSharedState(4, 2)
+    try:
+        attached = FleetSharedState(4, 2, state.names)
+        attached.machines['temperature'][2:] = [80.0, 81.0]
+        assert list(state.read(1, 2, 4)['temperature']) == [80.0, 81.0]
+        assert (state.machines['risk_level'] == -1).all()
+        attached.close()
+    finally:
+        state.close()
+        state.unlink()
+    print(' - Shard ranges, shared rows visible across attachments: OK')
+
+
+def test_shards_sample_and_restart():
+    machines = [{'id': str(i), 'type': 'Haul Truck', 'status': 'online'} for i in range(6)]
+    machines[5]['status'] = 'offline'
+    supervisor = ShardSupervisor(2, machines, STATS, SimulationClock(speed=0), seed=3)
+    start = FleetSimulator(6, STATS, seed=3).values.copy()
+    supervisor.start(start, [machine['status'] for machine in machines])
+    try:
+        _wait_for(lambda: (supervisor.read_shard(1)['samples'][:2] > 20).all())
+        rows = supervisor.read_shard(1)
+        assert rows['samples'][2] == 0                      # offline: never sampled
+        assert (rows['risk_level'][:2] >= 0).all()          # scored once the feature window filled
+
+        pid = supervisor.stats()[0]['pid']
+        supervisor._processes[0].kill()
+        _wait_for(lambda: not supervisor._processes[0].is_alive())
+        assert supervisor.check() == [0]
+        before = supervisor.read_shard(0)['samples'].copy()
+        _wait_for(lambda: (supervisor.read_shard(0)['samples'] > before).all())
+        stats = supervisor.stats()
+        assert stats[0]['restarts'] == 1 and stats[0]['pid'] != pid and stats[1]['restarts'] == 0
+    finally:
+        values = supervisor.stop()
+    assert values.shape == (3, 6) and np.allclose(values[:, 5], start[:, 5])
+    assert supervisor.check() == []
+    try:
+        supervisor.restart(0)                               # a restart request that lost the race to stop()
+        assert False
+    except RuntimeError:
+        pass
+    print(' - Shards sample in parallel, a killed shard restarts alone: OK')
+
+
+def test_shard_killed_mid_write_is_restarted():
+    machines = [{'id': str(i), 'type': 'Haul Truck', 'status': 'online'} for i in range(4)]
+    supervisor = ShardSupervisor(2, machines, STATS, SimulationClock(speed=0), seed=5)
+    supervisor.start(FleetSimulator(4, STATS, seed=5).values.copy(), ['online'] * 4)
+    try:
+        _wait_for(lambda: (supervisor.read_shard(0)['samples'] > 5).all())
+        last = supervisor.read_shard(0)
+        supervisor._processes[0].kill()
+        _wait_for(lambda: not supervisor._processes[0].is_alive())
+        supervisor.state.shards['seq'][0] |= 1             # died between its two seq bumps
+        start = time.time()
+        rows = supervisor.read_shard(0)
+        assert time.time() - start < 0.1 and (rows['samples'] >= last['samples']).all()
+        assert supervisor.stats()[0]['read_failures'] == 1
+
+        # The dead writer is also caught without the liveness check, after the read timeout
+        try:
+            supervisor.state.read(0, 0, 2, timeout=0.05)
+            assert False
+        except RuntimeError:
+            pass
+        assert supervisor.check() == [0] and supervisor.state.shards['seq'][0] % 2 == 0
+        _wait_for(lambda: (supervisor.read_shard(0)['samples'] > rows['samples']).all())
+    finally:
+        supervisor.stop()
+    print(' - A shard killed mid-write is read around and restarted: OK')
+
+
+def test_shards_apply_scripted_episodes():
+    machines = [{'id': str(i), 'type': 'Haul Truck', 'status': 'online'} for i in range(2)]
+    supervisor = ShardSupervisor(1, machines, STATS, SimulationClock(speed=0), seed=7)
+    supervisor.start(FleetSimulator(2, STATS, seed=7).values.copy(), ['online'] * 2)
+    try:
+        supervisor.set_episodes({1: Episode('1', 'critical', 0.0, 1e9)})
+        before = supervisor.read_shard(0)['samples'].copy()
+        _wait_for(lambda: (supervisor.read_shard(0)['samples'] > before + 1).all())
+        rows = supervisor.read_shard(0)
+        assert SAMPLE_MODES[rows['mode'][0]] == 'normal' and SAMPLE_MODES[rows['mode'][1]] == 'critical'
+        low, high = episode_band('critical', 'temperature')
+        assert low <= rows['temperature'][1] <= high
+        # The walk underneath is left alone, as with EpisodeScript.apply()
+        assert rows['walk'][1][0] != rows['temperature'][1]
+
+        supervisor.set_episodes({})
+        samples = supervisor.read_shard(0)['samples'].copy()
+        _wait_for(lambda: (supervisor.read_shard(0)['samples'] > samples + 1).all())
+        assert (supervisor.read_shard(0)['mode'] == 0).all()
+    finally:
+        supervisor.stop()
+    print(' - Shards apply the episodes the Flask process scripts: OK')
+
+
+if __name__ == '__main__':
+    print('Running fleet shard tests...')
+    test_shard_ranges_and_seqlock_read()
+    test_shards_sample_and_restart()
+    test_shard_killed_mid_write_is_restarted()
+    test_shards_apply_scripted_episodes()
+    print('All tests completed.')
@@ -0,0 +1,66 @@
+# Vectorized fleet random walk: bounds, precision, seeding and determinism
+import numpy as np
+from services.fleet_simulator import FleetSimulator, VITALS, VITAL_LOW, VITAL_HIGH, VITAL_DECIMALS
+
+STATS = {
+    'temperature': {'mean': 75.0, 'std': 8.0},
+    'pressure': {'mean': 100.0, 'std': 8.0},
+    'vibration': {'mean': 0.4, 'std': 0.15}
+}
+
+
+def test_seeded_around_dataset_mean():
+    fleet = FleetSimulator(10000, STATS, seed=0)
+    assert fleet.values.shape == (3, 10000) and fleet.values.dtype == np.float32
+    assert abs(fleet.temperature.mean() - 75.0) < 0.5 and np.abs(fleet.temperature - 75.0).max() <= 5.01
+    assert abs(fleet.pressure.mean() - 100.0) < 0.5 and np.abs(fleet.vibration - 0.4).max() <= 0.201
+    print(' - Seeded around dataset statistics: OK')
+
+
+def test_walk_stays_clamped_and_rounded():
+    # Extreme volatility drives machines into the clamps within a few ticks
+    wild = {v: {'mean': STATS[v]['mean'], 'std': 500.0} for v in VITALS}
+    fleet = FleetSimulator(2000, wild, seed=1)
+    for _ in range(20):
+        values = fleet.step()
+        assert (values >= VITAL_LOW[:, None]).all() and (values <= VITAL_HIGH[:, None]).all()
+    assert (fleet.temperature == VITAL_LOW[0]).any() and (fleet.temperature == VITAL_HIGH[0]).any()
+    for i in range(50):
+        reading = fleet.reading(i)
+        for vital, decimals in zip(VITALS, VITAL_DECIMALS):
+            assert reading[vital] == round(reading[vital], decimals)
+    print(' - Random walk clamped and rounded: OK')
+
+
+def test_seed_is_deterministic():
+    a, b = FleetSimulator(100, STATS, seed=42), FleetSimulator(100, STATS, seed=42)
+    for _ in range(5):
+        assert np.array_equal(a.step(), b.step())
+    assert a.ticks == 5
+    a.set_reading(3, temperature=500.0)
+    assert a.reading(3)['temperature'] == 120.0
+    try:
+        a.set_reading(0, humidity=1.0)
+        assert False
+    except ValueError:
+        pass
+    print(' - Seeded fleets are reproducible: OK')
+
+
+def test_step_subset_of_machines():
+    fleet = FleetSimulator(100, STATS, seed=3)
+    before = fleet.values.copy()
+    fleet.step([5, 17, 99])
+    changed = np.flatnonzero((fleet.values != before).any(axis=0))
+    assert set(changed) <= {5, 17, 99} and len(changed) >= 2 and fleet.ticks == 1
+    assert fleet.step([]) is fleet.values and np.array_equal(fleet.values[:, :5], before[:, :5])
+    print(' - Stepping a subset of machines: OK')
+
+
+if __name__ == '__main__':
+    print('Running fleet simulator tests...')
+    test_seeded_around_dataset_mean()
+    test_walk_stays_clamped_and_rounded()
+    test_seed_is_deterministic()
+    test_step_subset_of_machines()
+    print('All tests completed.')
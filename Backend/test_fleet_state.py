@@ -0,0 +1,52 @@
+# Fleet snapshots (RCU) and the instrumented lock
+import threading
+import time
+from services.fleet_state import InstrumentedLock, SnapshotStore
+
+
+def test_snapshots_are_immutable_and_swapped():
+    store = SnapshotStore()
+    before = store.current()
+    with store.write_lock:
+        first = store.publish({'1': {'temperature': 70.0}, '2': {'temperature': 80.0}})
+    assert before.machines == {} and first.tick == 1 and store.current() is first
+    try:
+        first.machines['3'] = {}
+        assert False
+    except TypeError:
+        pass
+    with store.write_lock:
+        second = store.replace('1', status='offline')
+        assert store.replace('404', status='offline') is second
+    assert first.get('1') == {'temperature': 70.0}
+    assert second.get('1') == {'temperature': 70.0, 'status': 'offline'} and second.get('2') is first.get('2')
+    print(' - Snapshots swapped copy-on-write: OK')
+
+
+def test_lock_records_waits():
+    lock = InstrumentedLock('test')
+    holding = threading.Event()
+
+    def holder():
+        with lock:
+            holding.set()
+            time.sleep(0.05)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    holding.wait()
+    with lock:
+        pass
+    t.join()
+    stats = lock.stats()
+    assert stats['acquisitions'] == 2 and stats['contended'] == 1
+    assert stats['wait_max_ms'] >= 20 and stats['hold_max_ms'] >= 40
+    assert sum(stats['wait_histogram'].values()) == 2
+    print(' - Instrumented lock wait/hold times: OK')
+
+
+if __name__ == '__main__':
+    print('Running fleet state tests...')
+    test_snapshots_are_immutable_and_swapped()
+    test_lock_records_waits()
+    print('All tests completed.')
@@ -0,0 +1,115 @@
+# Tests for the flattened RandomForest inference engine
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from ml.utils import load_ml_artifacts, load_inference_engine, preprocess_input_data
+from ml.forest_engine import FlattenedForest
+from ml.export_model import dataset_features, verify_engine
+
+DATASET_CSV = os.path.join(os.path.dirname(__file__), 'ml', 'data', 'simulated_sensors.csv')
+
+model, scaler = load_ml_artifacts()
+engine = FlattenedForest.from_sklearn(model)
+
+
+def _dataset_frame():
+    df = pd.read_csv(DATASET_CSV)
+    df.columns = df.columns.str.strip()
+    return df[['Timestamp', 'Temperature', 'Vibration', 'Pressure']]
+
+
+def _dataset_features():
+    return preprocess_input_data(_dataset_frame())
+
+
+def test_batch_matches_sklearn():
+    X = _dataset_features()
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(engine.predict(X), model.predict(X))
+    print(' - Dataset batch is bit-identical to sklearn: OK')
+
+
+def test_single_rows_match_sklearn():
+    X = _dataset_features()
+    for row in X[::25]:
+        assert np.array_equal(engine.predict_proba(row.reshape(1, -1)), model.predict_proba(row.reshape(1, -1)))
+    print(' - Single rows are bit-identical to sklearn: OK')
+
+
+def test_threshold_boundaries():
+    # Put every feature exactly on a split threshold so the <= comparisons are exercised
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(256, engine.n_features))
+    internal = np.flatnonzero(np.isfinite(engine.threshold))
+    picks = rng.choice(internal, size=X.shape)
+    on_threshold = rng.random(X.shape) < 0.5
+    X[on_threshold] = engine.threshold[picks][on_threshold]
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+    print(' - Split-threshold boundary values: OK')
+
+
+def test_rejects_bad_input():
+    for bad in (np.zeros((1, 3)), np.full((1, engine.n_features), np.nan)):
+        try:
+            engine.predict_proba(bad)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+    print(' - Bad input rejected: OK')
+
+
+def test_folded_scaler_regression():
+    # The served engine takes raw features; it must match scaler.transform + the sklearn forest
+    served = load_inference_engine()
+    assert served.feature_space == 'raw'
+    raw = dataset_features()
+    reference = model.predict_proba(preprocess_input_data(_dataset_frame()))
+    assert np.array_equal(served.predict_proba(raw), reference)
+    assert verify_engine(served, model, scaler, raw) == len(raw)
+    print(' - Folded scaler matches scaler + forest on the dataset: OK')
+
+
+def test_folded_threshold_boundaries():
+    # Raw values exactly on, and one ulp either side of, every folded threshold
+    folded = engine.fold_scaler(scaler)
+    internal = np.flatnonzero(np.isfinite(folded.threshold))
+    rng = np.random.default_rng(1)
+    X = np.tile(scaler.mean_, (3 * len(internal), 1))
+    for k, direction in enumerate((-np.inf, None, np.inf)):
+        t = folded.threshold[internal]
+        values = t if direction is None else np.nextafter(t, direction)
+        X[np.arange(len(internal)) + k * len(internal), folded.feature[internal]] = values
+    X += rng.normal(scale=1e-9, size=X.shape) * (rng.random(X.shape) < 0.1)
+    scaled = (X - scaler.mean_) / scaler.scale_
+    assert np.array_equal(folded.predict_proba(X), model.predict_proba(scaled))
+    print(' - Folded split-threshold boundary values: OK')
+
+
+def test_save_and_load_roundtrip():
+    folded = engine.fold_scaler(scaler)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'engine.joblib')
+        folded.save(path)
+        loaded = FlattenedForest.load(path)
+        mapped = FlattenedForest.load(path, mmap_mode='r')
+        raw = dataset_features()
+        assert loaded.feature_space == 'raw'
+        assert np.array_equal(loaded.predict_proba(raw), folded.predict_proba(raw))
+        # Memory-mapped load: read-only arrays backed by the file, derived arrays included
+        assert not mapped._children.flags.writeable and isinstance(mapped._split.base, np.memmap)
+        assert np.array_equal(mapped.predict_proba(raw), folded.predict_proba(raw))
+        del mapped
+    print(' - Save / load roundtrip (in-memory and memory-mapped): OK')
+
+
+if __name__ == '__main__':
+    print('Running forest engine tests...')
+    test_batch_matches_sklearn()
+    test_single_rows_match_sklearn()
+    test_threshold_boundaries()
+    test_rejects_bad_input()
+    test_folded_scaler_regression()
+    test_folded_threshold_boundaries()
+    test_save_and_load_roundtrip()
+    print('All tests completed.')
@@ -0,0 +1,69 @@
+# Machine registry: config loading, id lookup and secondary indexes
+import os
+import json
+import tempfile
+from services.machine_registry import MachineRegistry, MACHINES_CONFIG
+
+
+def test_loads_default_fleet():
+    registry = MachineRegistry.from_file(MACHINES_CONFIG)
+    assert len(registry) == 4 and [m['id'] for m in registry] == ['1', '2', '3', '4']
+    assert registry.get('3')['type'] == 'Shovel/Excavator' and registry.get('99') is None
+    assert registry.position('4') == 3
+    assert [m['id'] for m in registry.by_type('Crusher')] == ['4']
+    print(' - Default fleet config: OK')
+
+
+def test_indexes_follow_status_changes():
+    registry = MachineRegistry([
+        {'id': i, 'name': f'M{i}', 'type': 'Drill Rig' if i % 2 else 'Crusher',
+         'status': 'online', 'location': f'Zone {i % 3}'}
+        for i in range(12)
+    ])
+    assert len(registry.by_status('online')) == 12
+    machine = registry.set_status('5', 'maintenance')
+    assert machine is registry.get(5) and machine['status'] == 'maintenance'
+    assert [m['id'] for m in registry.by_status('maintenance')] == ['5']
+    assert '5' not in [m['id'] for m in registry.by_status('online')]
+    assert [m['id'] for m in registry.find(type='Drill Rig', location='Zone 2')] == ['5', '11']
+    assert registry.find(type='Drill Rig', status='maintenance', location='Zone 2') == [machine]
+    assert registry.counts('status') == {'online': 11, 'maintenance': 1}
+    registry.set_status('1', 'maintenance')
+    assert [m['id'] for m in registry.by_status('maintenance')] == ['1', '5']
+    registry.set_status('1', 'online')
+    for bad in (lambda: registry.set_status('5', 'broken'), lambda: registry.find(name='M1'),
+                lambda: registry.add({'id': 1, 'name': 'x', 'type': 'Crusher', 'status': 'online', 'location': 'y'}),
+                lambda: registry.add({'id': 100, 'name': 'x'})):
+        try:
+            bad()
+            assert False
+        except ValueError:
+            pass
+    try:
+        registry.set_status('404', 'online')
+        assert False
+    except KeyError:
+        pass
+    print(' - Indexes follow status changes: OK')
+
+
+def test_loads_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fleet.csv')
+        with open(path, 'w') as f:
+            f.write('id,name,type,status,location,common_failures,failure_descriptions\n')
+            f.write('HT-9,Haul Truck HT-009,Haul Truck,online,Pit Area A,tire_wear;hydraulic_leak,'
+                    + '"' + json.dumps({'tire_wear': 'Worn tires'}).replace('"', '""') + '"\n')
+        registry = MachineRegistry.from_file(path)
+    machine = registry.get('HT-9')
+    assert machine['common_failures'] == ['tire_wear', 'hydraulic_leak']
+    assert machine['failure_descriptions'] == {'tire_wear': 'Worn tires'} and machine['description'] == ''
+    print(' - CSV fleet config: OK')
+
+
+if __name__ == '__main__':
+    print('Running machine registry tests...')
+    test_loads_default_fleet()
+    test_indexes_follow_status_changes()
+    test_loads_csv()
+    print('All tests completed.')
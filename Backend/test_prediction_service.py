@@ -1,4 +1,14 @@
-from services.prediction_service import get_machine_specific_prediction
+import os
+import time
+import tempfile
+import threading
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from services.inference_batcher import InferenceBatcher
+from services.inference_backend import ProcessPoolBackend
+from ml.utils import load_inference_engine, _get_model_path, MODEL_FILE, SCALER_FILE
+from ml.model_registry import ModelRegistry, LEGACY_VERSION
+from services.prediction_service import get_machine_specific_prediction, get_batch_prediction, PredictionCache
 
 
 def run_tests():
@@ -12,6 +22,7 @@ def run_tests():
     ]
     r1 = get_machine_specific_prediction('Haul Truck', history)
     assert 'most_likely_failure' in r1 and isinstance(r1['specific_failure_predictions'], dict)
+    assert r1['model_version'] is not None
     print(' - Happy path: OK')
 
     # Missing timestamp single dict
@@ -27,6 +38,138 @@ def run_tests():
     except Exception:
         print(' - Bad input (int) raised exception (acceptable)')
 
+    # Batch: one result per window, bad windows reported in place
+    batch = get_batch_prediction([
+        history,
+        {'machine_type': 'Haul Truck', 'readings': history},
+        {'machine_type': 'Unknown', 'readings': history},
+        123
+    ])
+    assert len(batch) == 4 and [r['index'] for r in batch] == [0, 1, 2, 3]
+    assert batch[1]['most_likely_failure'] == r1['most_likely_failure']
+    assert batch[1]['probability_failure'] == r1['probability_failure']
+    assert 'error' in batch[2] and 'error' in batch[3]
+    print(' - Batch with invalid windows: OK')
+
+    # Cache: quantized keys, LRU eviction, TTL expiry
+    cache = PredictionCache(max_size=2, ttl_seconds=0.05, decimals=3)
+    f1, f2, f3 = np.array([70.0, 0.4]), np.array([71.0, 0.4]), np.array([72.0, 0.4])
+    cache.put('Crusher', f1, {'prediction': 0})
+    assert cache.get('Crusher', f1 + 1e-5) == {'prediction': 0}
+    assert cache.get('Drill Rig', f1) is None
+    cache.put('Crusher', f2, {'prediction': 1})
+    cache.get('Crusher', f1)
+    cache.put('Crusher', f3, {'prediction': 1})
+    assert cache.get('Crusher', f2) is None and cache.get('Crusher', f1) is not None
+    time.sleep(0.06)
+    assert cache.get('Crusher', f1) is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['expirations'] == 1 and stats['hits'] == 3
+    print(' - Prediction cache LRU/TTL: OK')
+
+    # Micro-batcher: concurrent callers share score_fn calls but get their own rows back
+    calls = []
+    batcher = InferenceBatcher(lambda rows: calls.append(len(rows)) or rows * 2, max_batch=64, max_wait_ms=20)
+    outputs = {}
+    def caller(i):
+        outputs[i] = batcher.score(np.full((1, 3), float(i)))
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all((outputs[i] == 2.0 * i).all() for i in range(16))
+    assert sum(calls) == 16 and len(calls) < 16
+    assert batcher.stats()['batches'] == len(calls)
+    print(' - Micro-batcher coalesces concurrent calls: OK')
+
+    # Process-pool backend: workers load the same engine and pin their thread pools
+    engine = load_inference_engine()
+    backend = ProcessPoolBackend(workers=1, threads_per_worker=1)
+    try:
+        info = backend.warm_up(LEGACY_VERSION)
+        assert all(pool['threads'] == 1 for pool in info[0]['thread_pools'])
+        rows = np.random.default_rng(0).normal(50.0, 20.0, (32, engine.n_features))
+        assert np.array_equal(backend.predict_proba(rows, LEGACY_VERSION), engine.predict_proba(rows))
+
+        # A killed worker breaks the pool for every caller in flight; it is replaced exactly once
+        broken = backend._get_pool(LEGACY_VERSION)
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        errors = []
+
+        def predict():
+            try:
+                backend.predict_proba(rows, LEGACY_VERSION)
+            except BrokenProcessPool:
+                errors.append(True)
+        callers = [threading.Thread(target=predict) for _ in range(4)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+        assert errors and backend._pool is not broken
+        pools = []
+        starters = [threading.Thread(target=lambda: pools.append(backend._get_pool(LEGACY_VERSION))) for _ in range(8)]
+        for t in starters:
+            t.start()
+        for t in starters:
+            t.join()
+        assert len(set(map(id, pools))) == 1 and pools[0] is not broken
+        assert np.array_equal(backend.predict_proba(rows, LEGACY_VERSION), engine.predict_proba(rows))
+    finally:
+        backend.shutdown()
+    assert backend._pool is None
+    print(' - Process-pool backend matches inline engine, survives a killed worker: OK')
+
+    # Model registry: background deploy (validate + warm), atomic swap, instant rollback
+    with tempfile.TemporaryDirectory() as root:
+        flat = _get_model_path()
+        for name in (MODEL_FILE, SCALER_FILE):
+            with open(os.path.join(flat, name), 'rb') as src, open(os.path.join(root, name), 'wb') as dst:
+                dst.write(src.read())
+        registry = ModelRegistry(root)
+        registry.register('v2', os.path.join(flat, MODEL_FILE), os.path.join(flat, SCALER_FILE))
+        assert registry.versions() == [LEGACY_VERSION, 'v2']
+        # A registration that fails (here: the scaler passed as the model) leaves nothing behind
+        try:
+            registry.register('v3', os.path.join(flat, SCALER_FILE), os.path.join(flat, SCALER_FILE))
+            assert False
+        except Exception:
+            pass
+        assert registry.versions() == [LEGACY_VERSION, 'v2'] and os.listdir(os.path.join(root, 'versions')) == ['v2']
+        swaps = []
+        registry.on_swap(lambda new, old: swaps.append((new.version, old.version)))
+        before = registry.active()
+        assert before.version == LEGACY_VERSION
+        follower = ModelRegistry(root)      # e.g. a simulation shard's registry
+        assert follower.active().version == LEGACY_VERSION
+
+        status = registry.deploy('v2', wait=True)
+        assert status['state'] == 'active' and status['validated_rows'] > 0, status
+        assert registry.active().version == 'v2'
+        # The follower swaps to what the deploying process activated, without touching the manifest
+        assert follower.follow('v2').version == 'v2' and follower.follow('v2') is follower.active()
+        assert registry.manifest()['previous'] == LEGACY_VERSION
+        # A request still holding the old snapshot keeps scoring with it
+        assert np.array_equal(before.engine.predict_proba(rows), registry.active().engine.predict_proba(rows))
+
+        rolled_back = registry.rollback()
+        assert rolled_back.version == LEGACY_VERSION and rolled_back is registry.active()
+        # Same engine, but a new activation
+        assert rolled_back.engine is before.engine and rolled_back.activated_at > before.activated_at
+        assert swaps == [('v2', LEGACY_VERSION), (LEGACY_VERSION, 'v2')]
+        manifest = registry.manifest()
+        assert manifest['active'] == LEGACY_VERSION and manifest['previous'] == 'v2'
+        for bad in ('missing', '../v2'):
+            try:
+                registry.deploy(bad)
+                assert False, bad
+            except ValueError:
+                pass
+    print(' - Model registry deploy / swap / rollback: OK')
+
     print('All tests completed.')
 
 
@@ -0,0 +1,52 @@
+# Sensor simulator: ticks advance the walk, reads only return the published snapshot
+import json
+import time
+from services.sensor_simulation import SensorSimulator
+
+
+def test_reads_do_not_advance_or_alert():
+    sim = SensorSimulator(seed=5)
+    sent = []
+    sim.send_email_alert = lambda subject, body: sent.append(subject)
+    sim.force_critical_mode(60)
+    first = sim.get_current_readings()
+    for _ in range(100):
+        assert sim.get_current_readings() is first
+    assert json.loads(sim.get_current_readings_json()) == first
+    assert sent == [] and sim.ticks == 0 and first['overall_status'] == 'critical'
+
+    readings = sim.tick()
+    assert sim.get_current_readings() is readings and readings is not first
+    assert sim.ticks == 1 and len(sent) == 1
+    sim.tick()
+    assert len(sent) == 1    # alert cooldown
+    critical = sim.get_current_readings()['temperature']['value']
+    sim.reset_normal_mode()
+    # Leaving the forced mode keeps the values; the next tick brings them back in range
+    assert sim.get_current_readings()['forced_mode'] is None
+    assert sim.get_current_readings()['temperature']['value'] == critical
+    assert sim.tick()['temperature']['status'] == 'normal'
+    sim.reset_values()
+    assert sim.get_current_readings()['temperature']['value'] == 45.0
+    print(' - Reads return the snapshot; only ticks advance and alert: OK')
+
+
+def test_ticker_advances_in_background():
+    sim = SensorSimulator(seed=1)
+    sim.start_ticker(0.01)
+    deadline = time.time() + 5
+    while sim.ticks < 5:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    sim.stop_ticker()
+    ticks = sim.ticks
+    time.sleep(0.05)
+    assert sim.ticks == ticks
+    print(' - Ticker advances the simulator until stopped: OK')
+
+
+if __name__ == '__main__':
+    print('Running sensor simulation tests...')
+    test_reads_do_not_advance_or_alert()
+    test_ticker_advances_in_background()
+    print('All tests completed.')
@@ -0,0 +1,58 @@
+# Delta / keyframe encoding of stream updates
+from services.stream_delta import DeltaEncoder, apply_delta, diff_fields
+
+
+def entry(machine_id, temperature, risk_level='low', timestamp='t0'):
+    return {
+        'machine_id': machine_id, 'machine_name': f'Machine {machine_id}', 'machine_type': 'Haul Truck',
+        'vitals': {'temperature': temperature, 'pressure': 100.0, 'timestamp': timestamp},
+        'prediction': {'risk_level': risk_level, 'timestamp': timestamp}
+    }
+
+
+def test_diff_fields():
+    old = entry('1', 75.0)
+    assert diff_fields(old, entry('1', 75.0)) == {}
+    assert diff_fields(old, entry('1', 76.0, timestamp='t1')) == {
+        'vitals': {'temperature': 76.0, 'timestamp': 't1'}, 'prediction': {'timestamp': 't1'}}
+    assert diff_fields(old, {**old, 'prediction': None}) == {'prediction': None}
+    assert diff_fields({**old, 'prediction': None}, old) == {'prediction': old['prediction']}
+    print(' - Changed fields, nested dicts diffed by key: OK')
+
+
+def test_deltas_rebuild_the_fleet():
+    encoder = DeltaEncoder(keyframe_interval=3)
+    client = {}
+    ticks = [
+        [entry('1', 75.0), entry('2', 80.0)],
+        [entry('1', 75.5, timestamp='t1')],
+        [entry('2', 80.0)],
+        [entry('2', 81.0, 'high', 't2')],
+        [entry('1', 76.0, timestamp='t3')]
+    ]
+    messages = [encoder.update(tick, f'tick {i}') for i, tick in enumerate(ticks)]
+    assert [m['type'] if m else None for m in messages] == ['delta', 'delta', None, 'keyframe', 'delta']
+    assert messages[0]['data']['machines'] == ticks[0]
+    assert messages[1]['data']['machines'] == [{'machine_id': '1', 'vitals': {'temperature': 75.5, 'timestamp': 't1'},
+                                                'prediction': {'timestamp': 't1'}}]
+    for message in messages[:2]:
+        apply_delta(client, message['data']['machines'])
+    # A keyframe replaces the client's state; deltas after it merge into it
+    client = {e['machine_id']: e for e in messages[3]['data']['machines']}
+    apply_delta(client, messages[4]['data']['machines'])
+    assert client == {'1': entry('1', 76.0, timestamp='t3'), '2': entry('2', 81.0, 'high', 't2')}
+    assert encoder.keyframe()['data']['machines'] == list(client.values())
+    assert encoder.stats()['deltas'] == 3 and encoder.stats()['keyframes'] == 1
+    # After lost updates the next change goes out as a keyframe, then deltas resume
+    encoder.resync()
+    assert encoder.update([entry('1', 76.0, timestamp='t3')], 'tick 5') is None
+    assert encoder.update([entry('1', 77.0, timestamp='t4')], 'tick 6')['type'] == 'keyframe'
+    assert encoder.update([entry('1', 78.0, timestamp='t5')], 'tick 7')['type'] == 'delta'
+    print(' - Deltas and keyframes rebuild the fleet state: OK')
+
+
+if __name__ == '__main__':
+    print('Running stream delta tests...')
+    test_diff_fields()
+    test_deltas_rebuild_the_fleet()
+    print('All tests completed.')
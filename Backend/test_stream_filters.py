@@ -0,0 +1,151 @@
+# Server-side filters on the vitals stream
+import json
+import threading
+from werkzeug.datastructures import MultiDict
+from services.machine_registry import MachineRegistry
+from services.stream_delta import DeltaEncoder
+from services.stream_filters import FilteredStreams, StreamFilter
+
+MACHINES = [
+    {'id': '1', 'name': 'Haul Truck HT-001', 'type': 'Haul Truck', 'status': 'online', 'location': 'Pit Area A'},
+    {'id': '2', 'name': 'Haul Truck HT-002', 'type': 'Haul Truck', 'status': 'online', 'location': 'Loading Area C'},
+    {'id': '3', 'name': 'Excavator EX-001', 'type': 'Excavator', 'status': 'online', 'location': 'Pit Area A'},
+]
+
+
+def entry(machine_id, temperature, risk_level='low'):
+    return {'machine_id': machine_id, 'vitals': {'temperature': temperature},
+            'prediction': {'risk_level': risk_level}}
+
+
+def setup():
+    lock = threading.RLock()
+    encoder = DeltaEncoder()
+    streams = FilteredStreams(encoder, MachineRegistry(MACHINES).find, lock)
+
+    def tick(*entries):
+        with lock:
+            encoder.update(list(entries), 'now')
+            streams.update('now')
+    return encoder, streams, tick
+
+
+def messages(subscription):
+    frames = []
+    while True:
+        frame = subscription.get(0)
+        if frame is None:
+            return frames
+        frames.append(json.loads(frame.split(b'data: ', 1)[1]))
+
+
+def test_filters_from_query():
+    assert StreamFilter.from_args(MultiDict({'last_event_id': '3'})) is None
+    stream_filter = StreamFilter.from_args(MultiDict([('machine_id', '1,2'), ('machine_id', '3'), ('min_risk', 'high')]))
+    assert stream_filter.machine_ids == {'1', '2', '3'} and stream_filter.min_risk == 'high' and stream_filter.indexed
+    assert not StreamFilter.from_args(MultiDict({'min_risk': 'high', 'max_rate': '0.5'})).indexed
+    for bad in ({'min_risk': 'extreme'}, {'max_rate': 'fast'}, {'max_rate': '0'}):
+        try:
+            StreamFilter.from_args(MultiDict(bad))
+            assert False, bad
+        except ValueError:
+            pass
+    print(' - Filters parsed from query parameters: OK')
+
+
+def test_updates_reach_matching_channels_only():
+    encoder, streams, tick = setup()
+    tick(entry('1', 70.0), entry('2', 71.0), entry('3', 72.0))
+    trucks = streams.subscribe(StreamFilter(machine_type='Haul Truck'))
+    one = streams.subscribe(StreamFilter(machine_ids=['3']))
+    pit_trucks = streams.subscribe(StreamFilter(machine_type='Haul Truck', location='Pit Area A'))
+    assert streams.subscribe(StreamFilter(machine_type='Haul Truck')).hub is trucks.hub
+    keyframe = messages(trucks)[0]
+    assert keyframe['type'] == 'keyframe' and sorted(m['machine_id'] for m in keyframe['data']['machines']) == ['1', '2']
+    assert [m['machine_id'] for m in messages(one)[0]['data']['machines']] == ['3']
+    messages(pit_trucks)
+
+    offers = streams.offers
+    tick(entry('1', 75.0), entry('3', 72.0))
+    # Machine 3 did not change, machine 1 reaches the two truck channels
+    assert streams.offers - offers == 2
+    assert messages(trucks)[0]['data']['machines'] == [{'machine_id': '1', 'vitals': {'temperature': 75.0}}]
+    assert messages(pit_trucks)[0]['data']['machines'][0]['machine_id'] == '1'
+    assert messages(one) == []
+    assert streams.stats()['channels'] == 3 and streams.stats()['subscribers'] == 4
+    print(' - Updates reach the matching channels only, through the index: OK')
+
+
+def test_min_risk_adds_and_removes_machines():
+    encoder, streams, tick = setup()
+    tick(entry('1', 70.0), entry('2', 71.0))
+    alerts = streams.subscribe(StreamFilter(min_risk='high'))
+    assert messages(alerts)[0]['data']['machines'] == []
+    tick(entry('2', 90.0, 'critical'))
+    # Entering the filter: the full entry, not just the change
+    assert messages(alerts)[0]['data']['machines'] == [entry('2', 90.0, 'critical')]
+    tick(entry('2', 91.0, 'critical'), entry('1', 71.0))
+    assert messages(alerts)[0]['data']['machines'] == [{'machine_id': '2', 'vitals': {'temperature': 91.0}}]
+    tick(entry('2', 60.0, 'medium'))
+    assert messages(alerts)[0]['data'] == {'timestamp': 'now', 'machines': [], 'removed': ['2']}
+    print(' - min_risk adds and removes machines as their risk changes: OK')
+
+
+def test_max_rate_coalesces():
+    encoder, streams, tick = setup()
+    tick(entry('1', 70.0))
+    slow = streams.subscribe(StreamFilter(machine_ids=['1'], max_rate=0.001))
+    channel = streams.channel(StreamFilter(machine_ids=['1'], max_rate=0.001))
+    messages(slow)
+    tick(entry('1', 71.0))
+    tick(entry('1', 72.0, 'high'))
+    tick(entry('1', 73.0, 'high'))
+    # The first change goes out, the next ones wait for the interval and are merged
+    assert [m['data']['machines'] for m in messages(slow)] == [[{'machine_id': '1', 'vitals': {'temperature': 71.0}}]]
+    channel.last_flush -= 1000
+    tick()
+    assert messages(slow)[0]['data']['machines'] == [
+        {'machine_id': '1', 'vitals': {'temperature': 73.0}, 'prediction': {'risk_level': 'high'}}]
+    assert channel.coalesced == 1
+    print(' - max_rate holds back and merges changes: OK')
+
+
+def test_held_changes_flush_without_another_update():
+    encoder, streams, tick = setup()
+    tick(entry('1', 70.0))
+    subscription = streams.subscribe(StreamFilter(machine_ids=['1'], max_rate=20))
+    messages(subscription)
+    tick(entry('1', 71.0))
+    tick(entry('1', 72.0))
+    tick(entry('1', 73.0))
+    assert [m['data']['machines'] for m in messages(subscription)] == [[{'machine_id': '1', 'vitals': {'temperature': 71.0}}]]
+    # No further tick: the timer publishes the merged change once the 50 ms interval has passed
+    frame = subscription.get(2.0)
+    assert json.loads(frame.split(b'data: ', 1)[1])['data']['machines'] == [
+        {'machine_id': '1', 'vitals': {'temperature': 73.0}}]
+    assert not streams._held
+    print(' - Held changes are flushed by the timer: OK')
+
+
+def test_idle_channels_are_dropped():
+    encoder, streams, tick = setup()
+    streams.idle_seconds = 0
+    subscription = streams.subscribe(StreamFilter(machine_ids=['1']))
+    tick(entry('1', 70.0))
+    assert streams.stats()['channels'] == 1
+    subscription.close()
+    tick(entry('1', 71.0))
+    stats = streams.stats()
+    assert stats['channels'] == 0 and stats['indexed_machines'] == 0
+    print(' - Channels without subscribers are dropped: OK')
+
+
+if __name__ == '__main__':
+    print('Running stream filter tests...')
+    test_filters_from_query()
+    test_updates_reach_matching_channels_only()
+    test_min_risk_adds_and_removes_machines()
+    test_max_rate_coalesces()
+    test_held_changes_flush_without_another_update()
+    test_idle_channels_are_dropped()
+    print('All tests completed.')
@@ -0,0 +1,109 @@
+# Pub/sub fan-out of the vitals stream
+import json
+import threading
+from services.stream_hub import StreamHub, encode_event, HEARTBEAT_FRAME
+
+
+def event(frame):
+    """(id, message) of an SSE frame"""
+    id_line, data_line = frame.decode().strip().split('\n')
+    return int(id_line[4:]), json.loads(data_line[6:])
+
+
+def test_every_subscriber_gets_every_update():
+    hub = StreamHub(maxsize=8)
+    assert hub.publish({'n': 'nobody listening'}) == 0
+    first = hub.subscribe(initial=b'snapshot')
+    second = hub.subscribe()
+    for i in range(3):
+        hub.publish({'n': i})
+    assert first.get(0) == b'snapshot'
+    assert [event(first.get(0)) for _ in range(3)] == [(2, {'n': 0}), (3, {'n': 1}), (4, {'n': 2})]
+    assert [event(second.get(0))[1]['n'] for _ in range(3)] == [0, 1, 2]
+    assert first.get(0) is None and second.get(0.01) is None
+    second.close()
+    hub.publish({'n': 3})
+    assert event(first.get(0)) == (5, {'n': 3}) and hub.subscribers == 1 and second.backlog == 0
+    print(' - Every subscriber gets every update, snapshot first: OK')
+
+
+def test_slow_subscriber_resyncs():
+    hub = StreamHub(maxsize=3, backlog=5)
+    keyframe = lambda event_id: b'keyframe %d' % event_id
+    slow = hub.subscribe(keyframe)
+    fast = hub.subscribe(keyframe)
+    assert slow.get(0) == fast.get(0) == b'keyframe 0'
+    overflows = 0
+    for i in range(4):
+        overflows += hub.publish({'n': i})
+        assert event(fast.get(0))[1]['n'] == i
+    # The 4th event overflowed the slow queue: replayed from the backlog
+    assert overflows == 1 and slow.dropped == 3 and fast.dropped == 0
+    assert [event(slow.get(0))[0] for _ in range(4)] == [1, 2, 3, 4] and slow.get(0) is None
+    stats = hub.stats()
+    assert stats['slow_consumers'] == 1 and stats['dropped'] == 3 and stats['resyncs'] == 1
+    # Fell behind further than the backlog reaches: starts over from a keyframe
+    for i in range(4, 12):
+        hub.publish({'n': i})
+    assert slow.get(0) == b'keyframe 12' and slow.get(0) is None
+    hub.publish({'n': 12})
+    assert event(slow.get(0)) == (13, {'n': 12})
+    assert slow.dropped == 9 and slow.resyncs == 2
+    slow.close()
+    fast.close()
+    assert hub.stats()['subscribers'] == 0 and hub.stats()['dropped'] == 9 + fast.dropped
+    print(' - Slow subscriber resyncs from the backlog or a keyframe: OK')
+
+
+def test_get_wakes_on_publish():
+    hub = StreamHub()
+    subscription = hub.subscribe()
+    timer = threading.Timer(0.05, hub.publish, args=({'n': 'late'},))
+    timer.start()
+    assert event(subscription.get(timeout=5))[1] == {'n': 'late'}
+    timer.join()
+    print(' - get() wakes up on publish: OK')
+
+
+def test_update_encoded_once_and_shared():
+    hub = StreamHub()
+    subscriptions = [hub.subscribe() for _ in range(3)]
+    update = {'type': 'update', 'data': {'machines': [{'machine_id': '1', 'vitals': {'temperature': 80.5}}]}}
+    hub.publish(update)
+    frames = [s.get(0) for s in subscriptions]
+    assert frames[0] == encode_event(update, 1) and all(frame is frames[0] for frame in frames)
+    assert frames[0].startswith(b'id: 1\ndata: ') and frames[0].endswith(b'\n\n')
+    assert event(frames[0]) == (1, update)
+    assert json.loads(HEARTBEAT_FRAME[6:]) == {'type': 'heartbeat'}
+    print(' - Update encoded once, same bytes for every subscriber: OK')
+
+
+def test_last_event_id_replays_from_backlog():
+    hub = StreamHub(maxsize=4, backlog=6)
+    keyframe = lambda event_id: b'keyframe %d' % event_id
+    for i in range(8):
+        hub.publish({'n': i})
+    # Missed events 7 and 8 are still in the backlog
+    resumed = hub.subscribe(keyframe, last_event_id=6)
+    assert [event(resumed.get(0))[0] for _ in range(2)] == [7, 8] and resumed.get(0) is None
+    # Up to date: nothing to replay, no keyframe either
+    current = hub.subscribe(keyframe, last_event_id=8)
+    assert current.get(0) is None
+    # Event 2 fell out of the backlog; an id from before a restart
+    for last_event_id in (1, 99):
+        assert hub.subscribe(keyframe, last_event_id=last_event_id).get(0) == b'keyframe 8'
+    assert hub.subscribe(keyframe).get(0) == b'keyframe 8'
+    stats = hub.stats()
+    assert stats['resumed'] == 2 and stats['replayed'] == 2 and stats['resume_misses'] == 2
+    assert stats['last_event_id'] == 8 and stats['backlog'] == 6
+    print(' - Last-Event-ID replays missed events from the backlog: OK')
+
+
+if __name__ == '__main__':
+    print('Running stream hub tests...')
+    test_every_subscriber_gets_every_update()
+    test_slow_subscriber_resyncs()
+    test_get_wakes_on_publish()
+    test_update_encoded_once_and_shared()
+    test_last_event_id_replays_from_backlog()
+    print('All tests completed.')
@@ -0,0 +1,76 @@
+# Staged tick pipeline: chaining, bounded queues and per-stage metrics
+import threading
+import time
+from services.tick_pipeline import Pipeline, PipelineStage
+
+
+def test_stages_chain_and_report():
+    out = []
+    failed = []
+    sink = PipelineStage('sink', out.append)
+    double = PipelineStage('double', lambda x: 2 * x if x != 3 else 1 / 0, downstream=[sink],
+                           on_error=lambda item, e: failed.append(item))
+    pipeline = Pipeline([double, sink])
+    pipeline.start()
+    for i in range(5):
+        pipeline.submit('double', i)
+    pipeline.stop()
+    assert out == [0, 2, 4, 8] and failed == [3]
+    stats = pipeline.stats()
+    assert stats['double']['processed'] == 4 and stats['double']['errors'] == 1
+    assert stats['sink']['received'] == 4 and stats['sink']['backlog'] == 0
+    print(' - Stages chain, errors are released: OK')
+
+
+def test_slow_stage_drops_instead_of_blocking():
+    release = threading.Event()
+    dropped = []
+    slow = PipelineStage('slow', lambda x: release.wait(), maxsize=2, when_full='drop', on_drop=dropped.append)
+    fast = PipelineStage('fast', lambda x: x, downstream=[slow])
+    pipeline = Pipeline([fast, slow])
+    pipeline.start()
+    start = time.perf_counter()
+    for i in range(20):
+        pipeline.submit('fast', i)
+    while pipeline['fast'].stats()['processed'] < 20:
+        time.sleep(0.001)
+    assert time.perf_counter() - start < 1.0
+    stats = pipeline['slow'].stats()
+    assert stats['dropped'] >= 17 and stats['max_backlog'] == 2
+    assert len(dropped) == stats['dropped'] and dropped == sorted(dropped)
+    release.set()
+    pipeline.stop()
+    try:
+        PipelineStage('bad', print, when_full='wait')
+        assert False
+    except ValueError:
+        pass
+    print(' - Slow stage drops when full, upstream keeps going: OK')
+
+
+def test_late_stop_leaves_next_run_running():
+    out = []
+    sink = PipelineStage('sink', out.append, maxsize=4)
+    pipeline = Pipeline([sink])
+    first = pipeline.start()
+    second = pipeline.start()
+    pipeline.stop(runs=first)
+    done = threading.Event()
+
+    def submit():
+        for i in range(20):
+            pipeline.submit('sink', i)
+        done.set()
+    threading.Thread(target=submit, daemon=True).start()
+    assert done.wait(2.0)
+    pipeline.stop(runs=second)
+    assert out == list(range(20))
+    print(' - Stopping an old run leaves the next one running: OK')
+
+
+if __name__ == '__main__':
+    print('Running tick pipeline tests...')
+    test_stages_chain_and_report()
+    test_slow_stage_drops_instead_of_blocking()
+    test_late_stop_leaves_next_run_running()
+    print('All tests completed.')
@@ -0,0 +1,63 @@
+# Per-machine tick scheduler: adaptive cadence, suspension and catch-up policies
+from services.tick_scheduler import TickScheduler, RISK_CADENCE, STATUS_CADENCE, cadence_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cadence_follows_risk_and_status():
+    clock = FakeClock()
+    scheduler = TickScheduler(clock=clock)
+    for mid, status in (('1', 'online'), ('2', 'online'), ('3', 'maintenance'), ('4', 'offline')):
+        scheduler.add(mid, status)
+    assert len(scheduler) == 3 and scheduler.pop_due() == ['1', '2', '3']
+    scheduler.complete('1', 'online', 'critical')
+    scheduler.complete('2', 'online', 'medium')
+    assert scheduler.complete('3', 'maintenance') == STATUS_CADENCE['maintenance']
+    assert scheduler.next_due() == RISK_CADENCE['critical']
+    assert cadence_for('offline', 'critical') is None
+
+    clock.now = 30.0
+    assert scheduler.pop_due() == ['1', '2']
+    scheduler.complete('1', 'online', 'critical')
+    scheduler.complete('2', 'offline', 'critical')    # auto-shutdown during the sample
+    assert scheduler.stats()['cadences'] == {'5s': 1, 'suspended': 2, '120s': 1}
+
+    scheduler.update('4', 'online')                     # resumed: due immediately
+    scheduler.update('3', 'online')                     # faster cadence brings it forward
+    assert scheduler.pop_due() == ['4'] and scheduler.next_due() == 35.0
+    clock.now = 60.0
+    assert scheduler.pop_due() == ['1', '3'] and scheduler.stats()['running'] == 3
+    print(' - Cadence follows risk level and status: OK')
+
+
+def test_catch_up_policies():
+    next_due = {}
+    for policy in ('skip', 'align', 'burst'):
+        clock = FakeClock()
+        scheduler = TickScheduler(clock=clock, catch_up=policy)
+        scheduler.add('1', 'online', 'critical')
+        scheduler.pop_due()
+        clock.now = 12.0                                 # sample took 12s: two 5s samples missed
+        next_due[policy] = scheduler.complete('1', 'online', 'critical')
+        stats = scheduler.stats()
+        assert stats['overruns'] == 1 and stats['missed_samples'] == 2
+    assert next_due == {'skip': 17.0, 'align': 15.0, 'burst': 5.0}
+    try:
+        TickScheduler(catch_up='never')
+        assert False
+    except ValueError:
+        pass
+    print(' - Overruns detected and caught up per policy: OK')
+
+
+if __name__ == '__main__':
+    print('Running tick scheduler tests...')
+    test_cadence_follows_risk_and_status()
+    test_catch_up_policies()
+    print('All tests completed.')
@@ -0,0 +1,54 @@
+# Per-machine ring-buffer history
+from datetime import datetime, timedelta
+import numpy as np
+from services.vitals_history import VitalsRingBuffer
+
+
+def _fill(history, n, start=datetime(2024, 1, 1)):
+    for i in range(n):
+        history.append(start + timedelta(seconds=30 * i), 70.0 + i, 100.0, 0.4, i if i % 2 else None)
+
+
+def test_window_wraps_without_copying():
+    history = VitalsRingBuffer(depth=5)
+    assert len(history) == 0 and history.records(10) == []
+    _fill(history, 3)
+    (view,) = history.window()
+    assert len(history) == 3 and view['temperature'].tolist() == [70.0, 71.0, 72.0]
+    _fill(history, 8)
+    views = history.window(4)
+    assert len(history) == 5 and len(views) == 2
+    assert all(np.shares_memory(view, history._data) for view in views)
+    assert np.concatenate(views)['temperature'].tolist() == [74.0, 75.0, 76.0, 77.0]
+    assert len(history.window(1)) == 1 and history.window(0)[0].size == 0
+    try:
+        VitalsRingBuffer(depth=0)
+        assert False
+    except ValueError:
+        pass
+    print(' - Ring buffer wraps and windows are views: OK')
+
+
+def test_records_serialize_history_dicts():
+    history = VitalsRingBuffer(depth=100)
+    _fill(history, 60)
+    history.append(datetime(2024, 1, 2, 12, 0, 0, 500), 83.77, 101.25, 0.567, 12)
+    records = history.records(50)
+    assert len(records) == 50 and len(history.records()) == 61
+    assert records[-1] == {
+        'Timestamp': '2024-01-02T12:00:00.000500',
+        'Temperature': 83.77,
+        'Pressure': 101.25,
+        'Vibration': 0.567,
+        'Failure_Risk': 12
+    }
+    assert records[-2]['Failure_Risk'] == 59 and records[-3]['Failure_Risk'] is None
+    assert datetime.fromisoformat(records[0]['Timestamp']) == datetime(2024, 1, 1) + timedelta(seconds=30 * 11)
+    print(' - Windows serialize to history dicts: OK')
+
+
+if __name__ == '__main__':
+    print('Running vitals history tests...')
+    test_window_wraps_without_copying()
+    test_records_serialize_history_dicts()
+    print('All tests completed.')
@@ -0,0 +1,51 @@
+# Slotted vitals / prediction records and their JSON shape
+from datetime import datetime
+from services.fleet_state import SnapshotStore
+from services.sensor_simulation import SensorReading, SensorStatus
+from services.vitals_records import MachineVitals, Prediction
+
+
+def test_records_serialize_at_the_boundary():
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    vit = MachineVitals('1', 'Haul Truck HT-001', 'Haul Truck', 75.0, 100.0, 0.4, now, 'online')
+    sample = vit.sample(80.5, 120.25, 1.125, now, 'caution')
+    sample.prediction = Prediction.from_result({
+        'most_likely_failure': 'engine_breakdown',
+        'most_likely_failure_probability': 0.75,
+        'most_likely_failure_estimated_hours': 42,
+        'model_version': 'v1'
+    }, now)
+    data = sample.to_dict()
+    assert data['timestamp'] == '2025-01-01T12:00:00' and data['mode'] == 'caution' and data['status'] == 'online'
+    assert data['prediction'] == {
+        'failure_risk': 75, 'predicted_failure_type': 'engine_breakdown', 'estimated_hours': 42,
+        'risk_level': 'critical', 'model_version': 'v1', 'timestamp': '2025-01-01T12:00:00'
+    }
+    assert vit.to_dict()['prediction'] is None
+    assert not hasattr(sample, '__dict__') and not hasattr(sample.prediction, '__dict__')
+    reading = SensorReading(45.0, SensorStatus.NORMAL, now)
+    assert not hasattr(reading, '__dict__') and reading.to_dict()['status'] == 'normal'
+    print(' - Records are slotted, dicts built by to_dict(): OK')
+
+
+def test_snapshot_replace_copies_records():
+    store = SnapshotStore()
+    vit = MachineVitals('1', 'Haul Truck HT-001', 'Haul Truck', 75.0, 100.0, 0.4, datetime(2025, 1, 1), 'online')
+    with store.write_lock:
+        first = store.publish({'1': vit})
+        second = store.replace('1', status='offline')
+    assert first.get('1').status == 'online' and second.get('1').status == 'offline'
+    assert second.get('1').temperature == 75.0
+    try:
+        vit.replace(colour='red')
+        assert False
+    except ValueError:
+        pass
+    print(' - Snapshot replace() copies records: OK')
+
+
+if __name__ == '__main__':
+    print('Running vitals record tests...')
+    test_records_serialize_at_the_boundary()
+    test_snapshot_replace_copies_records()
+    print('All tests completed.')